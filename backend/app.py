@@ -1,5 +1,8 @@
+import hashlib
+import json
 import os
-from dotenv import load_dotenv
+import time
+from datetime import datetime
 
 # Load .env file FIRST, before any other imports that might use environment variables
 # This ensures Config and other modules can read environment variables correctly
@@ -7,33 +10,60 @@ from dotenv import load_dotenv
 basedir = os.path.abspath(os.path.dirname(__file__))
 env_path = os.path.join(basedir, '.env')
 if os.path.exists(env_path):
+    from dotenv import load_dotenv
     load_dotenv(env_path)
-else:
-    # Running on serverless platform - environment variables are already set
-    load_dotenv()  # This will load from system environment
+# else: running on serverless platform - environment variables are already set,
+# so python-dotenv is not even imported (it costs ~40ms of cold start)
 
-from flask import Flask, request, jsonify
+import click
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-from sqlalchemy import text
+from sqlalchemy import select, func, text
 
 from config import Config
 from database import db
-from models import Report, Message, User, Post, Comment, Like, Save
-from schemas import (
-    ReportCreateSchema, MessageCreateSchema, ReportPublicSchema,
-    RegisterSchema, LoginSchema, UserPublicSchema, CommentPublicSchema
+from models import Report, Message, User, Post, Comment, Like, Save, Attachment, Media
+from feed import SORTS as FEED_SORTS, fetch_feed, fetch_feed_rows, feed_etag
+from cache import ResponseCache, MemoryBackend, RedisBackend
+from events import MemoryBroker, RedisBroker, Overflow, sse_frame
+from migrations import ensure_schema, schema_ready, upgrade
+from db_pool import pool_metrics
+from sqlite_tuning import apply_pragmas, SingleWriter
+from http_cache import weak_etag, is_not_modified, set_cache_headers, not_modified_response
+from counters import reconcile_counters
+from hot import install_sqlite_functions, rebuild_hot_scores
+from reactions import set_reaction, toggle_reaction
+from hashing import HashingPool, HashingBusy
+from uploads import UploadError, parse_report_upload
+from storage import create_storage
+from jobs import JobRunner, JOBS, enqueue
+import tasks  # registers the background job handlers
+from user_cache import UserCache
+from pagination import (
+    InvalidCursor, parse_page_args, keyset_page, split_page, decode_cursor, decode_rank_cursor, encode_rank_cursor
+)
+from search import SearchError, search_statement
+from timeline import decode_timeline_cursor, fetch_timeline
+from home import fetch_home_rows, follow
+from serializers import (
+    dump_user, dump_comment, dump_report, dump_public_report, dump_feed_post, dump_attachment, dump_message,
+    install_json_provider
 )
 from security import (
-    gen_ticket_id, gen_access_code, hash_code, verify_code,
-    issue_token, verify_token
+    gen_ticket_id, gen_access_code, hash_code,
+    issue_token, verify_token, issue_report_token, verify_report_token,
+    issue_upload_token, verify_upload_token,
+    CodeVerificationCache, argon2_params, verify_and_update_code,
+    calibrate_argon2, password_needs_rehash
 )
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     app.config.from_object(Config)
+    install_json_provider(app)
 
     # CORS configuration - handle both wildcard and specific origins
     cors_origins = app.config.get("CORS_ORIGINS", "*")
@@ -53,38 +83,219 @@ def create_app() -> Flask:
     # Configure CORS
     CORS(app, 
          resources={r"/*": {"origins": cors_origins}},  # Changed from /api/* to /* to catch all routes
-         allow_headers=["Content-Type", "Authorization", "X-Access-Code"],
+         allow_headers=["Content-Type", "Authorization", "X-Access-Code", "X-Report-Token"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
          supports_credentials=False)
 
     db.init_app(app)
 
+    if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        with app.app_context():
+            apply_pragmas(
+                db.engine,
+                busy_timeout_ms=app.config["SQLITE_BUSY_TIMEOUT_MS"],
+                synchronous=app.config["SQLITE_SYNCHRONOUS"],
+                mmap_size=app.config["SQLITE_MMAP_SIZE"],
+            )
+            install_sqlite_functions(db.engine)
+        if app.config["SQLITE_SINGLE_WRITER"]:
+            SingleWriter(timeout=app.config["SQLITE_BUSY_TIMEOUT_MS"] / 1000).install(db.session)
+
     # NOTE: Database initialization moved out to avoid import-time side effects
     # that crash serverless platforms. Call init_db() explicitly when needed.
+    # With SCHEMA_BOOTSTRAP=auto the first request of each process applies
+    # pending migrations once; after that the latch is a flag check.
+    if app.config["SCHEMA_BOOTSTRAP"] == "auto":
+        @app.before_request
+        def bootstrap_schema():
+            try:
+                ensure_schema(db.engine)
+            except Exception as init_error:
+                app.logger.warning(f"Schema bootstrap deferred: {init_error}")
+
+    cache_url = app.config["CACHE_URL"]
+    if cache_url:
+        cache_backend = RedisBackend.from_url(cache_url)
+    else:
+        cache_backend = MemoryBackend(app.config["RESPONSE_CACHE_SIZE"], app.config["RESPONSE_CACHE_TTL"])
+    response_cache = ResponseCache(cache_backend, ttl=app.config["RESPONSE_CACHE_TTL"])
+    app.extensions["response_cache"] = response_cache
+
+    # Live report events (events.py): redis pub/sub shares them between workers
+    events_url = app.config["EVENTS_URL"]
+    if events_url:
+        broker = RedisBroker.from_url(events_url, buffer_size=app.config["SSE_BUFFER_SIZE"])
+    else:
+        broker = MemoryBroker(app.config["SSE_BUFFER_SIZE"])
+    app.extensions["events"] = broker
+
+    user_cache = UserCache(app.config["USER_CACHE_SIZE"], app.config["USER_CACHE_TTL"])
+    app.extensions["user_cache"] = user_cache
 
     def get_current_user():
+        """Resolve the bearer token to a UserSnapshot, once per request."""
+        if "current_user" in g:
+            return g.current_user
+        user = None
         auth = request.headers.get("Authorization", "")
         parts = auth.split()
         if len(parts) == 2 and parts[0].lower() == "bearer":
             data = verify_token(parts[1])
             if data and (uid := data.get("uid")):
-                user = User.query.get(uid)
-                if user:
-                    return user
-        return None
+                user = user_cache.load(uid)
+        g.current_user = user
+        return user
+
+    def public_cache_ages():
+        return {"max_age": app.config["PUBLIC_CACHE_MAX_AGE"], "s_maxage": app.config["PUBLIC_CACHE_S_MAXAGE"]}
+
+    def page_cache_key(size: int) -> str:
+        return f"{request.args.get('cursor', '')}:{size}"
+
+    def get_page_args():
+        return parse_page_args(request.args, app.config["PAGE_SIZE"], app.config["MAX_PAGE_SIZE"])
+
+    def get_page_size():
+        """Page size only, for routes whose cursor is not a (created_at, id) one."""
+        args = {k: v for k, v in request.args.items() if k != "cursor"}
+        return parse_page_args(args, app.config["PAGE_SIZE"], app.config["MAX_PAGE_SIZE"])[1]
 
     def get_report_or_404(ticket: str):
         return Report.query.filter_by(ticket=ticket).first()
 
+    hasher = HashingPool(
+        workers=app.config["HASH_WORKERS"],
+        queue_depth=app.config["HASH_QUEUE_DEPTH"],
+        retry_after=app.config["HASH_RETRY_AFTER"],
+        mode=app.config["HASH_MODE"],
+    )
+    app.extensions["hasher"] = hasher
+
+    code_params = argon2_params(
+        app.config["ARGON2_PROFILE"],
+        app.config["ARGON2_TIME_COST"],
+        app.config["ARGON2_MEMORY_COST"],
+        app.config["ARGON2_PARALLELISM"],
+    )
+    password_method = app.config["PASSWORD_HASH_METHOD"]
+
+    code_cache = CodeVerificationCache(app.config["CODE_CACHE_SIZE"], app.config["CODE_CACHE_TTL"])
+
+    # Attachment blobs: local folder or an S3-compatible bucket (storage.py)
+    storage = create_storage(app.config)
+    app.extensions["storage"] = storage
+
+    # Post-commit work runs as background jobs (jobs.py, handlers in tasks.py)
+    job_runner = JobRunner(
+        app,
+        mode=app.config["JOB_MODE"],
+        poll_interval=app.config["JOB_POLL_INTERVAL"],
+        lease=app.config["JOB_LEASE_SECONDS"],
+        backoff_base=app.config["JOB_BACKOFF_BASE"],
+        backoff_max=app.config["JOB_BACKOFF_MAX"],
+    )
+    job_runner.install()
+    app.extensions["jobs"] = job_runner
+
+    def check_access_code(rpt: Report, code: str) -> bool:
+        secret = app.config["SECRET_KEY"]
+        if code_cache.contains(rpt.ticket, code, secret):
+            return True
+        ok, new_hash = hasher.run(verify_and_update_code, code, rpt.code_hash, code_params)
+        if not ok:
+            return False
+        if new_hash:
+            # Cost profile changed since this code was hashed: migrate it.
+            rpt.code_hash = new_hash
+            db.session.commit()
+        code_cache.add(rpt.ticket, code, secret)
+        return True
+
     def require_code_and_report(ticket: str):
-        code = request.args.get("code", "") or request.headers.get("X-Access-Code", "")
+        """
+        Authorize access to a report by a report token (X-Report-Token) or,
+        failing that, the access code. Sets g.report_token when a new token
+        should be handed back to the client.
+        """
         rpt = get_report_or_404(ticket)
         if not rpt:
             return None, jsonify({"error": "Not found"}), 404
-        if not code or not verify_code(code, rpt.code_hash):
+
+        # Also accepted as ?token= for EventSource, which cannot set headers
+        token = request.headers.get("X-Report-Token", "") or request.args.get("token", "")
+        if token and verify_report_token(token, ticket, app.config["REPORT_TOKEN_MAX_AGE"]):
+            return rpt, None, None
+
+        code = request.args.get("code", "") or request.headers.get("X-Access-Code", "")
+        if not code or not check_access_code(rpt, code):
             return None, jsonify({"error": "Forbidden"}), 403
+        g.report_token = issue_report_token(ticket)
         return rpt, None, None
 
+    def stream_upload(rpt=None, **limits):
+        """Parse a multipart body, streaming its files into storage within
+        what is left of the per-report limits (or the given `limits`)."""
+        boundary = request.mimetype_params.get("boundary", "")
+        if not boundary:
+            raise UploadError("Missing multipart boundary", 400)
+        if not limits:
+            files, used = attachment_usage(rpt)
+            limits = dict(
+                max_file_bytes=app.config["UPLOAD_MAX_FILE_BYTES"],
+                max_total_bytes=app.config["UPLOAD_MAX_REPORT_BYTES"],
+                max_files=app.config["UPLOAD_MAX_FILES"],
+                used_bytes=used,
+                used_files=files,
+            )
+        return parse_report_upload(
+            request.stream, boundary.encode("latin-1"), storage,
+            chunk_size=app.config["UPLOAD_CHUNK_SIZE"], **limits,
+        )
+
+    def attachment_usage(rpt):
+        """(file count, total bytes) already attached to a report."""
+        if rpt is None or rpt.id is None:
+            return 0, 0
+        return db.session.execute(
+            select(func.count(Attachment.id), func.coalesce(func.sum(Attachment.size), 0))
+            .where(Attachment.report_id == rpt.id)
+        ).one()
+
+    def attach_files(rpt, files):
+        """Commit (or stage) streamed files in storage and add their
+        Attachment rows to the session. Returns what undo_attach() needs if
+        the transaction is rolled back."""
+        created, staged = [], []
+        attached = {a.sha256 for a in rpt.attachments}
+        for f in files:
+            token = storage.stage(f.upload)
+            if token:
+                # Moving it into place scales with file size: done after commit
+                staged.append(token)
+                enqueue("attachments.promote", {"staged": token, "sha256": f.sha256}, key=f"promote:{token}")
+            elif storage.commit(f.upload, f.sha256):
+                created.append(f.sha256)
+            if f.sha256 not in attached:
+                attached.add(f.sha256)
+                rpt.attachments.append(Attachment(
+                    sha256=f.sha256,
+                    size=f.size,
+                    filename=secure_filename(f.filename) or "evidence",
+                    content_type=f.content_type,
+                ))
+        return created, staged
+
+    def undo_attach(stored):
+        """After a rollback, drop staged uploads and delete blobs the failed
+        request introduced unless another report attached the same content
+        in the meantime."""
+        created, staged = stored
+        for token in staged:
+            storage.discard_staged(token)
+        for sha256 in created:
+            if db.session.scalar(select(Attachment.id).filter_by(sha256=sha256).limit(1)) is None:
+                storage.delete(sha256)
+
     # -----------------------
     # Root & Health Check
     # -----------------------
@@ -115,19 +326,14 @@ def create_app() -> Flask:
                     "login": "/api/v1/auth/login"
                 },
                 "reports": "/api/v1/reports",
-                "feed": "/api/v1/feed"
+                "feed": "/api/v1/feed",
+                "timeline": "/api/v1/timeline"
             }
         }), 200
     
     @app.get("/api/v1/health")
     def health_check():
         """Health check endpoint to verify server is running"""
-        # Lazy initialization: ensure tables exist on first health check
-        try:
-            db.create_all()
-        except Exception as init_error:
-            print(f"⚠ Lazy DB init warning: {init_error}")
-        
         # Check database connection
         db_status = "unknown"
         db_error = None
@@ -148,7 +354,13 @@ def create_app() -> Flask:
                 "status": db_status,
                 "type": "postgresql" if "postgresql" in app.config.get('SQLALCHEMY_DATABASE_URI', '') else "sqlite",
                 "error": db_error
-            }
+            },
+            "schema_ready": schema_ready(db.engine),
+            "pool": pool_metrics(db.engine),
+            "hashing": hasher.metrics(),
+            "response_cache": response_cache.metrics(),
+            "jobs": job_runner.metrics(),
+            "events": broker.metrics()
         }), 200
 
     # -----------------------
@@ -156,8 +368,9 @@ def create_app() -> Flask:
     # -----------------------
     @app.post("/api/v1/auth/register")
     def register():
+        from schemas import register_schema  # deferred: keeps marshmallow off cold start
         payload = request.get_json(silent=True) or {}
-        errors = RegisterSchema().validate(payload)
+        errors = register_schema.validate(payload)
         if errors:
             return jsonify({"errors": errors}), 400
 
@@ -167,7 +380,7 @@ def create_app() -> Flask:
         user = User(
             email=payload["email"].lower(),
             name=payload["name"],
-            password_hash=generate_password_hash(payload["password"]),
+            password_hash=hasher.run(generate_password_hash, payload["password"], password_method),
             avatar_url=None,
             verified=False,
         )
@@ -175,59 +388,168 @@ def create_app() -> Flask:
         db.session.commit()
 
         token = issue_token({"uid": user.id})
-        return jsonify({"token": token, "user": UserPublicSchema().dump(user)}), 201
+        return jsonify({"token": token, "user": dump_user(user)}), 201
 
     @app.post("/api/v1/auth/login")
     def login():
+        from schemas import login_schema  # deferred: keeps marshmallow off cold start
         payload = request.get_json(silent=True) or {}
-        errors = LoginSchema().validate(payload)
+        errors = login_schema.validate(payload)
         if errors:
             return jsonify({"errors": errors}), 400
 
         user = User.query.filter_by(email=payload["email"].lower()).first()
-        if not user or not check_password_hash(user.password_hash, payload["password"]):
+        if not user or not hasher.run(check_password_hash, user.password_hash, payload["password"]):
             return jsonify({"error": "Invalid credentials"}), 401
 
+        if password_needs_rehash(user.password_hash, password_method):
+            user.password_hash = hasher.run(generate_password_hash, payload["password"], password_method)
+            db.session.commit()
+
         token = issue_token({"uid": user.id})
-        return jsonify({"token": token, "user": UserPublicSchema().dump(user)}), 200
+        return jsonify({"token": token, "user": dump_user(user)}), 200
 
     @app.get("/api/v1/feed")
     def get_feed():
+        sort = request.args.get("sort", "new")
+        if sort not in FEED_SORTS:
+            return jsonify({"error": f"sort must be one of {', '.join(FEED_SORTS)}"}), 400
+        try:
+            if sort == "hot":
+                cursor = request.args.get("cursor")
+                position, size = (decode_rank_cursor(cursor) if cursor else None), get_page_size()
+            else:
+                position, size = get_page_args()
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
         user = get_current_user()
-        posts = Post.query.order_by(Post.created_at.desc()).limit(20).all()
-        items = []
-        for p in posts:
-            like_count = len(p.likes)
-            comment_count = len(p.comments)
-            liked = False
-            saved = False
-            if user:
-                liked = any(l.user_id == user.id for l in p.likes)
-                saved = any(s.user_id == user.id for s in p.saves)
-            items.append({
-                "id": p.id,
-                "caption": p.caption,
-                "image_url": p.image_url,
-                "created_at": p.created_at.isoformat(),
-                "author": {
-                    "id": p.author.id,
-                    "email": p.author.email,
-                    "name": p.author.name,
-                    "avatar_url": p.author.avatar_url,
-                    "verified": p.author.verified,
-                },
-                "like_count": like_count,
-                "comment_count": comment_count,
-                "liked": liked,
-                "saved": saved,
-            })
-        return jsonify({"posts": items}), 200
+        if user is not None:
+            # A viewer's liked/saved flags are private: never share or cache.
+            items, next_cursor = fetch_feed(viewer_id=user.id, limit=size, position=position, sort=sort)
+            resp = jsonify({"posts": items, "next_cursor": next_cursor})
+            resp.cache_control.private = True
+            resp.cache_control.no_cache = True
+            resp.vary.add("Authorization")
+            return resp, 200
+
+        def build_page():
+            rows, next_cursor = fetch_feed_rows(limit=size, position=position, sort=sort)
+            return {
+                "body": {"posts": [dump_feed_post(r) for r in rows], "next_cursor": next_cursor},
+                "etag": feed_etag(rows, next_cursor),
+            }
+
+        page = response_cache.get_or_compute("feed", f"{sort}:{page_cache_key(size)}", build_page)
+        cache_args = dict(vary="Authorization", **public_cache_ages())
+        if is_not_modified(page["etag"]):
+            return set_cache_headers(not_modified_response(), page["etag"], **cache_args)
+        return set_cache_headers(jsonify(page["body"]), page["etag"], **cache_args), 200
+
+    @app.get("/api/v1/timeline")
+    def get_timeline():
+        """Feed posts and public reports merged newest first (timeline.py)."""
+        try:
+            positions = decode_timeline_cursor(request.args.get("cursor"))
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        size = get_page_size()
+        user = get_current_user()
+        if user is not None:
+            # Posts carry the viewer's liked/saved flags: never share or cache.
+            page = fetch_timeline(viewer_id=user.id, limit=size, positions=positions)
+            resp = jsonify({"items": page["items"], "next_cursor": page["next_cursor"]})
+            resp.cache_control.private = True
+            resp.cache_control.no_cache = True
+            resp.vary.add("Authorization")
+            return resp, 200
+
+        def build_page():
+            page = fetch_timeline(limit=size, positions=positions)
+            return {
+                "body": {"items": page["items"], "next_cursor": page["next_cursor"]},
+                "etag": page["etag"],
+            }
+
+        page = response_cache.get_or_compute(
+            ("feed", "reports"), f"timeline:{page_cache_key(size)}", build_page
+        )
+        cache_args = dict(vary="Authorization", **public_cache_ages())
+        if is_not_modified(page["etag"]):
+            return set_cache_headers(not_modified_response(), page["etag"], **cache_args)
+        return set_cache_headers(jsonify(page["body"]), page["etag"], **cache_args), 200
+
+    @app.get("/api/v1/home")
+    def get_home():
+        """Posts of the accounts the user follows, newest first (home.py)."""
+        user = get_current_user()
+        if not user:
+            return jsonify({"error": "Unauthorized"}), 401
+        try:
+            position, size = get_page_args()
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        rows, next_cursor = fetch_home_rows(
+            user.id, size, position, max_followers=app.config["FANOUT_MAX_FOLLOWERS"]
+        )
+        resp = jsonify({"posts": [dump_feed_post(r) for r in rows], "next_cursor": next_cursor})
+        resp.cache_control.private = True
+        resp.cache_control.no_cache = True
+        resp.vary.add("Authorization")
+        return resp, 200
+
+    @app.put("/api/v1/users/<int:user_id>/follow")
+    @app.delete("/api/v1/users/<int:user_id>/follow")
+    def set_following(user_id: int):
+        user = get_current_user()
+        if not user:
+            return jsonify({"error": "Unauthorized"}), 401
+        if user_id == user.id:
+            return jsonify({"error": "Cannot follow yourself"}), 400
+
+        following = request.method == "PUT"
+        _, follower_count = follow(
+            user.id, user_id, following,
+            max_followers=app.config["FANOUT_MAX_FOLLOWERS"], backfill=app.config["HOME_FOLLOW_BACKFILL"],
+        )
+        if follower_count is None:
+            return jsonify({"error": "Not found"}), 404
+        return jsonify({"following": following, "follower_count": follower_count}), 200
 
     @app.post("/api/v1/posts")
     def create_post():
         user = get_current_user()
         if not user:
             return jsonify({"error": "Unauthorized"}), 401
+
+        if request.mimetype == "multipart/form-data":
+            # Uploaded image: stored as-is, variants are built by a job
+            upload = stream_upload(
+                max_file_bytes=app.config["IMAGE_MAX_BYTES"],
+                max_total_bytes=app.config["IMAGE_MAX_BYTES"],
+                max_files=1,
+            )
+            try:
+                image = next((f for f in upload.files if f.field == "image"), None)
+                if image is None or not (image.content_type or "").startswith("image/"):
+                    return jsonify({"error": "image file required"}), 400
+                p = Post(
+                    user_id=user.id, image_url="", image_status="processing",
+                    caption=(upload.fields.get("caption") or "").strip(),
+                )
+                db.session.add(p)
+                db.session.flush()
+                storage.commit(image.upload, image.sha256)
+                enqueue("images.process_post", {"post_id": p.id, "sha256": image.sha256})
+                enqueue("timelines.fan_out", {"post_id": p.id})
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                upload.discard()
+            response_cache.invalidate("feed")
+            return jsonify({"id": p.id, "image_status": p.image_status}), 202
+
         payload = request.get_json(silent=True) or {}
         image_url = (payload.get("image_url") or "").strip()
         caption = (payload.get("caption") or "").strip()
@@ -235,28 +557,50 @@ def create_app() -> Flask:
             return jsonify({"error": "image_url required"}), 400
         p = Post(user_id=user.id, image_url=image_url, caption=caption)
         db.session.add(p)
+        db.session.flush()
+        enqueue("timelines.fan_out", {"post_id": p.id})
         db.session.commit()
+        response_cache.invalidate("feed")
         return jsonify({"id": p.id}), 201
 
+    @app.get("/api/v1/media/<sha256>")
+    def get_media(sha256: str):
+        """Serve a feed image variant. Content addressed, so cacheable forever."""
+        media = db.session.get(Media, sha256)
+        if media is None:
+            return jsonify({"error": "Not found"}), 404
+        if request.if_none_match.contains(sha256):
+            resp = Response(status=304)
+        else:
+            resp = Response(storage.read(sha256), mimetype=media.content_type, direct_passthrough=True)
+            resp.content_length = media.size
+        resp.set_etag(sha256)
+        resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return resp
+
     @app.post("/api/v1/posts/<int:post_id>/like")
     def like_post(post_id: int):
         user = get_current_user()
         if not user:
             return jsonify({"error": "Unauthorized"}), 401
 
-        post = Post.query.get_or_404(post_id)
-        existing = Like.query.filter_by(post_id=post.id, user_id=user.id).first()
-        if existing:
-            db.session.delete(existing)
-            db.session.commit()
-            liked = False
-        else:
-            like = Like(post_id=post.id, user_id=user.id)
-            db.session.add(like)
-            db.session.commit()
-            liked = True
+        liked, like_count = toggle_reaction(Like, post_id, user.id)
+        if like_count is None:
+            return jsonify({"error": "Not found"}), 404
+        return jsonify({"liked": liked, "like_count": like_count}), 200
+
+    @app.put("/api/v1/posts/<int:post_id>/like")
+    @app.delete("/api/v1/posts/<int:post_id>/like")
+    def set_like(post_id: int):
+        user = get_current_user()
+        if not user:
+            return jsonify({"error": "Unauthorized"}), 401
 
-        return jsonify({"liked": liked, "like_count": len(post.likes)}), 200
+        liked = request.method == "PUT"
+        like_count = set_reaction(Like, post_id, user.id, liked)
+        if like_count is None:
+            return jsonify({"error": "Not found"}), 404
+        return jsonify({"liked": liked, "like_count": like_count}), 200
 
     @app.post("/api/v1/posts/<int:post_id>/save")
     def save_post(post_id: int):
@@ -264,18 +608,21 @@ def create_app() -> Flask:
         if not user:
             return jsonify({"error": "Unauthorized"}), 401
 
-        post = Post.query.get_or_404(post_id)
-        existing = Save.query.filter_by(post_id=post.id, user_id=user.id).first()
-        if existing:
-            db.session.delete(existing)
-            db.session.commit()
-            saved = False
-        else:
-            s = Save(post_id=post.id, user_id=user.id)
-            db.session.add(s)
-            db.session.commit()
-            saved = True
+        saved, save_count = toggle_reaction(Save, post_id, user.id)
+        if save_count is None:
+            return jsonify({"error": "Not found"}), 404
+        return jsonify({"saved": saved}), 200
 
+    @app.put("/api/v1/posts/<int:post_id>/save")
+    @app.delete("/api/v1/posts/<int:post_id>/save")
+    def set_save(post_id: int):
+        user = get_current_user()
+        if not user:
+            return jsonify({"error": "Unauthorized"}), 401
+
+        saved = request.method == "PUT"
+        if set_reaction(Save, post_id, user.id, saved) is None:
+            return jsonify({"error": "Not found"}), 404
         return jsonify({"saved": saved}), 200
 
     @app.post("/api/v1/posts/<int:post_id>/comments")
@@ -291,22 +638,35 @@ def create_app() -> Flask:
         c = Comment(post_id=post.id, user_id=user.id, body=body)
         db.session.add(c)
         db.session.commit()
+        response_cache.invalidate("feed")
         return jsonify({
-            "comment": CommentPublicSchema().dump(c),
-            "comment_count": len(post.comments)
+            "comment": dump_comment(c, user),
+            "comment_count": post.comment_count
         }), 201
 
     @app.get("/api/v1/reports/public")
     def get_public_reports():
         """Get public whistleblower reports for the main feed"""
-        # Lazy initialization: ensure tables exist on first request
         try:
-            db.create_all()
-        except Exception as init_error:
-            print(f"⚠ Lazy DB init warning in get_public_reports: {init_error}")
-        
+            position, size = get_page_args()
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        def build_page():
+            stmt = keyset_page(
+                select(Report).filter_by(status="open"),
+                Report.created_at, Report.id, position, size,
+            )
+            reports, next_cursor = split_page(db.session.scalars(stmt).all(), size)
+            last_modified = max((r.updated_at for r in reports), default=None)
+            return {
+                "body": {"reports": [dump_public_report(r) for r in reports], "next_cursor": next_cursor},
+                "etag": weak_etag(next_cursor, [(r.id, r.updated_at) for r in reports]),
+                "last_modified": last_modified.isoformat() if last_modified else None,
+            }
+
         try:
-            reports = Report.query.filter_by(status="open").order_by(Report.created_at.desc()).limit(20).all()
+            page = response_cache.get_or_compute("reports", page_cache_key(size), build_page)
         except Exception as e:
             # Database connection error
             app.logger.error(f"Database error in get_public_reports: {e}")
@@ -316,74 +676,305 @@ def create_app() -> Flask:
                 "details": str(e)[:200] if app.debug else None
             }), 500
 
-        items = []
-        for rpt in reports:
-            items.append({
-                "id": f"report_{rpt.id}",
-                "type": "report",
-                "ticket": rpt.ticket,
-                "title": rpt.title,
-                "category": rpt.category,
-                "body": rpt.body[:200] + "..." if len(rpt.body) > 200 else rpt.body,
-                "created_at": rpt.created_at.isoformat(),
-                "author": {
-                    "id": None,
-                    "email": None,
-                    "name": "Anonymous Whistleblower",
-                    "avatar_url": "https://via.placeholder.com/40x40/ffd700/000000?text=W",
-                    "verified": True,
-                },
-                "like_count": 0,
-                "comment_count": len(rpt.messages),
-                "liked": False,
-                "saved": False,
-                "status": rpt.status,
-            })
-
-        return jsonify({"reports": items}), 200
+        etag = page["etag"]
+        last_modified = datetime.fromisoformat(page["last_modified"]) if page["last_modified"] else None
+        if is_not_modified(etag, last_modified):
+            return set_cache_headers(not_modified_response(), etag, last_modified, **public_cache_ages())
+        return set_cache_headers(jsonify(page["body"]), etag, last_modified, **public_cache_ages()), 200
 
     @app.post("/api/v1/reports")
     def create_report():
-        payload = request.get_json(silent=True)
-        if payload is None:
-            payload = {k: v for k, v in request.form.items()}
+        from schemas import report_create_schema  # deferred: keeps marshmallow off cold start
+        upload = None
+        if request.mimetype == "multipart/form-data":
+            # Streamed instead of request.form/files: evidence goes straight
+            # to storage, hashed and size-checked as it arrives (uploads.py)
+            upload = stream_upload()
+            payload = upload.fields
+        else:
+            payload = request.get_json(silent=True)
+            if payload is None:
+                payload = {k: v for k, v in request.form.items()}
+
+        stored = ([], [])
+        try:
+            errors = report_create_schema.validate(payload)
+            if errors:
+                return jsonify({"errors": errors}), 400
+
+            ticket = gen_ticket_id()
+            code = gen_access_code()
+
+            rpt = Report(
+                ticket=ticket,
+                title=payload["title"].strip(),
+                category=payload.get("category", "").strip() or None,
+                body=payload["body"].strip(),
+                code_hash=hasher.run(hash_code, code, code_params),
+            )
+            db.session.add(rpt)
+            if upload:
+                stored = attach_files(rpt, upload.files)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            undo_attach(stored)
+            raise
+        finally:
+            if upload:
+                upload.discard()
+
+        response_cache.invalidate("reports")
+        return jsonify({
+            "ticket": ticket,
+            "access_code": code,
+            "attachments": [dump_attachment(a) for a in rpt.attachments],
+        }), 201
+
+    @app.get("/api/v1/reports/search")
+    def search_reports():
+        """Full-text search over public reports (search.py), keyset paginated."""
+        query = request.args.get("q", "").strip()
+        sort = request.args.get("sort", "relevance")
+        category = request.args.get("category") or None
+        status = request.args.get("status", "open")
+        size = get_page_size()
+        cursor = request.args.get("cursor")
+        try:
+            position = None
+            if cursor:
+                position = decode_rank_cursor(cursor) if sort == "relevance" else decode_cursor(cursor)
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        def build_page():
+            stmt = search_statement(
+                db.engine.dialect.name, query, category=category, status=status,
+                sort=sort, position=position, size=size, window=app.config["SEARCH_RANK_WINDOW"],
+            )
+            rows = db.session.execute(stmt).all()
+            if sort == "recent":
+                rows, next_cursor = split_page(rows, size, key=lambda r: (r.Report.created_at, r.Report.id))
+            else:
+                rows, next_cursor = split_page(
+                    rows, size, key=lambda r: (r.rank, r.Report.id), encode=encode_rank_cursor
+                )
+            reports = [r.Report for r in rows]
+            return {
+                "body": {"reports": [dump_public_report(r) for r in reports], "next_cursor": next_cursor},
+                "etag": weak_etag(next_cursor, [(r.id, r.updated_at) for r in reports]),
+            }
+
+        cache_key = f"search:{sort}:{status}:{category or ''}:{size}:{request.args.get('cursor', '')}:{query.lower()}"
+        try:
+            page = response_cache.get_or_compute("reports", cache_key, build_page)
+        except SearchError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if is_not_modified(page["etag"]):
+            return set_cache_headers(not_modified_response(), page["etag"], **public_cache_ages())
+        return set_cache_headers(jsonify(page["body"]), page["etag"], **public_cache_ages()), 200
+
+    @app.get("/api/v1/reports/<ticket>")
+    def get_report(ticket: str):
+        rpt, err_resp, err_code = require_code_and_report(ticket)
+        if err_resp:
+            return err_resp, err_code
+
+        # Keyed to the newest message so a poll with no new messages is a 304.
+        latest_message_id = db.session.execute(
+            select(func.max(Message.id)).where(Message.report_id == rpt.id)
+        ).scalar()
+        etag = weak_etag(rpt.ticket, rpt.status, rpt.updated_at, latest_message_id)
+        if is_not_modified(etag, rpt.updated_at):
+            return set_cache_headers(not_modified_response(), etag, rpt.updated_at, public=False)
+
+        messages = db.session.execute(
+            select(Message.id, Message.body, Message.author, Message.created_at)
+            .where(Message.report_id == rpt.id)
+            .order_by(Message.created_at)
+        ).all()
+        data = dump_report(rpt, messages)
+        data["attachments"] = [
+            dump_attachment(a)
+            for a in db.session.scalars(select(Attachment).filter_by(report_id=rpt.id).order_by(Attachment.id))
+        ]
+        if "report_token" in g:
+            data["report_token"] = g.report_token
+        return set_cache_headers(jsonify(data), etag, rpt.updated_at, public=False), 200
+
+    @app.post("/api/v1/reports/<ticket>/attachments")
+    def add_report_attachments(ticket: str):
+        rpt, err_resp, err_code = require_code_and_report(ticket)
+        if err_resp:
+            return err_resp, err_code
+        if request.mimetype != "multipart/form-data":
+            return jsonify({"error": "Expected multipart/form-data"}), 415
+
+        upload = stream_upload(rpt)
+        stored = ([], [])
+        try:
+            before = {a.sha256 for a in rpt.attachments}
+            stored = attach_files(rpt, upload.files)
+            rpt.updated_at = datetime.utcnow()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            undo_attach(stored)
+            raise
+        finally:
+            upload.discard()
 
-        errors = ReportCreateSchema().validate(payload)
+        data = {"attachments": [dump_attachment(a) for a in rpt.attachments if a.sha256 not in before]}
+        if "report_token" in g:
+            data["report_token"] = g.report_token
+        return jsonify(data), 201
+
+    @app.post("/api/v1/reports/<ticket>/attachments/presign")
+    def presign_report_attachment(ticket: str):
+        """
+        Start a direct upload to the bucket for a file the client has already
+        hashed. The PUT goes to a fresh staging key named by the returned
+        upload_token; the reply is the same whether or not the store already
+        holds that content.
+        """
+        rpt, err_resp, err_code = require_code_and_report(ticket)
+        if err_resp:
+            return err_resp, err_code
+        from schemas import attachment_upload_schema  # deferred: keeps marshmallow off cold start
+        payload = request.get_json(silent=True) or {}
+        errors = attachment_upload_schema.validate(payload)
         if errors:
             return jsonify({"errors": errors}), 400
+        if not storage.supports_presigned_uploads:
+            return jsonify({
+                "error": "Direct uploads are not available",
+                "message": f"Upload through POST /api/v1/reports/{ticket}/attachments instead.",
+            }), 501
 
-        ticket = gen_ticket_id()
-        code = gen_access_code()
+        existing = next((a for a in rpt.attachments if a.sha256 == payload["sha256"]), None)
+        if existing:
+            return jsonify({"attachment": dump_attachment(existing), "upload": None}), 200
+        check_attachment_limits(rpt, payload["size"])
+        staged, upload = storage.presign_upload(
+            payload["sha256"], payload["size"], payload.get("content_type"),
+            app.config["S3_PRESIGN_EXPIRES"],
+        )
+        upload["upload_token"] = issue_upload_token(ticket, payload["sha256"], payload["size"], staged)
+        return jsonify({"attachment": None, "upload": upload}), 200
 
-        rpt = Report(
-            ticket=ticket,
-            title=payload["title"].strip(),
-            category=payload.get("category", "").strip() or None,
-            body=payload["body"].strip(),
-            code_hash=hash_code(code),
+    @app.post("/api/v1/reports/<ticket>/attachments/complete")
+    def complete_report_attachment(ticket: str):
+        """Record a direct upload once the client's PUT is in the bucket."""
+        rpt, err_resp, err_code = require_code_and_report(ticket)
+        if err_resp:
+            return err_resp, err_code
+        from schemas import attachment_upload_schema  # deferred: keeps marshmallow off cold start
+        payload = request.get_json(silent=True) or {}
+        errors = attachment_upload_schema.validate(payload)
+        if errors:
+            return jsonify({"errors": errors}), 400
+
+        existing = next((a for a in rpt.attachments if a.sha256 == payload["sha256"]), None)
+        if existing:
+            return jsonify({"attachment": dump_attachment(existing), "upload": None}), 200
+        # Only the bytes this client PUT to its own staging key count: an
+        # existing blob is never attached because its hash is known.
+        staged = verify_upload_token(
+            payload.get("upload_token"), ticket, payload["sha256"], payload["size"],
+            app.config["S3_PRESIGN_EXPIRES"] + app.config["REPORT_TOKEN_MAX_AGE"],
         )
-        db.session.add(rpt)
-        db.session.commit()
+        if staged is None:
+            return jsonify({"error": "Invalid or expired upload_token"}), 400
+        check_attachment_limits(rpt, payload["size"])
+        blob = storage.stat_staged(staged)
+        if blob is None:
+            return jsonify({"error": "Upload not found"}), 409
+        actual = blob["sha256"]
+        if actual is None and blob["size"] == payload["size"]:
+            # The bucket did not report a checksum; hash the object ourselves
+            digest = hashlib.sha256()
+            for chunk in storage.read_staged(staged):
+                digest.update(chunk)
+            actual = digest.hexdigest()
+        if blob["size"] != payload["size"] or actual != payload["sha256"]:
+            storage.discard_staged(staged)
+            return jsonify({"error": "Uploaded content does not match its size and hash"}), 400
+        # Dropped in favour of the stored copy if the content is already there
+        storage.promote(staged, payload["sha256"])
+        return record_direct_upload(rpt, payload)
 
-        upload_folder = app.config.get("UPLOAD_FOLDER")
-        for fkey in request.files:
-            f = request.files.get(fkey)
-            if f and getattr(f, 'filename', None):
-                filename = secure_filename(f.filename)
-                dest = os.path.join(upload_folder, f"{ticket}_{filename}")
-                try:
-                    f.save(dest)
-                except Exception:
-                    pass
+    def check_attachment_limits(rpt, size):
+        files, used = attachment_usage(rpt)
+        if size > app.config["UPLOAD_MAX_FILE_BYTES"]:
+            raise UploadError(f"Files are limited to {app.config['UPLOAD_MAX_FILE_BYTES']} bytes", 413)
+        if files >= app.config["UPLOAD_MAX_FILES"]:
+            raise UploadError(f"At most {app.config['UPLOAD_MAX_FILES']} files per report", 413)
+        limit = app.config["UPLOAD_MAX_REPORT_BYTES"]
+        if used + size > limit:
+            left = f" ({limit - used} bytes left)" if used else ""
+            raise UploadError(f"Attachments exceed {limit} bytes per report{left}", 413)
 
-        return jsonify({"ticket": ticket, "access_code": code}), 201
+    def record_direct_upload(rpt, payload):
+        att = Attachment(
+            sha256=payload["sha256"],
+            size=payload["size"],
+            filename=secure_filename(payload["filename"]) or "evidence",
+            content_type=payload.get("content_type"),
+        )
+        rpt.attachments.append(att)
+        rpt.updated_at = datetime.utcnow()
+        db.session.commit()
+        data = {"attachment": dump_attachment(att), "upload": None}
+        if "report_token" in g:
+            data["report_token"] = g.report_token
+        return jsonify(data), 201
 
-    @app.get("/api/v1/reports/<ticket>")
-    def get_report(ticket: str):
+    @app.get("/api/v1/reports/<ticket>/attachments/<int:attachment_id>")
+    def download_report_attachment(ticket: str, attachment_id: int):
+        """Stream an attachment; honours single byte ranges (206) and If-None-Match."""
         rpt, err_resp, err_code = require_code_and_report(ticket)
         if err_resp:
             return err_resp, err_code
-        return jsonify(ReportPublicSchema().dump(rpt)), 200
+        att = db.session.get(Attachment, attachment_id)
+        if att is None or att.report_id != rpt.id:
+            return jsonify({"error": "Not found"}), 404
+
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, max-age=0",
+            "Content-Disposition": f'attachment; filename="{att.filename}"',
+        }
+        # Content addressed: the hash is a strong validator
+        if request.if_none_match.contains(att.sha256):
+            resp = Response(status=304, headers=headers)
+            resp.set_etag(att.sha256)
+            return resp
+
+        start, stop, status = 0, att.size, 200
+        rng = request.range
+        if rng is not None and (request.if_range.etag in (None, att.sha256)) and len(rng.ranges) == 1:
+            bounds = rng.range_for_length(att.size)
+            if bounds is None:
+                headers["Content-Range"] = f"bytes */{att.size}"
+                return Response(status=416, headers=headers)
+            start, stop = bounds
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{stop - 1}/{att.size}"
+
+        if not storage.exists(att.sha256):
+            # Still being moved into place by an attachments.promote job
+            resp = jsonify({"error": "Attachment is still being processed"})
+            resp.headers["Retry-After"] = "5"
+            return resp, 409
+
+        resp = Response(
+            storage.read(att.sha256, start, stop), status=status, headers=headers,
+            mimetype=att.content_type or "application/octet-stream", direct_passthrough=True,
+        )
+        resp.content_length = stop - start
+        resp.set_etag(att.sha256)
+        return resp
 
     @app.post("/api/v1/reports/<ticket>/messages")
     def post_report_message(ticket: str):
@@ -391,8 +982,9 @@ def create_app() -> Flask:
         if err_resp:
             return err_resp, err_code
         
+        from schemas import message_create_schema  # deferred: keeps marshmallow off cold start
         payload = request.get_json(silent=True) or {}
-        errors = MessageCreateSchema().validate(payload)
+        errors = message_create_schema.validate(payload)
         if errors:
             return jsonify({"errors": errors}), 400
 
@@ -403,8 +995,163 @@ def create_app() -> Flask:
         )
         db.session.add(msg)
         db.session.commit()
+        response_cache.invalidate("reports")
+        try:
+            broker.publish(f"report:{rpt.ticket}", dump_message(msg))
+        except Exception:
+            # Live streams catch up from the database on their next reconnect
+            app.logger.exception("Could not publish report event")
+
+        data = {"message": "Message posted", "id": msg.id}
+        if "report_token" in g:
+            data["report_token"] = g.report_token
+        return jsonify(data), 201
+
+    @app.get("/api/v1/reports/<ticket>/events")
+    def report_events(ticket: str):
+        """
+        Server-Sent Events stream of new messages on a report. Authenticated
+        once on connect; event ids are message ids, so a reconnect with
+        Last-Event-ID replays what was missed from the database. Every
+        connect hands back a fresh report token, so a client that resubscribes
+        with it keeps working after the token in its old URL has expired.
+        """
+        rpt, err_resp, err_code = require_code_and_report(ticket)
+        if err_resp:
+            return err_resp, err_code
+        if broker.subscriber_count() >= app.config["SSE_MAX_CONNECTIONS"]:
+            resp = jsonify({"error": "Too many live connections, try again shortly"})
+            resp.headers["Retry-After"] = str(app.config["SSE_RETRY_MS"] // 1000 or 1)
+            return resp, 503
+        try:
+            last_id = int(request.headers.get("Last-Event-ID") or request.args.get("last_event_id") or -1)
+        except ValueError:
+            return jsonify({"error": "Invalid Last-Event-ID"}), 400
+
+        # Subscribe before reading the backlog so nothing falls in between
+        sub = broker.subscribe(f"report:{rpt.ticket}")
+        try:
+            if last_id < 0:
+                # New stream: the client just loaded the report, send only what comes next
+                last_id = db.session.scalar(select(func.max(Message.id)).where(Message.report_id == rpt.id)) or 0
+                backlog = []
+            else:
+                backlog = [dump_message(m) for m in db.session.execute(
+                    select(Message.id, Message.body, Message.author, Message.created_at)
+                    .where(Message.report_id == rpt.id, Message.id > last_id)
+                    .order_by(Message.id)
+                )]
+        except Exception:
+            sub.close()
+            raise
+        finally:
+            # The stream itself never touches the database
+            db.session.close()
+        # Issued whichever way this connect authenticated (token or code)
+        report_token = g.get("report_token") or issue_report_token(rpt.ticket)
+        heartbeat = app.config["SSE_HEARTBEAT_SECONDS"]
+        deadline = time.monotonic() + app.config["SSE_MAX_SECONDS"]
+        retry_ms = app.config["SSE_RETRY_MS"]
+
+        def stream(last_id):
+            try:
+                yield f"retry: {retry_ms}\n\n"
+                yield sse_frame(json.dumps({"report_token": report_token}), event="token")
+                for m in backlog:
+                    last_id = m["id"]
+                    yield sse_frame(json.dumps(m), event_id=last_id)
+                # Streams are recycled so a worker is never held forever; the
+                # browser reconnects after `retry` with Last-Event-ID.
+                while time.monotonic() < deadline:
+                    try:
+                        event = sub.get(heartbeat)
+                    except Overflow:
+                        return  # too far behind: let the client resume from the database
+                    if event is None:
+                        yield ": heartbeat\n\n"
+                    elif event["id"] > last_id:
+                        last_id = event["id"]
+                        yield sse_frame(json.dumps(event), event_id=last_id)
+                # Recycled: hand over a token that is fresh for the reconnect
+                with app.app_context():
+                    fresh = issue_report_token(ticket)
+                yield sse_frame(json.dumps({"report_token": fresh}), event="token")
+            finally:
+                sub.close()
+
+        resp = Response(stream(last_id), mimetype="text/event-stream")
+        resp.headers["Cache-Control"] = "no-cache"
+        resp.headers["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+        return resp
+
+    # -----------------------
+    # CLI Commands
+    # -----------------------
+    @app.cli.command("reconcile-counters")
+    def reconcile_counters_command():
+        """Recompute drifted like/comment/save/message counters."""
+        for counter, n in reconcile_counters().items():
+            print(f"✓ {counter}: {n} row(s) corrected")
+
+    @app.cli.command("rebuild-hot-scores")
+    @click.option("--full", is_flag=True, help="Also recompute the age terms (after HOT_DECAY_SECONDS changes).")
+    def rebuild_hot_scores_command(full):
+        """Recompute the hot feed scores from the post counters."""
+        n = rebuild_hot_scores(full=full)
+        response_cache.invalidate("feed")
+        print(f"✓ posts.hot_score: {n} row(s) corrected")
+
+    @app.cli.command("jobs-worker")
+    @click.option("--once", is_flag=True, help="Run the jobs that are due, then exit.")
+    @click.option("--prune-days", default=7, show_default=True, help="Delete finished jobs older than this.")
+    def jobs_worker_command(once, prune_days):
+        """Run background jobs until interrupted."""
+        pruned = job_runner.prune(prune_days)
+        if pruned:
+            print(f"✓ Pruned {pruned} finished job(s)")
+        if once:
+            print(f"✓ Ran {job_runner.run_pending()} job(s)")
+            return
+        print(f"✓ Worker {job_runner.worker_id} polling every {job_runner.poll_interval}s")
+        try:
+            job_runner.work_forever()
+        except KeyboardInterrupt:
+            pass
+
+    @app.cli.command("jobs-enqueue")
+    @click.argument("kind", type=click.Choice(sorted(JOBS)))
+    @click.option("--key", default=None, help="Idempotency key; a job with the same key is not enqueued again.")
+    def jobs_enqueue_command(kind, key):
+        """Enqueue a job without payload, e.g. from cron."""
+        enqueue(kind, key=key)
+        db.session.commit()
+        print(f"✓ Enqueued {kind}")
 
-        return jsonify({"message": "Message posted", "id": msg.id}), 201
+    @app.cli.command("db-upgrade")
+    def db_upgrade_command():
+        """Apply pending schema migrations."""
+        applied = upgrade(db.engine)
+        for name in applied:
+            print(f"✓ Applied migration {name}")
+        if not applied:
+            print("✓ Schema is up to date")
+
+    @app.cli.command("calibrate-argon2")
+    @click.option("--target-ms", default=250.0, show_default=True, help="Acceptable hash time per request.")
+    @click.option("--parallelism", default=1, show_default=True, help="Argon2 lanes (match available cores).")
+    def calibrate_argon2_command(target_ms, parallelism):
+        """Measure Argon2 on this machine and recommend cost parameters."""
+        result = calibrate_argon2(target_ms, parallelism=parallelism)
+        for m in result["measurements"]:
+            print(f"  t={m['time_cost']:<2} m={m['memory_cost']:<7} p={m['parallelism']}  {m['ms']:>8.1f} ms")
+        if not result["recommended"]:
+            print(f"⚠ No parameters fit within {target_ms} ms; use ARGON2_PROFILE=serverless")
+            return
+        t, m, p = result["recommended"]
+        print(f"✓ Recommended for {target_ms} ms:")
+        print(f"ARGON2_TIME_COST={t}")
+        print(f"ARGON2_MEMORY_COST={m}")
+        print(f"ARGON2_PARALLELISM={p}")
 
     # -----------------------
     # Error Handlers
@@ -427,6 +1174,21 @@ def create_app() -> Flask:
             "available_endpoints": [rule.rule for rule in app.url_map.iter_rules() if rule.rule.startswith('/api')]
         }), 404
 
+    @app.errorhandler(HashingBusy)
+    def hashing_busy(error):
+        """Shed load when the hashing queue is full"""
+        resp = jsonify({
+            "error": "Server busy",
+            "message": "Too many concurrent sign-ins or submissions. Please retry shortly."
+        })
+        resp.headers["Retry-After"] = str(error.retry_after)
+        return resp, 503
+
+    @app.errorhandler(UploadError)
+    def upload_error(error):
+        """Reject oversized or malformed evidence uploads"""
+        return jsonify({"error": "Upload rejected", "message": error.message}), error.status
+
     @app.errorhandler(Exception)
     def handle_exception(e):
         """Handle uncaught exceptions"""
@@ -453,16 +1215,17 @@ def init_app_resources(app: Flask) -> None:
             # Read-only filesystem (e.g., Vercel) - skip folder creation
             print(f"⚠ Cannot create instance folder (read-only filesystem): {e}")
         
-        try:
-            # Try to create upload folder
-            upload_folder = app.config.get("UPLOAD_FOLDER", os.path.join(app.instance_path, "uploads"))
-            os.makedirs(upload_folder, exist_ok=True)
-        except (OSError, PermissionError) as e:
-            print(f"⚠ Cannot create upload folder (read-only filesystem): {e}")
+        if app.config.get("STORAGE_DRIVER") == "local":
+            try:
+                # Try to create upload folder
+                upload_folder = app.config.get("UPLOAD_FOLDER", os.path.join(app.instance_path, "uploads"))
+                os.makedirs(upload_folder, exist_ok=True)
+            except (OSError, PermissionError) as e:
+                print(f"⚠ Cannot create upload folder (read-only filesystem): {e}")
         
         try:
-            # Create database tables
-            db.create_all()
+            # Create / migrate database tables
+            ensure_schema(db.engine)
             print(f"✓ Database initialized at: {app.config.get('SQLALCHEMY_DATABASE_URI')}")
         except Exception as e:
             print(f"⚠ Database initialization warning: {e}")
@@ -475,12 +1238,12 @@ app = create_app()
 def init_db():
     """
     Initialize database tables. Safe to call on serverless platforms.
-    Only creates tables if they don't exist - idempotent operation.
+    Applies pending migrations once per process - idempotent operation.
     Call this AFTER app is created (import time is safe).
     """
     with app.app_context():
         try:
-            db.create_all()
+            ensure_schema(db.engine)
             print("✓ Database tables initialized")
         except Exception as e:
             print(f"⚠ Database init warning: {e}")
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for home timelines (home.py) with a skewed follow graph.
+
+Builds --users users who each follow a random number of accounts, chosen
+with Zipf weights (exponent --skew), so a few accounts collect a large
+share of all follows, as on real social networks, and --posts posts by
+random authors already fanned out to their followers. Then it:
+  - times trim_timelines() down to HOME_TIMELINE_MAX,
+  - times the fan-out of --samples new posts (home.fan_out, the
+    timelines.fan_out job), reporting entries written per post and how
+    many posts were left to fan-out on read,
+  - times the first page and a page three cursors deep of --reads random
+    home timelines (fetch_home_rows) against the read-time join of
+    follows x posts it replaces.
+
+Runs against the configured DATABASE_URL after applying migrations, or a
+throwaway SQLite file with --sqlite-temp. --fanout-max 0 fans nothing out
+(everything is read on demand); a very large value fans everything out.
+
+Usage:
+  python bench_home.py [--sqlite-temp] [--users 20000] [--follows 40] [--skew 1.1]
+                       [--posts 100000] [--samples 500] [--reads 200] [--fanout-max N] [--keep]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def percentiles(times):
+    times = sorted(times)
+    return statistics.median(times), times[min(len(times) - 1, int(len(times) * 0.95))], times[-1]
+
+
+def report(name, times, extra=""):
+    p50, p95, worst = percentiles(times)
+    print(f"  {name:<40} p50 {p50 * 1000:8.2f} ms  p95 {p95 * 1000:8.2f} ms  "
+          f"max {worst * 1000:8.2f} ms  {extra}")
+
+
+def generate_graph(conn, users, follows, skew, rng, batch=20_000):
+    from sqlalchemy import insert
+    from models import Follow, User
+
+    start = datetime(2024, 1, 1)
+    for offset in range(0, users, batch):
+        conn.execute(insert(User.__table__), [
+            {"email": f"bench-{i}@example.com", "name": f"Bench {i}", "password_hash": "bench",
+             "verified": False, "created_at": start, "follower_count": 0}
+            for i in range(offset, min(users, offset + batch))
+        ])
+    ids = [row[0] for row in conn.exec_driver_sql("SELECT id FROM users WHERE email LIKE 'bench-%' ORDER BY id")]
+
+    # Popularity rank -> Zipf weight; ranks are shuffled so ids carry no signal
+    popular = ids[:]
+    rng.shuffle(popular)
+    cum_weights = list(itertools.accumulate(1 / (r + 1) ** skew for r in range(len(popular))))
+
+    rows, t0 = [], time.perf_counter()
+    for n, follower in enumerate(ids):
+        k = min(len(ids) - 1, max(1, int(rng.expovariate(1 / follows))))
+        followees = set(rng.choices(popular, cum_weights=cum_weights, k=k))
+        followees.discard(follower)
+        rows.extend({"follower_id": follower, "followee_id": f, "created_at": start} for f in followees)
+        if len(rows) >= batch or n == len(ids) - 1:
+            conn.execute(insert(Follow.__table__), rows)
+            rows = []
+            elapsed = time.perf_counter() - t0
+            print(f"\r  follow graph: {n + 1:,}/{len(ids):,} users ({elapsed:.0f}s)", end="", flush=True)
+    print()
+    conn.exec_driver_sql(
+        "UPDATE users SET follower_count = (SELECT COUNT(*) FROM follows WHERE followee_id = users.id)"
+    )
+    return ids
+
+
+def generate_posts(conn, ids, n, rng, batch=20_000):
+    """n posts by uniformly random authors, 30 s apart; returns the last created_at."""
+    from sqlalchemy import insert
+    from hot import hot_base
+    from models import Post
+
+    created = datetime(2024, 6, 1)
+    for offset in range(0, n, batch):
+        rows = []
+        for i in range(offset, min(n, offset + batch)):
+            created = datetime(2024, 6, 1) + timedelta(seconds=i * 30)
+            rows.append({
+                "user_id": rng.choice(ids), "image_url": f"https://example.com/bench/{i}.jpg",
+                "caption": f"bench {i}", "created_at": created,
+                "hot_base": hot_base(created), "hot_score": hot_base(created),
+            })
+        conn.execute(insert(Post.__table__), rows)
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sqlite-temp", action="store_true", help="benchmark on a throwaway SQLite database")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--follows", type=int, default=40, help="mean accounts followed per user")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of account popularity")
+    parser.add_argument("--posts", type=int, default=100_000, help="posts (and their entries) to generate")
+    parser.add_argument("--samples", type=int, default=500, help="new posts whose fan-out is timed")
+    parser.add_argument("--reads", type=int, default=200, help="home timelines read")
+    parser.add_argument("--fanout-max", type=int, default=None, help="FANOUT_MAX_FOLLOWERS (default: from config)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="print the temporary SQLite path to reuse it")
+    args = parser.parse_args()
+
+    if args.sqlite_temp:
+        path = os.path.join(tempfile.mkdtemp(), "home.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        if args.keep:
+            print(f"SQLite database: {path}")
+    os.environ.setdefault("SCHEMA_BOOTSTRAP", "off")
+
+    from sqlalchemy import func, insert, select, text
+    from app import app
+    from database import db
+    from feed import feed_select
+    from home import fan_out, fetch_home_rows, pull_threshold, trim_timelines
+    from hot import hot_base
+    from migrations import upgrade
+    from models import Follow, Post, TimelineEntry, User
+    from pagination import keyset_page
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        upgrade(db.engine)
+        max_followers = app.config["FANOUT_MAX_FOLLOWERS"] if args.fanout_max is None else args.fanout_max
+        keep = app.config["HOME_TIMELINE_MAX"]
+        dialect = db.engine.dialect.name
+
+        print(f"Generating {args.users:,} users ({dialect})...")
+        with db.engine.begin() as conn:
+            ids = generate_graph(conn, args.users, args.follows, args.skew, rng)
+        counts = sorted(db.session.scalars(select(User.follower_count).where(User.id.in_(ids))), reverse=True)
+        total_follows = sum(counts)
+        large = sum(1 for c in counts if c >= pull_threshold(max_followers))
+        print(f"  {total_follows:,} follows; followers per account: max {counts[0]:,}, "
+              f"p99 {counts[len(counts) // 100]:,}, median {counts[len(counts) // 2]:,}; "
+              f"top 1% hold {sum(counts[:max(1, len(counts) // 100)]) / total_follows:.0%}")
+        print(f"  fan-out limit {max_followers:,} followers ({large} accounts read on demand)\n")
+
+        print(f"Generating {args.posts:,} posts and their timeline entries...")
+        with db.engine.begin() as conn:
+            last = generate_posts(conn, ids, args.posts, rng)
+            # The same rows fan_out() writes, for every post at once
+            conn.execute(text(
+                "INSERT INTO timeline_entries (user_id, post_id, author_id, created_at) "
+                "SELECT f.follower_id, p.id, p.user_id, p.created_at FROM posts p "
+                "JOIN users u ON u.id = p.user_id JOIN follows f ON f.followee_id = p.user_id "
+                "WHERE u.follower_count < :max_followers"
+            ), {"max_followers": max_followers})
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        entries = db.session.scalar(select(func.count()).select_from(TimelineEntry))
+        print(f"  {entries:,} timeline entries")
+        t0 = time.perf_counter()
+        trimmed = trim_timelines(keep)
+        print(f"  trim to {keep} per timeline: {trimmed:,} entries deleted in {time.perf_counter() - t0:.2f}s\n")
+
+        print(f"Fan-out of {args.samples:,} new posts:")
+        times, written, skipped = [], [], 0
+        for i in range(args.samples):
+            author = rng.choice(ids)
+            created = last + timedelta(seconds=i + 1)
+            post_id = db.session.execute(insert(Post).values(
+                user_id=author, image_url=f"https://example.com/bench/new{i}.jpg", caption=f"new {i}",
+                created_at=created, hot_base=hot_base(created), hot_score=hot_base(created),
+            ).returning(Post.id)).scalar()
+            db.session.commit()
+            t0 = time.perf_counter()
+            n = fan_out(post_id, max_followers)
+            times.append(time.perf_counter() - t0)
+            written.append(n)
+            skipped += db.session.scalar(select(User.follower_count).where(User.id == author)) >= max_followers
+        report("fan-out per post", times, f"entries/post mean {statistics.mean(written):.0f} max {max(written):,}")
+        print(f"  {skipped} of them left to fan-out on read\n")
+
+        readers = rng.sample(ids, min(args.reads, len(ids)))
+        print(f"Home timeline reads ({len(readers)} users):")
+        first, deep, join_first, join_deep = [], [], [], []
+        for viewer in readers:
+            t0 = time.perf_counter()
+            rows, cursor = fetch_home_rows(viewer, 20, None, max_followers=max_followers)
+            first.append(time.perf_counter() - t0)
+            position = None
+            for _ in range(3):
+                if not cursor:
+                    break
+                rows, cursor = fetch_home_rows(viewer, 20, position, max_followers=max_followers)
+                position = (rows[-1].created_at, rows[-1].id) if rows else None
+            t0 = time.perf_counter()
+            fetch_home_rows(viewer, 20, position, max_followers=max_followers)
+            deep.append(time.perf_counter() - t0)
+
+            # Baseline: join follows x posts on every read
+            followed = select(Follow.followee_id).where(Follow.follower_id == viewer)
+            for bucket, pos in ((join_first, None), (join_deep, position)):
+                stmt = keyset_page(feed_select(viewer).where(Post.user_id.in_(followed)),
+                                   Post.created_at, Post.id, pos, 20)
+                t0 = time.perf_counter()
+                db.session.execute(stmt).all()
+                bucket.append(time.perf_counter() - t0)
+            db.session.rollback()
+        report("home, first page", first)
+        report("home, page 4", deep)
+        report("baseline: follows x posts join, first", join_first)
+        report("baseline: follows x posts join, page 4", join_deep)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the feed image pipeline (images.make_variants).
+
+Runs every image of a corpus through make_variants() with the configured
+widths and quality, in one process or a pool of worker processes, and
+reports:
+  - images/s and input MB/s,
+  - p50 / p95 time per image,
+  - total variant bytes as a fraction of the input,
+  - whether any variant still carries EXIF (which fails the run).
+
+Without --corpus it generates synthetic phone-like photos (JPEG with EXIF
+and GPS tags), which is enough to compare settings but not real photos.
+
+Usage:
+  python bench_images.py [--corpus DIR] [--count 24] [--workers 1]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+from images import make_variants
+
+
+def synthetic_corpus(count, size=(4032, 3024)):
+    """Noisy gradients, so the encoders have real work to do."""
+    from PIL import Image
+
+    corpus = []
+    for i in range(count):
+        base = Image.linear_gradient("L").resize(size).convert("RGB")
+        noise = Image.effect_noise(size, 40 + i % 20).convert("RGB")
+        img = Image.blend(base, noise, 0.35)
+        exif = Image.Exif()
+        exif[0x010F] = "BenchPhone"  # Make
+        exif[0x0112] = 6 if i % 2 else 1  # Orientation: half need rotating
+        exif[0x8825] = {1: "N", 2: (37.0, 46.0, 30.0), 3: "W", 4: (122.0, 25.0, 10.0)}  # GPS
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=92, exif=exif)
+        corpus.append(buf.getvalue())
+    return corpus
+
+
+def load_corpus(path):
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        if os.path.isfile(full):
+            with open(full, "rb") as f:
+                corpus.append(f.read())
+    return corpus
+
+
+def process(data):
+    from PIL import Image
+
+    t0 = time.perf_counter()
+    variants = make_variants(data, widths=Config.IMAGE_WIDTHS, quality=Config.IMAGE_QUALITY)
+    elapsed = time.perf_counter() - t0
+    leaked = sum(1 for v in variants if Image.open(io.BytesIO(v.data)).getexif())
+    return elapsed, sum(len(v.data) for v in variants), leaked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of images (default: synthetic photos)")
+    parser.add_argument("--count", type=int, default=24, help="number of synthetic images")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.count)
+    if not corpus:
+        sys.exit("Empty corpus")
+    input_bytes = sum(len(d) for d in corpus)
+
+    t0 = time.perf_counter()
+    if args.workers > 1:
+        with ProcessPoolExecutor(args.workers) as pool:
+            results = list(pool.map(process, corpus))
+    else:
+        results = [process(d) for d in corpus]
+    wall = time.perf_counter() - t0
+
+    times = sorted(r[0] for r in results)
+    output_bytes = sum(r[1] for r in results)
+    leaked = sum(r[2] for r in results)
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+
+    print(f"images:       {len(corpus)} ({input_bytes / 1e6:.1f} MB), widths {Config.IMAGE_WIDTHS}, "
+          f"quality {Config.IMAGE_QUALITY}, {args.workers} worker(s)")
+    print(f"throughput:   {len(corpus) / wall:7.2f} images/s  {input_bytes / 1e6 / wall:7.2f} MB/s")
+    print(f"per image:    p50 {statistics.median(times) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms")
+    print(f"output size:  {output_bytes / input_bytes:7.1%} of input (all variants)")
+
+    if leaked:
+        print(f"\n✗ {leaked} variant(s) still carry EXIF")
+        sys.exit(1)
+    print("\n✓ No EXIF in any variant")
+
+
+if __name__ == "__main__":
+    main()
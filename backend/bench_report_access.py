@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Requests/sec benchmark for report access checks (security.py).
+
+Creates a report, then times GET /api/v1/reports/<ticket> through the test
+client three ways:
+  - access code with the verified-code cache disabled (CODE_CACHE_SIZE=0):
+    a full Argon2 verify on every request, as before report tokens,
+  - report token (X-Report-Token), as the frontend sends after its first
+    successful check: an HMAC check,
+  - access code with the code cache on: Argon2 on the first request only,
+and reports requests/sec, p50 and p95 for each, with the speedup over the
+first. --threads runs the requests from several threads at once.
+
+Runs against the configured DATABASE_URL after applying migrations, or a
+throwaway SQLite file with --sqlite-temp. The hash cost is ARGON2_PROFILE
+(the production "default" unless set); hashing runs inline.
+
+Usage:
+  python bench_report_access.py [--sqlite-temp] [--requests 300] [--argon2-requests 20] [--threads 1]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+
+def run(client_factory, n, threads, request):
+    """Send n requests from `threads` threads; returns (seconds, per-request times)."""
+    times, lock = [], threading.Lock()
+
+    def work(count):
+        client = client_factory()
+        local = []
+        for _ in range(count):
+            t0 = time.perf_counter()
+            resp = request(client)
+            local.append(time.perf_counter() - t0)
+            if resp.status_code != 200:
+                sys.exit(f"unexpected HTTP {resp.status_code}: {resp.get_json()}")
+        with lock:
+            times.extend(local)
+
+    pool = [threading.Thread(target=work, args=(n // threads + (i < n % threads),)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - t0, sorted(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sqlite-temp", action="store_true", help="benchmark on a throwaway SQLite database")
+    parser.add_argument("--requests", type=int, default=300, help="requests per token/cache run")
+    parser.add_argument("--argon2-requests", type=int, default=20, help="requests for the Argon2-every-time run")
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.sqlite_temp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'access.db')}"
+    os.environ["HASH_MODE"] = "inline"
+
+    from app import app, create_app
+    from config import Config
+
+    # Same app, but every access-code check runs Argon2
+    Config.CODE_CACHE_SIZE = 0
+    uncached = create_app()
+
+    created = app.test_client().post("/api/v1/reports", json={
+        "title": "Access benchmark", "body": "Timing access-code and token checks",
+    }).get_json()
+    ticket, code = created["ticket"], created["access_code"]
+    path = f"/api/v1/reports/{ticket}"
+    token = app.test_client().get(path, query_string={"code": code}).get_json()["report_token"]
+
+    print(f"GET {path}, ARGON2_PROFILE={app.config['ARGON2_PROFILE']}, {args.threads} thread(s):")
+    baseline = None
+    for name, target, n, request in (
+        ("access code, Argon2 every request", uncached, args.argon2_requests,
+         lambda c: c.get(path, query_string={"code": code})),
+        ("report token", app, args.requests,
+         lambda c: c.get(path, headers={"X-Report-Token": token})),
+        ("access code, code cache", app, args.requests,
+         lambda c: c.get(path, query_string={"code": code})),
+    ):
+        request(target.test_client())  # warm up (fills the code cache)
+        elapsed, times = run(target.test_client, n, args.threads, request)
+        rps = n / elapsed
+        baseline = baseline or rps
+        print(f"  {name:<36} {rps:9.1f} req/s  p50 {statistics.median(times) * 1000:8.2f} ms  "
+              f"p95 {times[min(len(times) - 1, int(len(times) * 0.95))] * 1000:8.2f} ms  x{rps / baseline:.0f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
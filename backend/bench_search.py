@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark for report full-text search (search.py) on a synthetic corpus.
+
+Fills the database with --reports synthetic reports (Zipf-distributed
+vocabulary, 80% open, five categories) unless it already holds that many,
+then times the search statements the /api/v1/reports/search route runs:
+  - relevance, first page and a page five cursors deep,
+  - relevance with a category filter,
+  - newest first,
+for common, mid-frequency, rare, two-word and prefix queries, and compares
+a few of them with the naive LIKE '%term%' scan it replaces.
+
+Runs against the configured DATABASE_URL after applying migrations, or a
+throwaway SQLite file with --sqlite-temp. Generating the default 1M reports
+takes a few minutes; --keep prints the SQLite path so it can be reused.
+
+Usage:
+  python bench_search.py [--sqlite-temp] [--reports 1000000] [--runs 20] [--keep]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+CATEGORIES = ("corruption", "safety", "fraud", "harassment", "other")
+DOMAIN_WORDS = (
+    "procurement", "invoice", "vendor", "contract", "budget", "audit", "safety", "certificate",
+    "harassment", "complaint", "manager", "waste", "chemical", "disposal", "privacy", "breach",
+    "customer", "database", "overtime", "payroll", "bribe", "kickback", "inspection", "warehouse",
+)
+
+
+def vocabulary(rng, size=20_000):
+    syllables = ["ka", "lo", "mi", "ter", "sun", "vo", "ra", "de", "pin", "sol", "ex", "tra", "bel", "mon", "qu"]
+    words = set(DOMAIN_WORDS)
+    while len(words) < size:
+        words.add("".join(rng.choices(syllables, k=rng.randint(2, 4))))
+    words = sorted(words)  # not set order, which changes with hash randomization
+    rng.shuffle(words)
+    return words
+
+
+def generate(conn, n, batch=10_000, seed=7):
+    from sqlalchemy import insert
+    from models import Report
+
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(words))))
+    start = datetime(2020, 1, 1)
+    t0 = time.perf_counter()
+    for offset in range(0, n, batch):
+        rows = []
+        for i in range(offset, min(n, offset + batch)):
+            created = start + timedelta(seconds=i * 60)
+            rows.append({
+                "ticket": f"BENCH{i:010d}",
+                "title": " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(4, 9))).capitalize(),
+                "category": rng.choice(CATEGORIES),
+                "body": " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(30, 90))),
+                "code_hash": "bench",
+                "status": "open" if rng.random() < 0.8 else "closed",
+                "created_at": created,
+                "updated_at": created,
+                "message_count": 0,
+            })
+        conn.execute(insert(Report.__table__), rows)
+        done = min(n, offset + batch)
+        print(f"\r  generated {done:,}/{n:,} reports ({time.perf_counter() - t0:.0f}s)", end="", flush=True)
+    print()
+    return words
+
+
+def timed(session, stmt, runs):
+    times, rows = [], []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        rows = session.execute(stmt).all()
+        times.append(time.perf_counter() - t0)
+    return sorted(times), rows
+
+
+def report(name, times, n_rows):
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+    print(f"  {name:<44} p50 {statistics.median(times) * 1000:8.2f} ms  p95 {p95 * 1000:8.2f} ms  rows {n_rows}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sqlite-temp", action="store_true", help="benchmark on a throwaway SQLite database")
+    parser.add_argument("--reports", type=int, default=1_000_000, help="corpus size")
+    parser.add_argument("--runs", type=int, default=20, help="timed runs per query")
+    parser.add_argument("--window", type=int, default=None, help="SEARCH_RANK_WINDOW (default: from config)")
+    parser.add_argument("--like-runs", type=int, default=3, help="timed runs of the LIKE baseline (0 skips it)")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary SQLite database")
+    args = parser.parse_args()
+
+    if args.sqlite_temp:
+        path = os.path.join(tempfile.mkdtemp(), "search.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        if args.keep:
+            print(f"SQLite database: {path}")
+    os.environ.setdefault("SCHEMA_BOOTSTRAP", "off")
+
+    from sqlalchemy import func, or_, select
+    from app import app
+    from database import db
+    from migrations import upgrade
+    from models import Report
+    from pagination import keyset_page
+    from search import search_statement
+
+    with app.app_context():
+        upgrade(db.engine)
+        dialect = db.engine.dialect.name
+        window = app.config["SEARCH_RANK_WINDOW"] if args.window is None else args.window
+        existing = db.session.scalar(select(func.count()).select_from(Report))
+        db.session.rollback()
+        if existing < args.reports:
+            print(f"Generating {args.reports - existing:,} reports ({dialect})...")
+            with db.engine.begin() as conn:
+                generate(conn, args.reports - existing)
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql("ANALYZE")
+        total = db.session.scalar(select(func.count()).select_from(Report))
+        print(f"Corpus: {total:,} reports, relevance window {window or 'unlimited'}\n")
+
+        # Query words by document frequency class, from the generator's Zipf ranks
+        words = vocabulary(random.Random(7))
+        queries = {
+            "common": words[2],
+            "mid-frequency": words[300],
+            "rare": words[15_000],
+            "two words": f"{words[5]} {words[40]}",
+            "prefix": words[120][:4],
+            "no match": "zzyzx",
+        }
+
+        for label, q in queries.items():
+            print(f"{label}: {q!r}")
+            times, rows = timed(db.session, search_statement(dialect, q, window=window), args.runs)
+            report("relevance, first page", times, len(rows))
+
+            position = None
+            for _ in range(4):
+                page = db.session.execute(search_statement(dialect, q, position=position, window=window)).all()
+                if len(page) <= 20:
+                    break
+                position = (page[19].rank, page[19].Report.id)
+            if position is not None:
+                stmt = search_statement(dialect, q, position=position, window=window)
+                times, rows = timed(db.session, stmt, args.runs)
+                report("relevance, page 5", times, len(rows))
+
+            times, rows = timed(db.session, search_statement(dialect, q, category="fraud", window=window), args.runs)
+            report("relevance, category=fraud", times, len(rows))
+            times, rows = timed(db.session, search_statement(dialect, q, sort="recent"), args.runs)
+            report("newest first", times, len(rows))
+
+            if args.like_runs and label in ("common", "rare", "no match"):
+                pattern = f"%{q}%"
+                like = keyset_page(
+                    select(Report).where(
+                        Report.status == "open", or_(Report.title.like(pattern), Report.body.like(pattern))
+                    ),
+                    Report.created_at, Report.id, None, 20,
+                )
+                times, rows = timed(db.session, like, args.like_runs)
+                report("baseline: LIKE '%term%', newest first", times, len(rows))
+            print()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for report serialization (serializers.py vs schemas.py).
+
+Builds in-memory reports with --sizes messages each (20, 200 and 2,000 by
+default; no database needed) and times, per report:
+  - marshmallow: report_public_schema.dump(report), the old path,
+  - fast path: serializers.dump_report(report, messages),
+  - encoding the result with Flask's stock JSON provider (stdlib json)
+    and with OrjsonProvider, the provider the app installs when orjson is
+    available,
+checking first that both paths produce the same dict.
+
+Usage:
+  python bench_serialization.py [--sizes 20 200 2000] [--runs 50]
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def timed(fn, runs):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def build_report(n):
+    from models import Message, Report
+
+    start = datetime(2024, 5, 1, 9, 30)
+    rpt = Report(
+        id=1, ticket="BENCH0000001", title="Procurement irregularities", category="fraud",
+        body="Invoices from one vendor were approved without a contract. " * 10, status="open",
+        created_at=start, updated_at=start + timedelta(minutes=n),
+    )
+    rpt.messages = [
+        Message(id=i + 1, body=f"Follow-up {i}: further details about the invoices and who approved them.",
+                author="reporter" if i % 2 else "admin", created_at=start + timedelta(minutes=i))
+        for i in range(n)
+    ]
+    return rpt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000], help="messages per report")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    from flask import Flask
+    from flask.json.provider import DefaultJSONProvider
+    from schemas import report_public_schema
+    from serializers import OrjsonProvider, dump_report, orjson
+
+    app = Flask(__name__)
+    encoders = {"stdlib json": DefaultJSONProvider(app)}
+    if orjson is not None:
+        encoders["orjson"] = OrjsonProvider(app)
+    else:
+        print("orjson is not installed; timing stdlib json only")
+
+    for n in args.sizes:
+        rpt = build_report(n)
+        slow, fast = report_public_schema.dump(rpt), dump_report(rpt, rpt.messages)
+        if slow != fast:
+            sys.exit(f"fast path differs from ReportPublicSchema for {n} messages")
+        outputs = {name: enc.loads(enc.dumps(fast)) for name, enc in encoders.items()}
+        if any(out != outputs["stdlib json"] for out in outputs.values()):
+            sys.exit(f"JSON providers disagree for {n} messages")
+
+        print(f"Report with {n:,} messages (median of {args.runs}):")
+        marshmallow = timed(lambda: report_public_schema.dump(rpt), args.runs)
+        dumper = timed(lambda: dump_report(rpt, rpt.messages), args.runs)
+        print(f"  {'marshmallow ReportPublicSchema':<32} {marshmallow * 1000:8.3f} ms")
+        print(f"  {'fast path dump_report':<32} {dumper * 1000:8.3f} ms  x{marshmallow / dumper:.1f}")
+        base = None
+        for name, enc in encoders.items():
+            t = timed(lambda: enc.dumps(fast), args.runs)
+            base = base or t
+            print(f"  {'encode, ' + name:<32} {t * 1000:8.3f} ms  x{base / t:.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
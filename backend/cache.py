@@ -0,0 +1,215 @@
+"""
+Caches.
+
+TTLCache is a thread-safe mapping with per-entry expiry and LRU eviction,
+shared by the verified-code cache (security.py) and the current-user cache.
+
+ResponseCache caches computed public responses on a pluggable backend:
+MemoryBackend (per process) or RedisBackend (shared between workers).
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire `ttl` seconds after being set.
+
+    A `maxsize` of 0 disables the cache: set() is a no-op and get() always misses.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ---- Response Cache ----
+class CacheBackend:
+    """Minimal key/value interface the response cache needs.
+
+    Values are JSON-compatible objects. Counters (incr/counter) are kept
+    apart from cached values and never expire; incr() must be atomic, as it
+    is used to bump namespace generations for invalidation.
+    """
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: int) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process backend on top of TTLCache (LRU + TTL)."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        self._cache = TTLCache(maxsize, ttl)
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl):
+        self._cache.set(key, value, ttl)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+
+class RedisBackend(CacheBackend):
+    """Backend for any redis-py compatible client (redis.Redis, fakeredis...)."""
+
+    def __init__(self, client, prefix: str = "sluglime:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisBackend":
+        import redis  # optional dependency, only needed when CACHE_URL is set
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return int(self.client.incr(self.prefix + "counter:" + key))
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + "counter:" + key) or 0)
+
+
+class ResponseCache:
+    """
+    Namespaced cache of computed responses with single-flight recomputation.
+
+    Keys live under a namespace generation ("reports:g3:<key>"); invalidate()
+    bumps the generation so every cached page of that namespace is orphaned
+    at once and ages out of the backend. Concurrent misses for the same key
+    in this process wait for one computation instead of stampeding the
+    database.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int = 10):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inflight: dict[str, threading.Lock] = {}
+
+    def _generation(self, namespace: str) -> int:
+        return self.backend.counter(f"{namespace}:gen")
+
+    def get_or_compute(self, namespace: str | tuple[str, ...], key: str, compute):
+        """Return the cached value for `key`, calling `compute()` on a miss.
+
+        A value built from several sources can be filed under a tuple of
+        namespaces; invalidating any one of them orphans it.
+        """
+        namespaces = (namespace,) if isinstance(namespace, str) else namespace
+        generations = ":".join(f"{ns}:g{self._generation(ns)}" for ns in namespaces)
+        full_key = f"{generations}:{key}"
+        value = self.backend.get(full_key)
+        if value is not None:
+            self._count(hit=True)
+            return value
+
+        with self._lock:
+            flight = self._inflight.setdefault(full_key, threading.Lock())
+        with flight:
+            # Another request may have filled it while we waited.
+            value = self.backend.get(full_key)
+            if value is not None:
+                self._count(hit=True)
+                return value
+            self._count(hit=False)
+            try:
+                value = compute()
+                self.backend.set(full_key, value, self.ttl)
+            finally:
+                with self._lock:
+                    self._inflight.pop(full_key, None)
+        return value
+
+    def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            self.backend.incr(f"{namespace}:gen")
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else None,
+            }
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Behaviour check for the response cache (cache.py) on every backend.
+
+Runs the same scenarios against ResponseCache on MemoryBackend and on
+RedisBackend over fakeredis (an in-process fake of the Redis server), or a
+real server with --redis-url:
+  - hit/miss counters: a miss then a hit, reflected in metrics(),
+  - single-flight: --threads concurrent misses on one key run compute once
+    and all get its value,
+  - namespace invalidation: invalidate() orphans every key of that
+    namespace, including values filed under several namespaces, and leaves
+    other namespaces cached,
+  - expiry: a value is recomputed once its TTL has passed.
+
+Needs `pip install fakeredis` for the Redis run unless --redis-url is
+given; without either, only MemoryBackend is checked.
+
+Usage:
+  python check_cache.py [--threads 16] [--redis-url redis://localhost:6379/15]
+"""
+import argparse
+import sys
+import threading
+import time
+import uuid
+
+# Colors match check_setup.py
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+RESET = '\033[0m'
+
+
+def scenarios(cache, threads):
+    """Yield (name, passed, detail) for each check on a fresh ResponseCache."""
+    calls = []
+
+    def compute(value, delay=0.0):
+        def fn():
+            calls.append(value)
+            if delay:
+                time.sleep(delay)
+            return {"value": value}
+        return fn
+
+    # Hit/miss counters
+    first = cache.get_or_compute("feed", "page1", compute(1))
+    second = cache.get_or_compute("feed", "page1", compute(2))
+    m = cache.metrics()
+    yield ("hit/miss counters", first == second == {"value": 1} and (m["hits"], m["misses"]) == (1, 1),
+           f"hits {m['hits']}, misses {m['misses']}, hit_ratio {m['hit_ratio']}")
+
+    # Single-flight: concurrent misses wait for one computation
+    calls.clear()
+    results, barrier = [], threading.Barrier(threads)
+
+    def reader():
+        barrier.wait()
+        results.append(cache.get_or_compute("feed", "stampede", compute("once", delay=0.2)))
+
+    pool = [threading.Thread(target=reader) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    yield ("single-flight", len(calls) == 1 and results == [{"value": "once"}] * threads,
+           f"{threads} concurrent misses, compute ran {len(calls)} time(s)")
+
+    # Namespace invalidation
+    cache.get_or_compute("reports", "page1", compute("reports"))
+    cache.get_or_compute(("feed", "reports"), "timeline", compute("timeline"))
+    calls.clear()
+    cache.invalidate("feed")
+    feed = cache.get_or_compute("feed", "page1", compute("feed v2"))
+    timeline = cache.get_or_compute(("feed", "reports"), "timeline", compute("timeline v2"))
+    reports = cache.get_or_compute("reports", "page1", compute("reports v2"))
+    yield ("namespace invalidation",
+           feed == {"value": "feed v2"} and timeline == {"value": "timeline v2"} and reports == {"value": "reports"},
+           f"recomputed {calls} after invalidate('feed')")
+
+    # Expiry
+    calls.clear()
+    cache.get_or_compute("feed", "short", compute("old"))
+    time.sleep(cache.ttl + 0.2)
+    value = cache.get_or_compute("feed", "short", compute("new"))
+    yield ("expiry", value == {"value": "new"} and calls == ["old", "new"], f"ttl {cache.ttl}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--redis-url", help="check RedisBackend against this server instead of fakeredis")
+    args = parser.parse_args()
+
+    from cache import MemoryBackend, RedisBackend, ResponseCache
+
+    # Unique prefix so a real server's existing keys are never touched
+    prefix = f"check-cache-{uuid.uuid4().hex[:8]}:"
+    backends = [("MemoryBackend", lambda: MemoryBackend(maxsize=64, ttl=60))]
+    if args.redis_url:
+        backends.append(("RedisBackend", lambda: RedisBackend.from_url(args.redis_url, prefix=prefix)))
+    else:
+        try:
+            import fakeredis
+        except ImportError:
+            print(f"{YELLOW}⚠{RESET} fakeredis is not installed; skipping RedisBackend "
+                  f"(pip install fakeredis, or pass --redis-url)")
+        else:
+            backends.append(("RedisBackend (fakeredis)",
+                             lambda: RedisBackend(fakeredis.FakeRedis(), prefix=prefix)))
+
+    failures = 0
+    for name, make in backends:
+        print(f"{name}:")
+        for check, passed, detail in scenarios(ResponseCache(make(), ttl=1), args.threads):
+            failures += not passed
+            mark = f"{GREEN}✓{RESET}" if passed else f"{RED}✗{RESET}"
+            print(f"  {mark} {check:<24} {detail}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Query-count regression check for the feed (feed.py).
+
+Counts the SQL statements (before_cursor_execute) that GET /api/v1/feed
+issues, signed in and anonymous, for the first page, the next page and
+?sort=hot. It measures once with --posts lightly liked posts, then seeds
+--likes likes, comments and saves on every one of them (thousands per post
+by default) and measures again. Fails if any count grows with the number of
+likes, if one exceeds --max-statements, or if the returned counts and
+liked/saved flags do not match the seeded rows.
+
+Runs against a throwaway SQLite database unless --use-database-url is
+given (the rows it creates are left behind). The response cache is
+disabled so every request reaches the database.
+
+Usage:
+  python check_feed_queries.py [--posts 20] [--likes 3000] [--max-statements 6]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+# Colors match check_setup.py
+GREEN = '\033[92m'
+RED = '\033[91m'
+RESET = '\033[0m'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=20)
+    parser.add_argument("--likes", type=int, default=3000, help="likes per post in the second round")
+    parser.add_argument("--max-statements", type=int, default=6, help="budget per feed request")
+    parser.add_argument("--use-database-url", action="store_true", help="run against DATABASE_URL")
+    args = parser.parse_args()
+
+    if not args.use_database_url:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'feed.db')}"
+    os.environ.setdefault("HASH_MODE", "inline")
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+
+    from sqlalchemy import event, func, insert, select
+    from app import app
+    from counters import reconcile_counters
+    from database import db
+    from hot import rebuild_hot_scores
+    from models import Comment, Like, Post, Save, User
+
+    client = app.test_client()
+    run = os.urandom(4).hex()
+    resp = client.post("/api/v1/auth/register", json={
+        "email": f"feed-{run}@example.com", "password": "password123", "name": "Feed Check",
+    })
+    if resp.status_code != 201:
+        sys.exit(f"{RED}✗{RESET} could not register a user: {resp.get_json()}")
+    viewer = resp.get_json()["user"]["id"]
+    headers = {"Authorization": f"Bearer {resp.get_json()['token']}"}
+
+    with app.app_context():
+        posts = [
+            Post(user_id=viewer, image_url=f"https://example.com/feed/{i}.jpg", caption=f"feed check {i}")
+            for i in range(args.posts)
+        ]
+        db.session.add_all(posts)
+        db.session.commit()
+        post_ids = [p.id for p in posts]
+        # One like, comment and save each, by the viewer on every other post
+        for model in (Like, Save):
+            db.session.execute(insert(model), [{"post_id": pid, "user_id": viewer} for pid in post_ids[::2]])
+        db.session.execute(insert(Comment), [{"post_id": pid, "user_id": viewer, "body": "first"}
+                                             for pid in post_ids])
+        db.session.commit()
+        reconcile_counters()
+        rebuild_hot_scores()
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def measure():
+        """Statement count per request; each request is warmed once first."""
+        counts, pages = {}, {}
+        cursor = client.get("/api/v1/feed", query_string={"limit": 10}, headers=headers).get_json()["next_cursor"]
+        requests = {
+            "signed in, first page": ({"limit": 10}, headers),
+            "signed in, next page": ({"limit": 10, "cursor": cursor}, headers),
+            "signed in, hot": ({"limit": 10, "sort": "hot"}, headers),
+            "anonymous, first page": ({"limit": 10}, {}),
+            "anonymous, hot": ({"limit": 10, "sort": "hot"}, {}),
+        }
+        for name, (query, hdrs) in requests.items():
+            client.get("/api/v1/feed", query_string=query, headers=hdrs)
+            statements.clear()
+            resp = client.get("/api/v1/feed", query_string=query, headers=hdrs)
+            counts[name] = len(statements)
+            if resp.status_code != 200:
+                sys.exit(f"{RED}✗{RESET} {name}: HTTP {resp.status_code} {resp.get_json()}")
+            pages[name] = resp.get_json()["posts"]
+        return counts, pages
+
+    failures = 0
+    light, _ = measure()
+
+    print(f"Seeding {args.likes:,} likes, comments and saves on each of {args.posts} posts...")
+    with app.app_context():
+        db.session.execute(insert(User), [
+            {"email": f"feed-{run}-{i}@example.com", "name": f"Liker {i}", "password_hash": "x"}
+            for i in range(args.likes)
+        ])
+        likers = db.session.scalars(select(User.id).where(User.email.like(f"feed-{run}-%"))).all()
+        for pid in post_ids:
+            for model in (Like, Save):
+                db.session.execute(insert(model), [{"post_id": pid, "user_id": uid} for uid in likers])
+            db.session.execute(insert(Comment), [{"post_id": pid, "user_id": uid, "body": "+1"} for uid in likers])
+        db.session.commit()
+        reconcile_counters()
+        rebuild_hot_scores()
+
+        def counts(model):
+            return dict(db.session.execute(
+                select(model.post_id, func.count()).where(model.post_id.in_(post_ids)).group_by(model.post_id)
+            ).all())
+        likes, comments = counts(Like), counts(Comment)
+        mine = {model: set(db.session.scalars(select(model.post_id).where(model.user_id == viewer)))
+                for model in (Like, Save)}
+
+    heavy, pages = measure()
+    for name, before in light.items():
+        after = heavy[name]
+        ok = after <= before and after <= args.max_statements
+        failures += not ok
+        mark = f"{GREEN}✓{RESET}" if ok else f"{RED}✗{RESET}"
+        print(f"{mark} {name:<24} {before} statements with ~1 like per post, {after} with {args.likes:,}")
+
+    wrong = 0
+    for name, rows in pages.items():
+        signed_in = name.startswith("signed in")
+        for p in rows:
+            if p["id"] not in likes:
+                continue
+            if p["like_count"] != likes[p["id"]] or p["comment_count"] != comments[p["id"]]:
+                wrong += 1
+            if signed_in and (p["liked"] != (p["id"] in mine[Like]) or p["saved"] != (p["id"] in mine[Save])):
+                wrong += 1
+    failures += bool(wrong)
+    if wrong:
+        print(f"{RED}✗{RESET} {wrong} feed rows with wrong counts or viewer flags")
+    else:
+        print(f"{GREEN}✓{RESET} counts and liked/saved flags match the seeded rows")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
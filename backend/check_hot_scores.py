@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Consistency check for the incrementally maintained hot scores (hot.py).
+
+Creates --posts posts and --users users, then drives --actions random
+likes, unlikes, saves, unsaves and comments through the API routes, so
+every score change comes from the same counters.bump() updates as in
+production. Afterwards it recomputes every score from scratch - child rows
+counted from likes/comments/saves, age term from created_at - and fails if
+any stored score differs, or if paging through GET /api/v1/feed?sort=hot
+does not return every post once, in score order.
+
+Runs against a throwaway SQLite database unless --use-database-url is
+given (the posts it creates are left behind).
+
+Usage:
+  python check_hot_scores.py [--posts 40] [--users 12] [--actions 2000] [--seed 1]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Colors match check_setup.py
+GREEN = '\033[92m'
+RED = '\033[91m'
+RESET = '\033[0m'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=40)
+    parser.add_argument("--users", type=int, default=12)
+    parser.add_argument("--actions", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--use-database-url", action="store_true", help="run against DATABASE_URL")
+    args = parser.parse_args()
+
+    if not args.use_database_url:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'hot.db')}"
+    os.environ.setdefault("HASH_MODE", "inline")
+
+    from sqlalchemy import func, select
+    from app import app
+    from database import db
+    from hot import hot_base, hot_score
+    from models import Comment, Like, Post, Save
+
+    rng = random.Random(args.seed)
+    client = app.test_client()
+    run = rng.getrandbits(32)
+    tokens = []
+    for i in range(args.users):
+        resp = client.post("/api/v1/auth/register", json={
+            "email": f"hot-{run}-{i}@example.com", "password": "password123", "name": f"Hot {i}",
+        })
+        if resp.status_code != 201:
+            sys.exit(f"{RED}✗{RESET} could not register a user: {resp.get_json()}")
+        tokens.append(resp.get_json()["token"])
+
+    with app.app_context():
+        author = db.session.scalar(select(Post.user_id).limit(1)) or 1
+        now = datetime.utcnow()
+        posts = [
+            Post(user_id=author, image_url=f"https://example.com/hot/{i}.jpg", caption=f"hot check {i}",
+                 created_at=now - timedelta(seconds=rng.randint(0, 3 * 24 * 3600)))
+            for i in range(args.posts)
+        ]
+        db.session.add_all(posts)
+        db.session.commit()
+        post_ids = [p.id for p in posts]
+
+    for _ in range(args.actions):
+        headers = {"Authorization": f"Bearer {rng.choice(tokens)}"}
+        post_id = rng.choice(post_ids)
+        kind = rng.choice(("like", "like", "save", "comment"))
+        if kind == "comment":
+            resp = client.post(f"/api/v1/posts/{post_id}/comments", json={"body": "nice"}, headers=headers)
+        else:
+            method = client.put if rng.random() < 0.6 else client.delete
+            resp = method(f"/api/v1/posts/{post_id}/{kind}", headers=headers)
+        if resp.status_code not in (200, 201):
+            sys.exit(f"{RED}✗{RESET} {kind} on post {post_id} failed: {resp.status_code} {resp.get_json()}")
+
+    failures = 0
+    with app.app_context():
+        def counts(model):
+            return dict(db.session.execute(
+                select(model.post_id, func.count()).where(model.post_id.in_(post_ids)).group_by(model.post_id)
+            ).all())
+
+        likes, comments, saves = counts(Like), counts(Comment), counts(Save)
+        expected = {}
+        for post in db.session.scalars(select(Post).where(Post.id.in_(post_ids))):
+            score = hot_score(hot_base(post.created_at), likes.get(post.id, 0),
+                              comments.get(post.id, 0), saves.get(post.id, 0))
+            expected[post.id] = score
+            if abs(post.hot_score - score) > 1e-9:
+                failures += 1
+                print(f"{RED}✗{RESET} post {post.id}: stored {post.hot_score!r}, recomputed {score!r}")
+    if not failures:
+        print(f"{GREEN}✓{RESET} {len(expected)} incremental scores match a full recompute "
+              f"({args.actions} actions)")
+
+    seen, cursor = [], None
+    while True:
+        query = {"sort": "hot", "limit": 7, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/v1/feed", query_string=query).get_json()
+        seen += [p["id"] for p in page["posts"] if p["id"] in expected]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    ranked = sorted(expected, key=lambda pid: (expected[pid], pid), reverse=True)
+    if seen != ranked:
+        failures += 1
+        print(f"{RED}✗{RESET} hot feed order differs from the recomputed ranking")
+    else:
+        print(f"{GREEN}✓{RESET} hot feed pages return every post once, in score order")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Index coverage check for the hot queries in app.py.
+
+Builds each hot statement exactly as the routes do, asks the database for
+its plan (SQLite `EXPLAIN QUERY PLAN`, PostgreSQL `EXPLAIN` with sequential
+scans disabled) and fails if any table is read with a full scan.
+
+Runs against a throwaway SQLite database unless --use-database-url is
+given, in which case migrations are applied to DATABASE_URL first.
+
+Usage:
+  python check_indexes.py [--use-database-url] [--verbose]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime
+
+# Colors match check_setup.py
+GREEN = '\033[92m'
+RED = '\033[91m'
+RESET = '\033[0m'
+
+
+def hot_queries(dialect: str = "sqlite"):
+    """(name, statement) for every query on a request path."""
+    from sqlalchemy import select, func, delete
+    from feed import feed_query
+    from models import Report, Message, User, Like, Save, Comment, Post, Follow, TimelineEntry
+    from pagination import keyset_page
+    from search import search_statement
+    from home import home_query
+
+    cursor = (datetime(2024, 1, 1), 100)
+    return [
+        ("feed, first page (anonymous)", feed_query(None, 20)),
+        ("feed, next page (viewer flags)", feed_query(1, 20, cursor)),
+        ("hot feed, first page", feed_query(None, 20, sort="hot")),
+        ("hot feed, next page", feed_query(1, 20, (12.5, 100), sort="hot")),
+        ("public reports, first page", keyset_page(
+            select(Report).filter_by(status="open"), Report.created_at, Report.id, None, 20)),
+        ("public reports, next page", keyset_page(
+            select(Report).filter_by(status="open"), Report.created_at, Report.id, cursor, 20)),
+        ("report by ticket", select(Report).filter_by(ticket="ABC123")),
+        ("report thread", select(Message.id, Message.body, Message.author, Message.created_at)
+            .where(Message.report_id == 1).order_by(Message.created_at)),
+        ("report latest message", select(func.max(Message.id)).where(Message.report_id == 1)),
+        ("user by email", select(User).filter_by(email="a@example.com")),
+        ("user by id", select(User).where(User.id == 1)),
+        ("unlike", delete(Like).where(Like.post_id == 1, Like.user_id == 1)),
+        ("unsave", delete(Save).where(Save.post_id == 1, Save.user_id == 1)),
+        ("like counter read", select(Post.like_count).where(Post.id == 1)),
+        ("comments of post (cascade)", select(Comment.id).where(Comment.post_id == 1)),
+        ("likes of user (cascade)", select(Like.id).where(Like.user_id == 1)),
+        ("saves of user (cascade)", select(Save.id).where(Save.user_id == 1)),
+        ("posts of user (cascade)", select(Post.id).where(Post.user_id == 1)),
+        ("job claim", _job_claim()),
+        ("home timeline, next page", home_query(1, [1, 2, 3], 20, cursor)),
+        ("followers of author (fan-out)", select(Follow.follower_id).where(Follow.followee_id == 1)),
+        ("timeline entries of post (cascade)", select(TimelineEntry.id).where(TimelineEntry.post_id == 1)),
+        ("report search, by relevance", search_statement(dialect, "procurement fraud", category="fraud", window=10_000)),
+        ("report search, recent next page", search_statement(dialect, "fraud", sort="recent", position=cursor)),
+    ]
+
+
+def _job_claim():
+    from flask import Flask
+    from jobs import JobRunner
+    return JobRunner(Flask(__name__)).claim_statement()
+
+
+_SQLITE_FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)$")
+_SQLITE_SUBQUERY = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\w+)$")
+
+
+def sqlite_plan(conn, sql):
+    from sqlalchemy import text
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    details = [r[-1] for r in rows]
+    # Reading back a subquery's (already bounded) result is not a table scan
+    subqueries = {m.group(1) for m in map(_SQLITE_SUBQUERY.match, details) if m}
+    scans = [
+        d for d in details
+        if (m := _SQLITE_FULL_SCAN.match(d)) and m.group(1) not in subqueries
+    ]
+    return details, scans
+
+
+def postgres_plan(conn, sql):
+    from sqlalchemy import text
+    conn.execute(text("SET LOCAL enable_seqscan = off"))
+    details = [r[0] for r in conn.execute(text(f"EXPLAIN {sql}")).all()]
+    scans = [d.strip() for d in details if "Seq Scan" in d]
+    return details, scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--use-database-url", action="store_true", help="run against DATABASE_URL")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    if not args.use_database_url:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"
+    os.environ.setdefault("SCHEMA_BOOTSTRAP", "off")
+
+    from app import app
+    from database import db
+    from migrations import upgrade
+
+    failures = 0
+    with app.app_context():
+        upgrade(db.engine)
+        dialect = db.engine.dialect
+        explain = postgres_plan if dialect.name == "postgresql" else sqlite_plan
+        with db.engine.begin() as conn:
+            for name, stmt in hot_queries(dialect.name):
+                sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+                details, scans = explain(conn, sql)
+                if scans:
+                    failures += 1
+                    print(f"{RED}✗{RESET} {name}: full scan ({'; '.join(scans)})")
+                else:
+                    print(f"{GREEN}✓{RESET} {name}")
+                if args.verbose or scans:
+                    for d in details:
+                        print(f"      {d}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
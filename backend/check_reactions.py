@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress check for the idempotent like/save writes (reactions.py).
+
+Starts --threads threads, each signed in as one of --users users (so the
+same user double-taps from several threads at once), and has every thread
+send --ops random PUT (like/save), DELETE (unlike/unsave) and POST (toggle)
+requests against a single post. Fails if any request errors - in particular
+an IntegrityError on uq_like_post_user / uq_save_post_user surfacing as a
+500 - or if the post's like_count and save_count differ from COUNT(*) on
+the likes and saves tables afterwards.
+
+Runs against a throwaway SQLite database unless --use-database-url is
+given (the post it creates is left behind).
+
+Usage:
+  python check_reactions.py [--threads 16] [--users 4] [--ops 100] [--seed 1]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+
+# Colors match check_setup.py
+GREEN = '\033[92m'
+RED = '\033[91m'
+RESET = '\033[0m'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=100, help="requests per thread")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--use-database-url", action="store_true", help="run against DATABASE_URL")
+    args = parser.parse_args()
+
+    if not args.use_database_url:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'reactions.db')}"
+    os.environ.setdefault("HASH_MODE", "inline")
+
+    from sqlalchemy import func, select
+    from app import app
+    from database import db
+    from models import Like, Post, Save
+
+    client = app.test_client()
+    run = random.Random(args.seed).getrandbits(32)
+    tokens = []
+    for i in range(args.users):
+        resp = client.post("/api/v1/auth/register", json={
+            "email": f"react-{run}-{i}@example.com", "password": "password123", "name": f"React {i}",
+        })
+        if resp.status_code != 201:
+            sys.exit(f"{RED}✗{RESET} could not register a user: {resp.get_json()}")
+        tokens.append(resp.get_json()["token"])
+    resp = client.post("/api/v1/posts", json={"image_url": "https://example.com/react.jpg", "caption": "stress"},
+                       headers={"Authorization": f"Bearer {tokens[0]}"})
+    if resp.status_code != 201:
+        sys.exit(f"{RED}✗{RESET} could not create a post: {resp.get_json()}")
+    post_id = resp.get_json()["id"]
+
+    exceptions, bad_status = [], []
+    lock = threading.Lock()
+
+    class RecordExceptions(logging.Handler):
+        # The app's errorhandler(Exception) logs what it turns into a 500
+        def emit(self, record):
+            if record.exc_info:
+                with lock:
+                    exceptions.append(record.exc_info[1])
+
+    app.logger.addHandler(RecordExceptions())
+
+    def worker(n):
+        rng = random.Random(args.seed * 1000 + n)
+        local = app.test_client()
+        headers = {"Authorization": f"Bearer {tokens[n % len(tokens)]}"}
+        for _ in range(args.ops):
+            kind = rng.choice(("like", "save"))
+            method = rng.choice((local.put, local.delete, local.post))
+            resp = method(f"/api/v1/posts/{post_id}/{kind}", headers=headers)
+            if resp.status_code != 200:
+                with lock:
+                    bad_status.append((method.__name__, kind, resp.status_code))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    failures = 0
+    total = args.threads * args.ops
+    integrity = [e for e in exceptions if type(e).__name__ == "IntegrityError"]
+    if exceptions or bad_status:
+        failures += 1
+        print(f"{RED}✗{RESET} {len(bad_status)} of {total} requests failed, "
+              f"{len(exceptions)} exceptions ({len(integrity)} IntegrityError)")
+        for e in exceptions[:3]:
+            print(f"    {type(e).__name__}: {str(e).splitlines()[0]}")
+        for method, kind, status in bad_status[:3]:
+            print(f"    {method.upper()} {kind}: HTTP {status}")
+    else:
+        print(f"{GREEN}✓{RESET} {total} concurrent like/save requests from {args.threads} threads, "
+              f"no errors or IntegrityErrors")
+
+    with app.app_context():
+        post = db.session.get(Post, post_id)
+        for name, stored, model in (("like_count", post.like_count, Like), ("save_count", post.save_count, Save)):
+            actual = db.session.scalar(select(func.count()).select_from(model).where(model.post_id == post_id))
+            if stored != actual:
+                failures += 1
+                print(f"{RED}✗{RESET} {name} is {stored}, COUNT(*) is {actual}")
+            else:
+                print(f"{GREEN}✓{RESET} {name} = COUNT(*) = {actual}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Check that normal requests never inspect or change the schema (migrations.py).
+
+Warms the app with one request, which runs the one-time schema bootstrap
+(ensure_schema), then records every SQL statement (before_cursor_execute)
+issued by --rounds rounds of GET /api/v1/feed (anonymous and signed in),
+/api/v1/reports/public, /api/v1/timeline and /api/v1/health. Fails if any
+of them is a catalog or DDL statement: sqlite_master, PRAGMA, pg_catalog,
+information_schema, CREATE, ALTER or DROP.
+
+Runs against a throwaway SQLite database unless --use-database-url is
+given. The response cache is disabled so every request reaches the
+database.
+
+Usage:
+  python check_schema_queries.py [--rounds 3] [--verbose]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+# Colors match check_setup.py
+GREEN = '\033[92m'
+RED = '\033[91m'
+RESET = '\033[0m'
+
+SCHEMA_STATEMENT = re.compile(
+    r"sqlite_master|sqlite_schema|\bPRAGMA\b|pg_catalog|information_schema|^\s*(CREATE|ALTER|DROP)\b",
+    re.IGNORECASE,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--verbose", action="store_true", help="print every recorded statement")
+    parser.add_argument("--use-database-url", action="store_true", help="run against DATABASE_URL")
+    args = parser.parse_args()
+
+    if not args.use_database_url:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'schema.db')}"
+    os.environ.setdefault("HASH_MODE", "inline")
+    os.environ["RESPONSE_CACHE_SIZE"] = "0"
+
+    from sqlalchemy import event
+    from app import app
+    from database import db
+    from migrations import schema_ready
+
+    client = app.test_client()
+    client.get("/api/v1/health")
+    with app.app_context():
+        engine = db.engine
+    if not schema_ready(engine):
+        sys.exit(f"{RED}✗{RESET} the first request did not bootstrap the schema (SCHEMA_BOOTSTRAP=off?)")
+
+    run = os.urandom(4).hex()
+    resp = client.post("/api/v1/auth/register", json={
+        "email": f"schema-{run}@example.com", "password": "password123", "name": "Schema Check",
+    })
+    if resp.status_code != 201:
+        sys.exit(f"{RED}✗{RESET} could not register a user: {resp.get_json()}")
+    headers = {"Authorization": f"Bearer {resp.get_json()['token']}"}
+    client.post("/api/v1/posts", json={"image_url": "https://example.com/schema.jpg"}, headers=headers)
+    client.post("/api/v1/reports", json={"title": "Schema check", "body": "A public report"})
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    requests = [
+        ("feed, anonymous", "/api/v1/feed", {}),
+        ("feed, signed in", "/api/v1/feed", headers),
+        ("public reports", "/api/v1/reports/public", {}),
+        ("timeline", "/api/v1/timeline", {}),
+        ("health", "/api/v1/health", {}),
+    ]
+    failures = 0
+    for name, path, hdrs in requests:
+        statements.clear()
+        for _ in range(args.rounds):
+            resp = client.get(path, headers=hdrs)
+            if resp.status_code != 200:
+                failures += 1
+                print(f"{RED}✗{RESET} {name}: HTTP {resp.status_code}")
+                break
+        schema = [s for s in statements if SCHEMA_STATEMENT.search(s)]
+        failures += bool(schema)
+        mark = f"{GREEN}✓{RESET}" if not schema else f"{RED}✗{RESET}"
+        print(f"{mark} {name:<16} {len(statements)} statements in {args.rounds} requests, "
+              f"{len(schema)} schema queries")
+        for s in schema if not args.verbose else statements:
+            print("      " + " ".join(s.split())[:160])
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
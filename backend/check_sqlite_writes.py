@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Multi-threaded write load test for SQLite mode (sqlite_tuning.py).
+
+Starts --processes worker processes (like gunicorn workers) of --threads
+threads each, all against one SQLite file, and keeps them writing for
+--seconds: like toggles, comments and report messages spread over a few
+posts and reports, so writers constantly contend for the database lock.
+Prints the pragmas in effect and the sustained writes per second, and
+fails if any request errored ("database is locked" included) or if the
+post and report counters differ from COUNT(*) afterwards.
+
+Always uses a throwaway SQLite database. --single-writer off turns off the
+in-process writer queue (SQLITE_SINGLE_WRITER) to compare.
+
+Usage:
+  python check_sqlite_writes.py [--processes 2] [--threads 8] [--seconds 10] [--single-writer on|off]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Colors match check_setup.py
+GREEN = '\033[92m'
+RED = '\033[91m'
+RESET = '\033[0m'
+
+
+def worker(n, threads, seconds, setup, results):
+    """One process: `threads` threads writing until the deadline."""
+    from app import app
+
+    errors, lock = [], threading.Lock()
+
+    class RecordExceptions(logging.Handler):
+        # The app's errorhandler(Exception) logs what it turns into a 500
+        def emit(self, record):
+            if record.exc_info:
+                with lock:
+                    errors.append(f"{type(record.exc_info[1]).__name__}: {record.exc_info[1]}")
+
+    app.logger.addHandler(RecordExceptions())
+    counts = {"writes": 0, "failed": 0}
+    deadline = time.time() + seconds
+
+    def run(t):
+        rng = random.Random(n * 1000 + t)
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {rng.choice(setup['tokens'])}"}
+        while time.time() < deadline:
+            kind = rng.random()
+            if kind < 0.5:
+                resp = client.post(f"/api/v1/posts/{rng.choice(setup['posts'])}/like", headers=headers)
+            elif kind < 0.8:
+                resp = client.post(f"/api/v1/posts/{rng.choice(setup['posts'])}/comments",
+                                   json={"body": "load test"}, headers=headers)
+            else:
+                ticket, token = rng.choice(setup["reports"])
+                resp = client.post(f"/api/v1/reports/{ticket}/messages", json={"body": "load test"},
+                                   headers={"X-Report-Token": token})
+            with lock:
+                counts["writes"] += 1
+                if resp.status_code >= 400:
+                    counts["failed"] += 1
+                    if resp.status_code != 500:  # 500s are logged with their exception
+                        errors.append(f"HTTP {resp.status_code}: {resp.get_data(as_text=True)[:120]}")
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put((counts["writes"], counts["failed"], errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="threads per process")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--single-writer", choices=("on", "off"), default="on")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'writes.db')}"
+    os.environ["SQLITE_SINGLE_WRITER"] = "1" if args.single_writer == "on" else "0"
+    os.environ.setdefault("HASH_MODE", "inline")
+    os.environ.setdefault("ARGON2_PROFILE", "serverless")
+    # Tokens issued here must verify in the worker processes
+    os.environ.setdefault("SECRET_KEY", os.urandom(16).hex())
+
+    from sqlalchemy import func, select, text
+    from app import app
+    from database import db
+    from models import Comment, Like, Message, Post, Report
+
+    client = app.test_client()
+    setup = {"tokens": [], "posts": [], "reports": []}
+    for i in range(8):
+        resp = client.post("/api/v1/auth/register", json={
+            "email": f"writer-{i}@example.com", "password": "password123", "name": f"Writer {i}",
+        })
+        setup["tokens"].append(resp.get_json()["token"])
+    headers = {"Authorization": f"Bearer {setup['tokens'][0]}"}
+    for i in range(5):
+        resp = client.post("/api/v1/posts", json={"image_url": f"https://example.com/w/{i}.jpg"}, headers=headers)
+        setup["posts"].append(resp.get_json()["id"])
+    for i in range(3):
+        created = client.post("/api/v1/reports", json={"title": f"Load test {i}", "body": "Write contention"}).get_json()
+        resp = client.get(f"/api/v1/reports/{created['ticket']}", query_string={"code": created["access_code"]})
+        setup["reports"].append((created["ticket"], resp.get_json()["report_token"]))
+
+    with app.app_context():
+        pragmas = {name: db.session.execute(text(f"PRAGMA {name}")).scalar()
+                   for name in ("journal_mode", "synchronous", "busy_timeout", "foreign_keys", "mmap_size")}
+    print("pragmas: " + ", ".join(f"{k}={v}" for k, v in pragmas.items()))
+    print(f"{args.processes} processes x {args.threads} threads for {args.seconds:g}s "
+          f"(single writer {args.single_writer})...")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(n, args.threads, args.seconds, setup, results))
+             for n in range(args.processes)]
+    for p in procs:
+        p.start()
+    outcomes = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    failures = 0
+    writes = sum(w for w, _, _ in outcomes)
+    failed = sum(f for _, f, _ in outcomes)
+    errors = [e for _, _, errs in outcomes for e in errs]
+    locked = sum("database is locked" in e for e in errors)
+    if failed or errors:
+        failures += 1
+        print(f"{RED}✗{RESET} {failed} of {writes} writes failed ({locked} 'database is locked')")
+        for e in errors[:5]:
+            print(f"    {e}")
+    else:
+        print(f"{GREEN}✓{RESET} {writes} writes, {writes / args.seconds:.0f} writes/s sustained, no lock errors")
+
+    with app.app_context():
+        checks = [
+            ("posts.like_count", select(func.sum(Post.like_count)), select(func.count()).select_from(Like)),
+            ("posts.comment_count", select(func.sum(Post.comment_count)), select(func.count()).select_from(Comment)),
+            ("reports.message_count", select(func.sum(Report.message_count)),
+             select(func.count()).select_from(Message)),
+        ]
+        for name, stored, actual in checks:
+            stored, actual = db.session.scalar(stored), db.session.scalar(actual)
+            if stored != actual:
+                failures += 1
+                print(f"{RED}✗{RESET} {name} sums to {stored}, COUNT(*) is {actual}")
+            else:
+                print(f"{GREEN}✓{RESET} {name} = COUNT(*) = {actual}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Cold-start budget check for the SlugLime backend.
+
+Imports the app in fresh interpreters (the way a serverless cold start
+does) and reports:
+  - wall time to import `app` (which builds the module-level app),
+  - wall time of an extra create_app() call,
+  - the slowest imports according to `python -X importtime`,
+  - whether modules that should be deferred were loaded at startup.
+
+Exits non-zero if the median import time exceeds STARTUP_BUDGET_MS or a
+deferred module is imported eagerly, so it can gate CI or a deploy.
+
+Usage:
+  python check_startup.py [--runs 5] [--budget-ms 1500]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must only be imported by the routes that need them.
+DEFERRED_MODULES = [
+    "passlib.hash",                 # report / auth routes
+    "argon2",
+    "marshmallow",                  # request validation
+    "multiprocessing",              # hashing pool, on first hash
+    "sqlalchemy.dialects.postgresql",
+    "PIL",                          # image variants, in the images.process_post job
+]
+if not os.path.exists(os.path.join(BACKEND_DIR, ".env")):
+    DEFERRED_MODULES.append("dotenv")  # only loaded for a local .env
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app()
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def probe():
+    import json
+    env = dict(os.environ, SCHEMA_BOOTSTRAP="off")
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE % (DEFERRED_MODULES,)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def slowest_imports(n=10):
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line.split("|")
+            rows.append((int(cumulative), name.strip()))
+        except ValueError:
+            continue
+    # Top-level packages only (no leading indentation in the raw name column)
+    top = [(us, name) for us, name in rows if "." not in name]
+    return sorted(top, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "1500")))
+    args = parser.parse_args()
+
+    results = [probe() for _ in range(args.runs)]
+    import_ms = statistics.median(r["import_ms"] for r in results)
+    create_ms = statistics.median(r["create_app_ms"] for r in results)
+    eager = sorted({m for r in results for m in r["loaded"]})
+
+    print(f"import app (incl. create_app): {import_ms:7.1f} ms  (median of {args.runs})")
+    print(f"create_app() alone:            {create_ms:7.1f} ms")
+    print("\nSlowest top-level imports (cumulative, -X importtime):")
+    for us, name in slowest_imports():
+        print(f"  {us / 1000:7.1f} ms  {name}")
+
+    ok = True
+    if eager:
+        ok = False
+        print(f"\n✗ Deferred modules imported at startup: {', '.join(eager)}")
+    if import_ms > args.budget_ms:
+        ok = False
+        print(f"\n✗ Startup {import_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    if ok:
+        print(f"\n✓ Within startup budget ({args.budget_ms:.0f} ms)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
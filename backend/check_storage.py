@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Behaviour check for the S3 storage driver (storage.S3Storage) and the
+direct-upload routes.
+
+Runs against moto (an in-process fake of S3) by default, or a real
+S3-compatible server such as MinIO with --endpoint-url (credentials from the
+usual AWS_* environment variables):
+  - put: a file smaller than one part is sent with a single PutObject and
+    reads back byte for byte,
+  - multipart: a file of several parts goes through a multipart upload to a
+    temporary key and is moved into place, leaving no temporary key and no
+    open multipart upload behind,
+  - ranged read: read(start, stop) returns exactly that slice, across a
+    part boundary too,
+  - second promote: promoting another staged copy of a stored blob leaves
+    the stored object untouched and removes the staged copy,
+  - presign -> PUT -> complete through the app records the attachment and
+    serves the same bytes,
+  - hash mismatch: a staged object whose content differs from the presigned
+    SHA-256 is rejected by complete (400) and discarded, whether the bucket
+    refuses the PUT itself or not.
+
+Everything is written under a fresh prefix, removed afterwards on a real
+server. Needs boto3, plus `pip install moto` unless --endpoint-url is given.
+
+Usage:
+  python check_storage.py [--endpoint-url http://localhost:9000] [--bucket sluglime-check]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import uuid
+
+# Colors match check_setup.py
+GREEN = '\033[92m'
+RED = '\033[91m'
+RESET = '\033[0m'
+
+PART = 5 * 1024 * 1024  # the smallest part size S3 accepts
+
+
+def upload(storage, data, chunk=1024 * 1024):
+    """Stream `data` into storage the way the upload parser does."""
+    sha = hashlib.sha256(data).hexdigest()
+    up = storage.begin()
+    for i in range(0, len(data), chunk):
+        up.write(data[i:i + chunk])
+    up.close()
+    return up, sha
+
+
+def keys(storage, under):
+    resp = storage.client.list_objects_v2(Bucket=storage.bucket, Prefix=storage.prefix + under)
+    return [o["Key"] for o in resp.get("Contents", [])]
+
+
+def driver_scenarios(storage):
+    """Yield (name, passed, detail) for the driver on its own."""
+    small = os.urandom(64 * 1024)
+    up, sha = upload(storage, small)
+    stored = storage.commit(up, sha)
+    back = b"".join(storage.read(sha))
+    yield ("put", stored and up.temp_key is None and back == small and storage.stat(sha)["size"] == len(small),
+           f"{len(small):,} bytes in one PutObject")
+
+    big = os.urandom(2 * PART + 123_456)
+    up, sha = upload(storage, big)
+    parts = len(up.parts)
+    stored = storage.commit(up, sha)
+    back = b"".join(storage.read(sha))
+    open_uploads = storage.client.list_multipart_uploads(
+        Bucket=storage.bucket, Prefix=storage.prefix).get("Uploads", [])
+    leftover = keys(storage, "incoming/")
+    yield ("multipart", stored and parts == 3 and back == big and not open_uploads and not leftover,
+           f"{len(big):,} bytes in {parts} parts, {len(leftover)} temporary keys and "
+           f"{len(open_uploads)} open uploads left")
+
+    ranges = [(100, 200), (PART - 10, PART + 10), (len(big) - 7, None)]
+    ok = all(b"".join(storage.read(sha, start, stop)) == big[start:stop] for start, stop in ranges)
+    yield ("ranged read", ok, ", ".join(f"[{a}:{b if b is not None else ''}]" for a, b in ranges))
+
+    before = storage.client.head_object(Bucket=storage.bucket, Key=storage.key(sha))
+    up, _ = upload(storage, big)
+    token = storage.stage(up)
+    storage.promote(token, sha)
+    storage.promote(token, sha)  # a retried job: the staged copy is already gone
+    after = storage.client.head_object(Bucket=storage.bucket, Key=storage.key(sha))
+    unchanged = (before["ETag"], before["LastModified"]) == (after["ETag"], after["LastModified"])
+    yield ("second promote", unchanged and storage.stat_staged(token) is None,
+           "stored object " + ("untouched" if unchanged else "rewritten") + ", staged copy removed")
+
+
+def route_scenarios(app, storage):
+    """Yield (name, passed, detail) for presign/complete through the app."""
+    import requests  # installed with moto; any HTTP client would do for a real server
+
+    client = app.test_client()
+    created = client.post("/api/v1/reports", json={"title": "Storage check", "body": "Direct uploads"}).get_json()
+    ticket = created["ticket"]
+    base = f"/api/v1/reports/{ticket}/attachments"
+    token = client.get(f"/api/v1/reports/{ticket}", query_string={"code": created["access_code"]}).get_json()["report_token"]
+    headers = {"X-Report-Token": token}
+
+    data = os.urandom(300_000)
+    meta = {"filename": "evidence.pdf", "sha256": hashlib.sha256(data).hexdigest(),
+            "size": len(data), "content_type": "application/pdf"}
+    up = client.post(f"{base}/presign", json=meta, headers=headers).get_json()["upload"]
+    put = requests.put(up["url"], data=data, headers=up["headers"])
+    resp = client.post(f"{base}/complete", json={**meta, "upload_token": up["upload_token"]}, headers=headers)
+    ok = put.ok and resp.status_code == 201
+    if ok:
+        att = resp.get_json()["attachment"]
+        ok = client.get(f"{base}/{att['id']}", headers=headers).data == data
+    yield ("presign, PUT, complete", ok, f"PUT {put.status_code}, complete {resp.status_code}")
+
+    # Right size, wrong content: the bucket may refuse the PUT for its checksum
+    other = os.urandom(len(data))
+    meta = {**meta, "filename": "forged.pdf", "sha256": hashlib.sha256(os.urandom(16)).hexdigest()}
+    up = client.post(f"{base}/presign", json=meta, headers=headers).get_json()["upload"]
+    put = requests.put(up["url"], data=other, headers=up["headers"])
+    staged = keys(storage, "incoming/")
+    if not staged:
+        # The bucket enforced the checksum; stage the bytes anyway, as a
+        # store that does not would, to exercise complete's own check
+        from security import verify_upload_token
+        with app.app_context():
+            key = verify_upload_token(up["upload_token"], ticket, meta["sha256"], meta["size"], 3600)
+        storage.client.put_object(Bucket=storage.bucket, Key=key, Body=other)
+    resp = client.post(f"{base}/complete", json={**meta, "upload_token": up["upload_token"]}, headers=headers)
+    listed = client.get(f"/api/v1/reports/{ticket}", headers=headers).get_json()["attachments"]
+    ok = resp.status_code == 400 and not keys(storage, "incoming/") and len(listed) == 1
+    yield ("hash mismatch", ok,
+           f"PUT {put.status_code} ({'refused by the bucket' if not put.ok else 'accepted'}), "
+           f"complete {resp.status_code}, {len(listed)} attachment(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint-url", default=os.getenv("S3_ENDPOINT_URL"),
+                        help="S3-compatible server to check instead of moto (default: S3_ENDPOINT_URL)")
+    parser.add_argument("--bucket", default=os.getenv("S3_BUCKET") or "sluglime-check")
+    parser.add_argument("--region", default=os.getenv("S3_REGION") or "us-east-1")
+    args = parser.parse_args()
+
+    if not args.endpoint_url:
+        try:
+            from moto import mock_aws
+        except ImportError:
+            sys.exit("moto is not installed (pip install moto), or pass --endpoint-url")
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        mock_aws().start()
+
+    # Unique prefix so a real bucket's existing objects are never touched
+    prefix = f"check-storage-{uuid.uuid4().hex[:8]}/"
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'storage.db')}",
+        "HASH_MODE": "inline",
+        "STORAGE_DRIVER": "s3",
+        "S3_BUCKET": args.bucket,
+        "S3_PREFIX": prefix,
+        "S3_REGION": args.region,
+    })
+    if args.endpoint_url:
+        os.environ["S3_ENDPOINT_URL"] = args.endpoint_url
+
+    from storage import S3Storage
+    from app import app
+
+    storage = S3Storage(args.bucket, prefix=prefix, part_size=PART,
+                        endpoint_url=args.endpoint_url, region_name=args.region)
+    existing = [b["Name"] for b in storage.client.list_buckets().get("Buckets", [])]
+    if args.bucket not in existing:
+        storage.client.create_bucket(Bucket=args.bucket)
+
+    print(f"S3Storage on {args.endpoint_url or 'moto'}, s3://{args.bucket}/{prefix}")
+    failures = 0
+    try:
+        for scenarios in (driver_scenarios(storage), route_scenarios(app, storage)):
+            for check, passed, detail in scenarios:
+                failures += not passed
+                mark = f"{GREEN}✓{RESET}" if passed else f"{RED}✗{RESET}"
+                print(f"  {mark} {check:<24} {detail}")
+    finally:
+        for key in keys(storage, ""):
+            storage.client.delete_object(Bucket=args.bucket, Key=key)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
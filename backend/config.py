@@ -1,6 +1,8 @@
 import os
 import secrets
 
+from db_pool import deployment_mode, engine_options
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_hex(32))
     
@@ -19,11 +21,137 @@ class Config:
         database_url = database_url.replace("postgres://", "postgresql://", 1)
     
     SQLALCHEMY_DATABASE_URI = database_url
+    
+    # SQLite tuning (sqlite_tuning.py), ignored for other databases
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    # Queue writes of this process behind a single writer lock
+    SQLITE_SINGLE_WRITER = os.getenv("SQLITE_SINGLE_WRITER", "1") == "1"
+    
+    # Connection pooling: "serverless" (Vercel) or "server" (gunicorn etc.),
+    # see db_pool.py for the DB_POOL* knobs
+    DEPLOYMENT_MODE = deployment_mode()
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(database_url, DEPLOYMENT_MODE, os.environ)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # "auto": apply pending migrations on the first request of each process.
+    # "off": never touch the schema at runtime (run `flask db-upgrade` on deploy).
+    SCHEMA_BOOTSTRAP = os.getenv("SCHEMA_BOOTSTRAP", "auto")
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB uploads
     
+    # Feed / public reports pagination (keyset cursors, see pagination.py)
+    PAGE_SIZE = int(os.getenv("PAGE_SIZE", "20"))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+    
+    # HTTP caching of public reads: browsers revalidate (max-age), the CDN in
+    # front of the deployment may serve a copy for s-maxage seconds
+    PUBLIC_CACHE_MAX_AGE = int(os.getenv("PUBLIC_CACHE_MAX_AGE", "0"))
+    PUBLIC_CACHE_S_MAXAGE = int(os.getenv("PUBLIC_CACHE_S_MAXAGE", "10"))
+    
+    # Server-side cache of public pages (cache.py). Set CACHE_URL=redis://...
+    # to share it between workers; otherwise each process keeps its own.
+    CACHE_URL = os.getenv("CACHE_URL")
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "10"))
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+    
+    # Live report events over SSE (events.py). EVENTS_URL=redis://... fans
+    # them out between workers; defaults to CACHE_URL. Each open stream holds
+    # a worker thread, so run gunicorn with threads (gthread) or gevent.
+    EVENTS_URL = os.getenv("EVENTS_URL", CACHE_URL)
+    SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+    # Streams are closed after this long and the browser reconnects; kept
+    # under the function timeout on Vercel
+    SSE_MAX_SECONDS = int(os.getenv("SSE_MAX_SECONDS", "25" if os.getenv("VERCEL") else "300"))
+    SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "3000"))
+    SSE_BUFFER_SIZE = int(os.getenv("SSE_BUFFER_SIZE", "64"))  # events queued per connection
+    SSE_MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "200"))  # per process
+    
+    # Report search (search.py): relevance is ranked among at most this many
+    # of the newest matches, bounding the cost of very common words; 0 = all
+    SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "10000"))
+    
+    # Hot feed (hot.py): a post needs 10x the engagement of one this much
+    # younger to rank alongside it. Run `flask --app app rebuild-hot-scores
+    # --full` after changing it.
+    HOT_DECAY_SECONDS = int(os.getenv("HOT_DECAY_SECONDS", str(45000)))
+    
+    # Home timelines (home.py): new posts are copied into every follower's
+    # timeline, except from accounts with FANOUT_MAX_FOLLOWERS or more
+    # followers, whose posts are read on demand. Each timeline keeps its
+    # HOME_TIMELINE_MAX newest entries (fan-out queues a trim at most once
+    # per HOME_TRIM_INTERVAL seconds); a new follow copies in the followed
+    # account's HOME_FOLLOW_BACKFILL latest posts.
+    FANOUT_MAX_FOLLOWERS = int(os.getenv("FANOUT_MAX_FOLLOWERS", "10000"))
+    HOME_TIMELINE_MAX = int(os.getenv("HOME_TIMELINE_MAX", "800"))
+    HOME_TRIM_INTERVAL = int(os.getenv("HOME_TRIM_INTERVAL", "3600"))
+    HOME_FOLLOW_BACKFILL = int(os.getenv("HOME_FOLLOW_BACKFILL", "20"))
+    
+    # Report access: short-lived tokens issued after one successful code check,
+    # plus an optional in-process cache of verified codes (size 0 disables it)
+    REPORT_TOKEN_MAX_AGE = int(os.getenv("REPORT_TOKEN_MAX_AGE", str(15 * 60)))
+    CODE_CACHE_SIZE = int(os.getenv("CODE_CACHE_SIZE", "1024"))
+    CODE_CACHE_TTL = int(os.getenv("CODE_CACHE_TTL", "300"))
+    
+    # Current-user snapshot cache (user_cache.py); size 0 disables it
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+    
+    # Hashing pool (hashing.py): Argon2 / password hashing off the request thread.
+    # HASH_MODE=inline runs on the request thread; it is the default on Vercel,
+    # whose Python runtime cannot host a multiprocessing pool.
+    HASH_MODE = os.getenv("HASH_MODE", "inline" if os.getenv("VERCEL") else "process")
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+    HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", "32"))
+    HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "2"))
+    
+    # Hash cost. ARGON2_PROFILE is one of security.ARGON2_PROFILES; the
+    # ARGON2_* overrides take precedence (see `flask calibrate-argon2`).
+    # Stored hashes are upgraded on the next successful verify after a change.
+    ARGON2_PROFILE = os.getenv("ARGON2_PROFILE", "default")
+    ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "0")) or None
+    ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "0")) or None
+    ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "0")) or None
+    # werkzeug method for account passwords, e.g. "scrypt" or "pbkdf2:sha256:600000"
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    
+    # Background jobs (jobs.py). "worker": run `flask jobs-worker` next to the
+    # app; "thread": a runner thread per app process (development); "inline":
+    # run due jobs at the end of the request, for serverless without a worker
+    JOB_MODE = os.getenv("JOB_MODE", "inline" if os.getenv("VERCEL") else "thread")
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+    # A running job is handed to another worker after this many seconds
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    # Retry delay: base * 2^(attempt-1) seconds, jittered, capped at max
+    JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "2"))
+    JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "600"))
+    
     # Upload folder (note: serverless has read-only filesystem, use cloud storage in production)
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", os.path.join(basedir, "uploads"))
+    # Report evidence limits, enforced while the upload streams (uploads.py)
+    UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+    UPLOAD_MAX_REPORT_BYTES = int(os.getenv("UPLOAD_MAX_REPORT_BYTES", str(16 * 1024 * 1024)))
+    UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", "10"))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+    
+    # Uploaded post images (images.py): resized to these widths in WebP and
+    # JPEG by a background job and served from /api/v1/media/<sha256>
+    IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+    IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000)))
+    IMAGE_WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_WIDTHS", "320,640,1080").split(","))
+    IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+    # Prefix for media URLs in the feed, e.g. the API origin or a CDN in front of it
+    MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "").rstrip("/")
+    
+    # Attachment storage (storage.py): "local" keeps blobs in UPLOAD_FOLDER,
+    # "s3" uses an S3-compatible bucket (AWS, MinIO via S3_ENDPOINT_URL...),
+    # with credentials from the usual AWS_* environment variables
+    STORAGE_DRIVER = os.getenv("STORAGE_DRIVER", "local")
+    S3_BUCKET = os.getenv("S3_BUCKET")
+    S3_PREFIX = os.getenv("S3_PREFIX", "attachments/")
+    S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+    S3_REGION = os.getenv("S3_REGION")
+    # Lifetime of presigned direct-upload URLs, in seconds
+    S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "900"))
     
     # CORS: Allow specific domains
     # In production, set CORS_ORIGINS in environment variables to your actual domains
@@ -0,0 +1,81 @@
+"""
+Denormalized counter maintenance.
+
+Post.like_count / comment_count / save_count, Report.message_count and
+User.follower_count are kept in step with their child rows by mapper events: every ORM insert or
+delete of a Like/Comment/Save/Message/Follow issues an `UPDATE ... SET n = n + 1`
+on the same connection, so the counter moves in the same transaction as the
+row itself. Code that writes child rows with Core statements (bypassing the
+ORM) must call bump() itself. The same UPDATE recomputes the post's hot
+score (hot.py).
+
+reconcile_counters() recomputes every counter from the child tables in bulk,
+then the hot scores derived from them, and is exposed as `flask --app app reconcile-counters`.
+"""
+from sqlalchemy import event, select, func, update
+
+from database import db
+from hot import rebuild_hot_scores, score_expression
+from models import Post, Report, User, Like, Comment, Save, Message, Follow
+
+# child model -> (parent model, FK column on child, counter column on parent)
+COUNTERS = {
+    Like: (Post, Like.post_id, Post.like_count),
+    Comment: (Post, Comment.post_id, Post.comment_count),
+    Save: (Post, Save.post_id, Post.save_count),
+    Message: (Report, Message.report_id, Report.message_count),
+    Follow: (User, Follow.followee_id, User.follower_count),
+}
+
+
+def bump(conn, child_model, parent_id: int, delta: int) -> None:
+    """Atomically add `delta` to the counter that tracks `child_model`."""
+    parent, _, counter = COUNTERS[child_model]
+    table = parent.__table__
+    column = table.c[counter.key]
+    values = {column: column + delta}
+    if parent is Post:
+        values[table.c.hot_score] = score_expression(table, {counter.key: delta})
+    conn.execute(update(table).where(table.c.id == parent_id).values(values))
+
+
+def _register(child_model):
+    _, fk, _ = COUNTERS[child_model]
+
+    @event.listens_for(child_model, "after_insert")
+    def _after_insert(mapper, connection, target):
+        bump(connection, child_model, getattr(target, fk.key), 1)
+
+    @event.listens_for(child_model, "after_delete")
+    def _after_delete(mapper, connection, target):
+        bump(connection, child_model, getattr(target, fk.key), -1)
+
+
+for _model in COUNTERS:
+    _register(_model)
+
+
+def reconcile_counters() -> dict:
+    """Recompute every denormalized counter from its child table.
+
+    Only rows whose stored value drifted are rewritten. Returns the number
+    of corrected rows per counter.
+    """
+    fixed = {}
+    for child, (parent, fk, counter) in COUNTERS.items():
+        actual = (
+            select(func.count())
+            .where(fk == parent.id)
+            .correlate(parent)
+            .scalar_subquery()
+        )
+        result = db.session.execute(
+            update(parent)
+            .where(counter != actual)
+            .values({counter.key: actual})
+            .execution_options(synchronize_session=False)
+        )
+        fixed[f"{parent.__tablename__}.{counter.key}"] = result.rowcount
+    db.session.commit()
+    fixed["posts.hot_score"] = rebuild_hot_scores()
+    return fixed
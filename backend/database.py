@@ -1,3 +1,17 @@
+import importlib
+
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
+
+# Dialects whose insert() supports ON CONFLICT DO NOTHING ... RETURNING
+_UPSERT_DIALECTS = ("postgresql", "sqlite")
+
+
+def insert_for(session, model):
+    """The dialect-specific insert() for `session`'s bind, with on_conflict_do_nothing()."""
+    dialect = session.get_bind().dialect.name
+    if dialect not in _UPSERT_DIALECTS:
+        raise NotImplementedError(f"ON CONFLICT inserts are not supported on {dialect}")
+    # Imported on first use: the postgresql dialect module is slow to import.
+    return importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert(model)
@@ -0,0 +1,134 @@
+"""
+Deployment-aware connection pooling.
+
+engine_options() builds SQLALCHEMY_ENGINE_OPTIONS for the two ways the
+backend runs:
+
+  serverless - Vercel functions are frozen between invocations, so pooled
+               connections would be stranded open on the database. Default
+               to NullPool (connect per request, close on checkin); a tiny
+               pre-pinged, recycled pool is available with DB_POOL=small.
+  server     - gunicorn / long-running processes get a sized QueuePool.
+
+Both pool classes record checkout counts and how long callers waited for a
+connection; pool_metrics() exposes them for /api/v1/health.
+"""
+import os
+import threading
+import time
+
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class _TimedPoolMixin:
+    """Times every checkout (queue wait, or connect time for NullPool)."""
+
+    def _metrics_state(self):
+        state = getattr(self, "_timing", None)
+        if state is None:
+            state = self._timing = {
+                "lock": threading.Lock(),
+                "checkouts": 0,
+                "wait_total": 0.0,
+                "wait_max": 0.0,
+                "timeouts": 0,
+            }
+        return state
+
+    def _do_get(self):
+        state = self._metrics_state()
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            with state["lock"]:
+                state["timeouts"] += 1
+            raise
+        waited = time.perf_counter() - started
+        with state["lock"]:
+            state["checkouts"] += 1
+            state["wait_total"] += waited
+            state["wait_max"] = max(state["wait_max"], waited)
+        return conn
+
+    def metrics(self) -> dict:
+        state = self._metrics_state()
+        with state["lock"]:
+            n = state["checkouts"]
+            return {
+                "pool": type(self).__name__,
+                "status": self.status(),
+                "checkouts": n,
+                "checkout_errors": state["timeouts"],
+                "wait_ms_avg": round(state["wait_total"] / n * 1000, 3) if n else 0.0,
+                "wait_ms_max": round(state["wait_max"] * 1000, 3),
+            }
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    pass
+
+
+def deployment_mode() -> str:
+    """"serverless" on Vercel (or when forced), otherwise "server"."""
+    return os.getenv("DEPLOYMENT_MODE") or ("serverless" if os.getenv("VERCEL") else "server")
+
+
+def engine_options(database_url: str, mode: str, env) -> dict:
+    """SQLAlchemy engine options for `database_url` in deployment `mode`.
+
+    `env` is a mapping of settings (normally os.environ):
+      DB_POOL               serverless: "null" (default) or "small"
+      DB_POOL_SIZE          server: persistent connections (default 5)
+      DB_MAX_OVERFLOW       server: burst connections (default 10)
+      DB_POOL_TIMEOUT       seconds to wait for a connection (default 10)
+      DB_POOL_RECYCLE       seconds before a connection is replaced
+      DB_PGBOUNCER          "1" when connecting through PgBouncer in
+                            transaction-pooling mode
+    """
+    if database_url.startswith("sqlite"):
+        # SQLite connections are file handles; keep SQLAlchemy's default
+        # sizing and only swap in the instrumented pool for file databases.
+        if ":memory:" in database_url or database_url in ("sqlite://", "sqlite:///"):
+            return {}
+        return {"poolclass": TimedQueuePool}
+
+    options = {"pool_pre_ping": True}
+    if mode == "serverless":
+        if env.get("DB_POOL", "null") == "small":
+            options.update(
+                poolclass=TimedQueuePool,
+                pool_size=1,
+                max_overflow=2,
+                pool_timeout=int(env.get("DB_POOL_TIMEOUT", "5")),
+                pool_recycle=int(env.get("DB_POOL_RECYCLE", "300")),
+            )
+        else:
+            options = {"poolclass": TimedNullPool}
+    else:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=int(env.get("DB_POOL_SIZE", "5")),
+            max_overflow=int(env.get("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=int(env.get("DB_POOL_TIMEOUT", "10")),
+            pool_recycle=int(env.get("DB_POOL_RECYCLE", "1800")),
+        )
+
+    if env.get("DB_PGBOUNCER") == "1":
+        # Transaction pooling hands each transaction to an arbitrary server
+        # connection, so server-side prepared statements must be disabled.
+        # psycopg2 never prepares; psycopg 3 does after prepare_threshold uses.
+        if "+psycopg" in database_url and "+psycopg2" not in database_url:
+            options["connect_args"] = {"prepare_threshold": None}
+    return options
+
+
+def pool_metrics(engine) -> dict:
+    pool = engine.pool
+    if hasattr(pool, "metrics"):
+        return pool.metrics()
+    return {"pool": type(pool).__name__, "status": pool.status()}
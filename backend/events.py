@@ -0,0 +1,178 @@
+"""
+Live report events (Server-Sent Events).
+
+GET /api/v1/reports/<ticket>/events authenticates once and then holds the
+connection open, pushing each new message of the thread as it is posted
+instead of the client re-fetching the whole report. Messages are published
+after their transaction commits and fanned out through a broker:
+
+  MemoryBroker  per process; enough for a single worker
+  RedisBroker   redis pub/sub, so a message posted on one worker reaches
+                streams held by every other worker
+
+Every subscriber has a bounded buffer. A client that cannot keep up is
+disconnected rather than buffered without limit; event ids are message ids,
+so the browser's automatic reconnect (Last-Event-ID) resumes from the
+database without losing anything.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class Overflow(Exception):
+    """The subscriber fell more than its buffer size behind."""
+
+
+class Subscription:
+    """Bounded queue of events for one connection."""
+
+    def __init__(self, broker: "Broker", channel: str, maxsize: int):
+        self.broker = broker
+        self.channel = channel
+        self.maxsize = maxsize
+        self.overflowed = False
+        self._events: deque = deque()
+        self._cond = threading.Condition()
+
+    def push(self, event: dict) -> None:
+        with self._cond:
+            if len(self._events) >= self.maxsize:
+                self.overflowed = True
+            else:
+                self._events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout: float) -> dict | None:
+        """Next event, or None after `timeout` seconds. Raises Overflow."""
+        with self._cond:
+            if not self._events and not self.overflowed:
+                self._cond.wait(timeout)
+            if self.overflowed:
+                raise Overflow(self.channel)
+            return self._events.popleft() if self._events else None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Channel -> subscriptions of this process. publish() delivers locally;
+    subclasses that share events between processes override it."""
+
+    def __init__(self, buffer_size: int = 64):
+        self.buffer_size = buffer_size
+        self._channels: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._published = 0
+        self._overflows = 0
+
+    def subscribe(self, channel: str) -> Subscription:
+        sub = Subscription(self, channel, self.buffer_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._channels.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._channels[sub.channel]
+            if sub.overflowed:
+                self._overflows += 1
+
+    def publish(self, channel: str, event: dict) -> None:
+        self._deliver(channel, event)
+
+    def _deliver(self, channel: str, event: dict) -> None:
+        with self._lock:
+            subs = list(self._channels.get(channel, ()))
+            self._published += 1
+        for sub in subs:
+            sub.push(event)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._channels.values())
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "broker": type(self).__name__,
+                "subscribers": sum(len(s) for s in self._channels.values()),
+                "channels": len(self._channels),
+                "delivered": self._published,
+                "overflows": self._overflows,
+            }
+
+
+class MemoryBroker(Broker):
+    """Events only reach subscribers in the same process."""
+
+
+class RedisBroker(Broker):
+    """
+    Publishes through redis pub/sub. One listener thread per process
+    (started with the first subscriber) receives every channel under
+    `prefix` and hands events to the local subscriptions.
+    """
+
+    def __init__(self, client, prefix: str = "sluglime:events:", buffer_size: int = 64):
+        super().__init__(buffer_size)
+        self.client = client
+        self.prefix = prefix
+        self._listener = None
+        self._ready = threading.Event()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisBroker":
+        import redis  # optional dependency, only needed when EVENTS_URL is set
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def subscribe(self, channel):
+        self._ensure_listener()
+        return super().subscribe(channel)
+
+    def publish(self, channel, event):
+        self.client.publish(self.prefix + channel, json.dumps(event))
+
+    def _ensure_listener(self):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, name="events-listener", daemon=True)
+                    self._listener.start()
+        # A subscriber reads its backlog from the database right after
+        # subscribing; nothing published from then on may be missed.
+        self._ready.wait(5.0)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + "*")
+                self._ready.set()
+                for msg in pubsub.listen():
+                    channel = msg["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    self._deliver(channel[len(self.prefix):], json.loads(msg["data"]))
+            except Exception:
+                logger.exception("Event listener lost its redis connection; retrying")
+                time.sleep(1.0)
+
+
+def sse_frame(data: str, event_id=None, event: str | None = None) -> str:
+    """One Server-Sent Events frame (`data` must not contain newlines)."""
+    head = ""
+    if event_id is not None:
+        head += f"id: {event_id}\n"
+    if event:
+        head += f"event: {event}\n"
+    return f"{head}data: {data}\n\n"
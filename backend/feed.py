@@ -0,0 +1,92 @@
+"""
+Feed query layer.
+
+Builds the social feed with a fixed number of queries, independent of how
+many likes/comments a post has. Counts come from the denormalized counters
+on Post (see counters.py), the viewer's liked/saved flags from EXISTS
+lookups keyed on the viewer id, and authors from a join - nothing is loaded
+through the ORM relationships.
+
+Two orders are supported, both keyset paginated: "new" by (created_at, id)
+and "hot" by (hot_score, id), the stored score maintained by hot.py.
+"""
+from sqlalchemy import select, exists, literal, tuple_
+
+from database import db
+from models import Post, User, Like, Save
+from pagination import encode_rank_cursor, keyset_page, split_page
+from serializers import dump_feed_post
+from http_cache import weak_etag
+
+
+SORTS = ("new", "hot")
+
+
+def feed_select(viewer_id: int | None = None):
+    """Unordered SELECT of feed rows (post, author, counters, viewer flags)."""
+    if viewer_id is not None:
+        liked = exists().where(Like.post_id == Post.id, Like.user_id == viewer_id)
+        saved = exists().where(Save.post_id == Post.id, Save.user_id == viewer_id)
+    else:
+        liked = literal(False)
+        saved = literal(False)
+
+    return (
+        select(
+            Post.id,
+            Post.caption,
+            Post.image_url,
+            Post.image_variants,
+            Post.image_status,
+            Post.created_at,
+            User.id.label("author_id"),
+            User.email.label("author_email"),
+            User.name.label("author_name"),
+            User.avatar_url.label("author_avatar_url"),
+            User.verified.label("author_verified"),
+            Post.like_count,
+            Post.comment_count,
+            Post.hot_score,
+            liked.label("liked"),
+            saved.label("saved"),
+        )
+        .join(User, User.id == Post.user_id)
+    )
+
+
+def feed_query(viewer_id: int | None = None, limit: int = 20, position=None, sort: str = "new"):
+    """Return the SELECT statement for one feed page.
+
+    `position` is a decoded (created_at, id) cursor, or (hot_score, id) for
+    sort="hot"; the statement fetches `limit + 1` rows after it so callers
+    can tell whether a next page exists.
+    """
+    stmt = feed_select(viewer_id)
+    if sort == "hot":
+        if position is not None:
+            stmt = stmt.where(tuple_(Post.hot_score, Post.id) < tuple_(*position))
+        return stmt.order_by(Post.hot_score.desc(), Post.id.desc()).limit(limit + 1)
+    return keyset_page(stmt, Post.created_at, Post.id, position, limit)
+
+
+def fetch_feed_rows(viewer_id: int | None = None, limit: int = 20, position=None, sort: str = "new"):
+    """Fetch one page of raw feed rows in a single round trip.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    rows = db.session.execute(feed_query(viewer_id, limit, position, sort)).all()
+    if sort == "hot":
+        return split_page(rows, limit, key=lambda r: (r.hot_score, r.id), encode=encode_rank_cursor)
+    return split_page(rows, limit)
+
+
+def feed_etag(rows, next_cursor) -> str:
+    """ETag for a feed page: changes when a post, its image or its counters change."""
+    return weak_etag(next_cursor, [(r.id, r.image_status, r.like_count, r.comment_count) for r in rows])
+
+
+def fetch_feed(viewer_id: int | None = None, limit: int = 20, position=None,
+               sort: str = "new") -> tuple[list[dict], str | None]:
+    """Fetch and serialize one feed page. Returns (items, next_cursor)."""
+    rows, next_cursor = fetch_feed_rows(viewer_id, limit, position, sort)
+    return [dump_feed_post(r) for r in rows], next_cursor
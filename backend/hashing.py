@@ -0,0 +1,121 @@
+"""
+Bounded worker pool for password / access-code hashing.
+
+Argon2 and werkzeug password hashing are deliberately CPU- and memory-heavy.
+Running them inline lets a login or report-submission burst occupy every
+request thread, so cheap endpoints queue up behind them. HashingPool moves
+that work to a process pool (no GIL contention) and admits at most
+`workers + queue_depth` jobs at a time; anything beyond that is rejected
+immediately with HashingBusy, which the app turns into a 503 + Retry-After.
+"""
+import threading
+import time
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Hashing queue is full")
+        self.retry_after = retry_after
+
+
+def _timed_call(fn, args, submitted_at):
+    """Run `fn(*args)` in the worker, reporting queue wait and run time."""
+    started = time.time()
+    result = fn(*args)
+    return result, started - submitted_at, time.time() - started
+
+
+class HashingPool:
+    """
+    Run hashing functions on a bounded process pool.
+
+    mode="process" uses a ProcessPoolExecutor with `workers` processes,
+    created lazily on first use. mode="inline" runs on the calling thread
+    (useful on serverless runtimes that cannot fork) but still enforces the
+    same admission limit.
+    """
+
+    def __init__(self, workers: int = 2, queue_depth: int = 16, retry_after: int = 1, mode: str = "process"):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.retry_after = retry_after
+        self.mode = mode
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_depth)
+        self._lock = threading.Lock()
+        self._stats = {
+            "completed": 0,
+            "rejected": 0,
+            "in_flight": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "hash_time_total": 0.0,
+            "hash_time_max": 0.0,
+        }
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Imported lazily: multiprocessing is not needed until the first hash.
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def run(self, fn, *args):
+        """Run `fn(*args)` on the pool and return its result.
+
+        Raises HashingBusy without waiting if the queue is already full.
+        `fn` must be a picklable module-level function.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise HashingBusy(self.retry_after)
+
+        with self._lock:
+            self._stats["in_flight"] += 1
+        try:
+            if self.mode == "inline":
+                result, waited, took = _timed_call(fn, args, time.time())
+            else:
+                future = self._get_executor().submit(_timed_call, fn, args, time.time())
+                result, waited, took = future.result()
+        finally:
+            with self._lock:
+                self._stats["in_flight"] -= 1
+            self._slots.release()
+
+        with self._lock:
+            s = self._stats
+            s["completed"] += 1
+            s["queue_wait_total"] += max(waited, 0.0)
+            s["queue_wait_max"] = max(s["queue_wait_max"], waited)
+            s["hash_time_total"] += took
+            s["hash_time_max"] = max(s["hash_time_max"], took)
+        return result
+
+    def metrics(self) -> dict:
+        """Snapshot of queue and timing metrics (times in milliseconds)."""
+        with self._lock:
+            s = dict(self._stats)
+        done = s["completed"] or 1
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": s["in_flight"],
+            "completed": s["completed"],
+            "rejected": s["rejected"],
+            "queue_wait_ms_avg": round(s["queue_wait_total"] / done * 1000, 2),
+            "queue_wait_ms_max": round(s["queue_wait_max"] * 1000, 2),
+            "hash_time_ms_avg": round(s["hash_time_total"] / done * 1000, 2),
+            "hash_time_ms_max": round(s["hash_time_max"] * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,208 @@
+"""
+Home timelines: the posts of the accounts a user follows.
+
+Fan-out on write. When a post is created, the timelines.fan_out job copies
+it into the home timeline of every follower of its author as a
+TimelineEntry row, in one INSERT ... SELECT over the author's followers.
+Reading a home timeline is then one range scan of the viewer's own entries,
+no matter how many accounts they follow.
+
+Fan-out on read for large accounts. Copying every post of an account with
+a huge following would cost one row per follower, so authors with
+`max_followers` or more followers are skipped at write time. Their posts,
+and the viewer's own, are read when the timeline is requested: one page of
+posts.user_id IN (those authors) over ix_posts_user_id_created_at_id,
+merged with the stored entries in the same statement. Only ids are merged;
+feed rows are read for the final page alone. Reads pull from authors down
+to half that threshold, so an account whose follower count hovers around
+it is always covered by at least one of the two paths (duplicates are
+dropped in the merge).
+
+Bounded storage. trim_timelines() (the timelines.trim job) deletes all but
+the newest entries of every timeline, a new follow copies in only the
+latest few posts of the followed account, and an unfollow removes that
+account's entries.
+
+Everything is ordered by the post's (created_at, id), so pages use the
+same keyset cursor as the public feed.
+"""
+import functools
+
+from sqlalchemy import Integer, bindparam, delete, exists, func, insert, literal, select, tuple_, union
+
+from database import db
+from feed import feed_select
+from models import Follow, Post, TimelineEntry, User
+from pagination import split_page
+from reactions import set_follow
+
+
+def pull_threshold(max_followers: int) -> int:
+    """Follower count from which an author's posts are read on demand."""
+    return max(1, max_followers // 2)
+
+
+def _deliver(rows) -> int:
+    """INSERT the (user_id, post_id, author_id, created_at) rows selected by
+    `rows` into timelines, skipping entries that already exist."""
+    row = rows.subquery()
+    result = db.session.execute(
+        insert(TimelineEntry).from_select(
+            ["user_id", "post_id", "author_id", "created_at"],
+            select(row).where(~exists().where(
+                TimelineEntry.user_id == row.c.user_id, TimelineEntry.post_id == row.c.post_id
+            )),
+        )
+    )
+    return result.rowcount
+
+
+def fan_out(post_id: int, max_followers: int) -> int:
+    """Deliver a new post to its author's followers; returns the entries written.
+
+    Safe to run again (already delivered entries are skipped).
+    """
+    post = db.session.get(Post, post_id)
+    if post is None:
+        return 0
+    follower_count = db.session.scalar(select(User.follower_count).where(User.id == post.user_id))
+    if follower_count is None or follower_count >= max_followers:
+        return 0  # read on demand
+    n = _deliver(
+        select(
+            Follow.follower_id.label("user_id"),
+            literal(post.id).label("post_id"),
+            literal(post.user_id).label("author_id"),
+            literal(post.created_at, TimelineEntry.created_at.type).label("created_at"),
+        ).where(Follow.followee_id == post.user_id)
+    )
+    db.session.commit()
+    return n
+
+
+def follow(follower_id: int, followee_id: int, on: bool, *, max_followers: int,
+           backfill: int) -> tuple[bool, int | None]:
+    """Follow or unfollow a user and update the follower's timeline.
+
+    Following copies the account's `backfill` latest posts in (unless they
+    are read on demand); unfollowing removes its entries. Commits and
+    returns (changed, follower count), the count being None if the user
+    does not exist.
+    """
+    changed, count = set_follow(follower_id, followee_id, on)
+    if changed and not on:
+        db.session.execute(delete(TimelineEntry).where(
+            TimelineEntry.user_id == follower_id, TimelineEntry.author_id == followee_id
+        ))
+    elif changed and count < pull_threshold(max_followers) and backfill > 0:
+        _deliver(
+            select(
+                literal(follower_id).label("user_id"),
+                Post.id.label("post_id"),
+                Post.user_id.label("author_id"),
+                Post.created_at.label("created_at"),
+            )
+            .where(Post.user_id == followee_id)
+            .order_by(Post.created_at.desc(), Post.id.desc())
+            .limit(backfill)
+        )
+    db.session.commit()
+    return changed, count
+
+
+def pulled_authors(viewer_id: int, max_followers: int) -> list[int]:
+    """The viewer and the large accounts they follow: read on demand."""
+    large = db.session.scalars(
+        select(Follow.followee_id)
+        .join(User, User.id == Follow.followee_id)
+        .where(Follow.follower_id == viewer_id, User.follower_count >= pull_threshold(max_followers))
+    ).all()
+    return [viewer_id, *large]
+
+
+@functools.lru_cache(maxsize=2)
+def _home_statement(paged: bool):
+    # Built once per shape, with every value a bound parameter; the author
+    # list is an expanding IN, so the statement does not grow with it.
+    entries, posts = TimelineEntry.__table__, Post.__table__
+    viewer = bindparam("viewer", type_=Integer)
+    size = bindparam("size", type_=Integer)
+    authors = bindparam("authors", type_=Integer, expanding=True)
+
+    def page(stmt, created_col, id_col):
+        if paged:
+            after_at = bindparam("after_at", type_=created_col.type)
+            after_id = bindparam("after_id", type_=id_col.type)
+            stmt = stmt.where(tuple_(created_col, id_col) < tuple_(after_at, after_id))
+        return select(stmt.order_by(created_col.desc(), id_col.desc()).limit(size).subquery())
+
+    merged = union(
+        page(
+            select(entries.c.post_id.label("id"), entries.c.created_at).where(entries.c.user_id == viewer),
+            entries.c.created_at, entries.c.post_id,
+        ),
+        page(
+            select(posts.c.id, posts.c.created_at).where(posts.c.user_id.in_(authors)),
+            posts.c.created_at, posts.c.id,
+        ),
+    ).subquery()
+    newest = select(merged.c.id).order_by(merged.c.created_at.desc(), merged.c.id.desc()).limit(size)
+    return (
+        feed_select(viewer)
+        .where(Post.id.in_(newest))
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
+
+
+def _home_params(viewer_id: int, authors: list[int], limit: int, position) -> dict:
+    params = {"viewer": viewer_id, "size": limit + 1, "authors": authors}
+    if position is not None:
+        params["after_at"], params["after_id"] = position
+    return params
+
+
+def home_query(viewer_id: int, authors: list[int], limit: int = 20, position=None):
+    """SELECT for one page of a home timeline, `limit + 1` feed rows.
+
+    The ids come from one page of the viewer's stored entries and one page
+    of the posts of all authors read on demand, each a range scan of a
+    covering index; UNION drops posts found both ways. Feed rows are then
+    read for the newest `limit + 1` ids only.
+    """
+    stmt = _home_statement(position is not None)
+    return stmt.params(_home_params(viewer_id, authors, limit, position))
+
+
+def fetch_home_rows(viewer_id: int, limit: int = 20, position=None, *, max_followers: int):
+    """One page of the viewer's home timeline. Returns (rows, next_cursor)."""
+    authors = pulled_authors(viewer_id, max_followers)
+    rows = db.session.execute(
+        _home_statement(position is not None),
+        _home_params(viewer_id, authors, limit, position),
+    ).all()
+    return split_page(rows, limit)
+
+
+def trim_timelines(keep: int) -> int:
+    """Delete all but the `keep` newest entries of every timeline; returns the rows deleted."""
+    overfull = (
+        select(TimelineEntry.user_id)
+        .group_by(TimelineEntry.user_id)
+        .having(func.count() > keep)
+    )
+    ranked = (
+        select(
+            TimelineEntry.id,
+            func.row_number().over(
+                partition_by=TimelineEntry.user_id,
+                order_by=(TimelineEntry.created_at.desc(), TimelineEntry.post_id.desc()),
+            ).label("position"),
+        )
+        .where(TimelineEntry.user_id.in_(overfull))
+        .subquery()
+    )
+    result = db.session.execute(
+        delete(TimelineEntry).where(TimelineEntry.id.in_(select(ranked.c.id).where(ranked.c.position > keep)))
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,117 @@
+"""
+"Hot" ranking of feed posts.
+
+A post's hot score is
+
+    ln(1 + likes + 2 * comments + 2 * saves) + age_term(created_at)
+
+where age_term grows by ln(10) every HOT_DECAY_SECONDS since a fixed epoch.
+A post therefore needs ten times the engagement of one HOT_DECAY_SECONDS
+younger to rank alongside it: older posts decay relative to newer ones
+without any stored score ever having to be rewritten as time passes.
+
+Both parts live on the post row. `hot_base` (the age term) is fixed when the
+post is inserted; `hot_score` is recomputed from the counters in the same
+`UPDATE` counters.bump() issues for every like, save and comment, so it is
+always in step with them. The hot feed is then one range scan of
+ix_posts_hot_score_id.
+
+rebuild_hot_scores() recomputes every score from the stored counters; it
+runs after reconcile_counters() (which corrects counters without going
+through bump()) and after the weights change; rebuild_hot_scores(full=True)
+also recomputes hot_base, after HOT_DECAY_SECONDS changes.
+"""
+import math
+from datetime import datetime
+
+from sqlalchemy import bindparam, event, func, update
+
+from config import Config
+from database import db
+from models import Post
+
+EPOCH = datetime(2024, 1, 1)
+# Counter column -> weight: a comment or a save says more than a like
+WEIGHTS = {"like_count": 1.0, "comment_count": 2.0, "save_count": 2.0}
+
+
+def hot_base(created_at: datetime, decay_seconds: int | None = None) -> float:
+    """The age term of a post created at `created_at`."""
+    decay = decay_seconds or Config.HOT_DECAY_SECONDS
+    return (created_at - EPOCH).total_seconds() / decay * math.log(10)
+
+
+def hot_score(base: float, like_count: int = 0, comment_count: int = 0, save_count: int = 0) -> float:
+    """Python twin of score_expression(), for new rows and checks."""
+    counts = {"like_count": like_count, "comment_count": comment_count, "save_count": save_count}
+    return base + math.log(1 + sum(counts[k] * w for k, w in WEIGHTS.items()))
+
+
+def score_expression(table, deltas: dict | None = None):
+    """SQL hot score of a posts row after adding `deltas` to its counters.
+
+    UPDATE ... SET expressions read the row's old values, so a statement
+    that also bumps a counter passes the same delta here.
+    """
+    deltas = deltas or {}
+    engagement = sum((table.c[k] + deltas.get(k, 0)) * w for k, w in WEIGHTS.items())
+    return table.c.hot_base + func.ln(1 + engagement)
+
+
+@event.listens_for(Post, "before_insert")
+def _score_new_post(mapper, connection, target):
+    if target.created_at is None:
+        target.created_at = datetime.utcnow()
+    target.hot_base = hot_base(target.created_at)
+    target.hot_score = hot_score(
+        target.hot_base, target.like_count or 0, target.comment_count or 0, target.save_count or 0
+    )
+
+
+def backfill(conn, batch: int = 1000) -> int:
+    """Set hot_base and hot_score on every post (migration 9); returns the row count."""
+    table = Post.__table__
+    rows = conn.execute(table.select().with_only_columns(
+        table.c.id, table.c.created_at, table.c.like_count, table.c.comment_count, table.c.save_count,
+    )).all()
+    stmt = update(table).where(table.c.id == bindparam("post_id"))
+    for i in range(0, len(rows), batch):
+        values = []
+        for r in rows[i:i + batch]:
+            base = hot_base(r.created_at)
+            values.append({
+                "post_id": r.id,
+                "base": base,
+                "score": hot_score(base, r.like_count, r.comment_count, r.save_count),
+            })
+        conn.execute(stmt.values(hot_base=bindparam("base"), hot_score=bindparam("score")), values)
+    return len(rows)
+
+
+def rebuild_hot_scores(full: bool = False) -> int:
+    """Recompute hot_score from the counters; returns the number of rows that drifted.
+
+    `full` rewrites every post's hot_base and hot_score instead, which is
+    needed after HOT_DECAY_SECONDS changes, and returns the number of posts.
+    """
+    table = Post.__table__
+    if full:
+        n = backfill(db.session.connection())
+        db.session.commit()
+        return n
+    expected = score_expression(table)
+    result = db.session.execute(
+        update(table).where(func.abs(table.c.hot_score - expected) > 1e-9).values(hot_score=expected)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def install_sqlite_functions(engine) -> None:
+    """Register ln() on SQLite builds compiled without the math functions."""
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_conn, _record):
+        try:
+            dbapi_conn.execute("SELECT ln(1)")
+        except Exception:
+            dbapi_conn.create_function("ln", 1, math.log, deterministic=True)
@@ -0,0 +1,65 @@
+"""
+Conditional GET helpers.
+
+Routes compute a weak ETag (and optionally a Last-Modified time) from the
+rows they are about to return, then ask is_not_modified() before doing any
+serialization work. If the client's copy is current they answer an empty
+304; otherwise they build the response and decorate it with
+set_cache_headers().
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from flask import Response, request
+
+
+def weak_etag(*parts) -> str:
+    """Stable ETag value for the given parts (ids, timestamps, counters...)."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+
+
+def _http_time(dt: datetime | None) -> datetime | None:
+    # Stored timestamps are naive UTC; HTTP dates have one-second resolution.
+    if dt is None:
+        return None
+    return dt.replace(microsecond=0, tzinfo=dt.tzinfo or timezone.utc)
+
+
+def is_not_modified(etag: str, last_modified: datetime | None = None) -> bool:
+    """True if the request's validators say the client already has this version.
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    lm = _http_time(last_modified)
+    return since is not None and lm is not None and lm <= since
+
+
+def set_cache_headers(resp: Response, etag: str, last_modified: datetime | None = None, *,
+                      public: bool = True, max_age: int = 0, s_maxage: int = 0,
+                      vary: str | None = None) -> Response:
+    """Attach validators and Cache-Control to `resp`.
+
+    Public responses may be stored by shared caches (the CDN) for `s_maxage`
+    seconds; private ones must be revalidated by the browser every time.
+    """
+    resp.set_etag(etag, weak=True)
+    if last_modified is not None:
+        resp.last_modified = _http_time(last_modified)
+    if public:
+        resp.cache_control.public = True
+        resp.cache_control.max_age = max_age
+        if s_maxage:
+            resp.cache_control.s_maxage = s_maxage
+    else:
+        resp.cache_control.private = True
+        resp.cache_control.no_cache = True
+    if vary:
+        resp.vary.add(vary)
+    return resp
+
+
+def not_modified_response() -> Response:
+    return Response(status=304)
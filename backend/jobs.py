@@ -0,0 +1,254 @@
+"""
+Database-backed background jobs.
+
+Handlers are plain functions of a JSON payload, registered with @job:
+
+    @job("attachments.promote", max_attempts=8)
+    def promote(payload): ...
+
+enqueue() inserts the job row in the caller's transaction, so a job exists
+only if the request that created it committed, and a worker can never see
+it earlier. Passing `key` makes the enqueue idempotent: a second job with
+the same key is dropped (ON CONFLICT DO NOTHING).
+
+JobRunner claims due jobs one at a time (SELECT ... FOR UPDATE SKIP LOCKED
+on PostgreSQL, a guarded UPDATE ... RETURNING on SQLite), runs them and
+either marks them done or re-queues them with exponential backoff and
+jitter until max_attempts is reached. A job whose worker died is reclaimed
+once its lease expires, so delivery is at-least-once and handlers must be
+idempotent. Modes (JOB_MODE):
+
+  worker  only enqueue; `flask --app app jobs-worker` runs the jobs
+  thread  a daemon thread in each app process, woken on commit (development)
+  inline  run due jobs when the app context ends, i.e. before the response
+          is sent; for serverless deployments that cannot keep a worker
+"""
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple
+
+from sqlalchemy import and_, delete, event, insert, or_, select, update
+
+from database import db, insert_for
+from models import Job
+
+logger = logging.getLogger(__name__)
+
+
+class JobSpec(NamedTuple):
+    fn: Callable[[dict], None]
+    max_attempts: int
+
+
+JOBS: dict[str, JobSpec] = {}
+
+
+def job(kind: str, max_attempts: int = 5):
+    """Register a handler for jobs of `kind`."""
+    def decorator(fn):
+        JOBS[kind] = JobSpec(fn, max_attempts)
+        return fn
+    return decorator
+
+
+# Set on the committing thread when its transaction enqueued jobs
+_local = threading.local()
+_wake = threading.Event()
+
+
+def enqueue(kind: str, payload: dict | None = None, *, key: str | None = None,
+            delay: float = 0.0, session=None) -> None:
+    """Add a job to the current transaction; it can run once that commits."""
+    spec = JOBS[kind]
+    session = session or db.session
+    now = datetime.utcnow()
+    values = {
+        "kind": kind,
+        "payload": payload or {},
+        "idempotency_key": key,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": spec.max_attempts,
+        "run_at": now + timedelta(seconds=delay),
+        "created_at": now,
+    }
+    if key is None:
+        stmt = insert(Job).values(**values)
+    else:
+        stmt = insert_for(session, Job).values(**values).on_conflict_do_nothing(
+            index_elements=["idempotency_key"]
+        )
+    session.execute(stmt)
+    session.info["jobs_enqueued"] = True
+
+
+@event.listens_for(db.session, "after_commit")
+def _after_commit(session):
+    if session.info.pop("jobs_enqueued", False):
+        _local.pending = True
+        _wake.set()
+
+
+@event.listens_for(db.session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("jobs_enqueued", None)
+
+
+class JobRunner:
+    """Claims and runs due jobs for one Flask app."""
+
+    def __init__(self, app, mode: str = "thread", poll_interval: float = 1.0, lease: int = 300,
+                 backoff_base: float = 2.0, backoff_max: float = 600.0):
+        self.app = app
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"completed": 0, "retried": 0, "failed": 0}
+
+    def install(self) -> None:
+        if self.mode == "inline":
+            self.app.teardown_appcontext(self._run_inline)
+        elif self.mode == "thread":
+            self.app.before_request(self._ensure_thread)
+
+    # ---- claiming ----
+    def claim(self):
+        """Lock the next due job for this worker; returns its row or None."""
+        row = db.session.execute(self.claim_statement()).first()
+        db.session.commit()
+        return row
+
+    def claim_statement(self):
+        now = datetime.utcnow()
+        due = or_(
+            and_(Job.status == "queued", Job.run_at <= now),
+            and_(Job.status == "running", Job.locked_at < now - timedelta(seconds=self.lease)),
+        )
+        next_id = select(Job.id).where(due).order_by(Job.run_at, Job.id).limit(1)
+        if db.session.get_bind().dialect.name == "postgresql":
+            next_id = next_id.with_for_update(skip_locked=True)
+        return (
+            update(Job)
+            .where(Job.id == next_id.scalar_subquery(), due)
+            .values(status="running", locked_by=self.worker_id, locked_at=now, attempts=Job.attempts + 1)
+            .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+        )
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def execute(self, row) -> str:
+        """Run a claimed job and record the outcome; returns the new status."""
+        spec = JOBS.get(row.kind)
+        error = None
+        try:
+            if spec is None:
+                raise LookupError(f"No handler registered for job kind {row.kind!r}")
+            if row.attempts > row.max_attempts:
+                raise RuntimeError("Lease expired on the final attempt")
+            spec.fn(row.payload)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            error = f"{type(e).__name__}: {e}"
+            logger.warning("Job %s (%s) attempt %d failed: %s", row.id, row.kind, row.attempts, error)
+
+        now = datetime.utcnow()
+        if error is None:
+            status, values = "done", {"finished_at": now, "last_error": None}
+        elif spec is not None and row.attempts < row.max_attempts:
+            status, values = "queued", {"run_at": now + timedelta(seconds=self._backoff(row.attempts)),
+                                        "last_error": error}
+        else:
+            status, values = "failed", {"finished_at": now, "last_error": error}
+        # Guarded by locked_by: a worker whose lease expired must not
+        # overwrite the outcome of the one that reclaimed the job.
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == row.id, Job.locked_by == self.worker_id, Job.status == "running")
+            .values(status=status, locked_by=None, locked_at=None, **values)
+        )
+        db.session.commit()
+        if result.rowcount == 0:
+            logger.warning("Job %s (%s) was reclaimed by another worker", row.id, row.kind)
+            return "reclaimed"
+        key = {"done": "completed", "queued": "retried", "failed": "failed"}[status]
+        with self._lock:
+            self._stats[key] += 1
+        return status
+
+    def run_pending(self, limit: int | None = None) -> int:
+        """Run due jobs until none are left (or `limit` ran). Needs an app context."""
+        ran = 0
+        while limit is None or ran < limit:
+            row = self.claim()
+            if row is None:
+                break
+            self.execute(row)
+            ran += 1
+        return ran
+
+    # ---- modes ----
+    def _run_inline(self, exc):
+        if not getattr(_local, "pending", False):
+            return
+        _local.pending = False
+        try:
+            db.session.rollback()  # anything the request left uncommitted is discarded anyway
+            self.run_pending()
+        except Exception:
+            logger.exception("Inline job run failed")
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._thread_main, name="job-runner", daemon=True)
+                self._thread.start()
+
+    def _thread_main(self):
+        while True:
+            _wake.wait(self.poll_interval)
+            _wake.clear()
+            try:
+                with self.app.app_context():
+                    self.run_pending()
+            except Exception:
+                logger.exception("Job runner loop failed")
+
+    def work_forever(self, stop: threading.Event | None = None) -> None:
+        """Worker loop for `flask jobs-worker`: drain, then poll."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                ran = self.run_pending()
+            except Exception:
+                logger.exception("Job worker loop failed")
+                db.session.rollback()
+                ran = 0
+            finally:
+                db.session.remove()
+            if not ran:
+                stop.wait(self.poll_interval)
+
+    def prune(self, older_than_days: int) -> int:
+        """Delete finished jobs older than the retention period."""
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        result = db.session.execute(delete(Job).where(Job.status == "done", Job.finished_at < cutoff))
+        db.session.commit()
+        return result.rowcount
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"mode": self.mode, **self._stats}
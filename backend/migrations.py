@@ -0,0 +1,191 @@
+"""
+Versioned schema migrations.
+
+Each migration is a function of an open connection, registered in order
+with @migration. upgrade() applies the ones not yet recorded in the
+schema_migrations table, inside one transaction (serialized across
+processes with an advisory lock on PostgreSQL). On a fresh database the
+baseline creates every table from the current models, so later migrations
+must be no-ops against that schema (IF NOT EXISTS, column checks).
+
+ensure_schema() is the process-wide latch used by the app: the first call
+runs upgrade(), every later call is a flag check, so request handlers never
+issue DDL or catalog queries. Deployments that prefer to migrate out of
+band run `flask --app app db-upgrade` and set SCHEMA_BOOTSTRAP=off.
+"""
+import threading
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import inspect, text
+
+from database import db
+from hot import backfill as backfill_hot_scores
+from search import install as install_search
+
+MIGRATIONS: list[tuple[int, str, Callable]] = []
+
+# Arbitrary constant identifying our advisory lock on PostgreSQL.
+_PG_LOCK_ID = 0x51_06_11_3E
+
+
+def migration(version: int, name: str):
+    """Register a migration function under a strictly increasing version."""
+    def decorator(fn):
+        assert not MIGRATIONS or version > MIGRATIONS[-1][0], "migration versions must increase"
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return decorator
+
+
+def _has_column(conn, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+@migration(1, "baseline tables")
+def _baseline(conn):
+    db.metadata.create_all(conn)
+
+
+@migration(2, "denormalized counters")
+def _counters(conn):
+    # Tables created by the baseline already have the columns; databases that
+    # predate the counters get them added and backfilled here.
+    added = False
+    for table, columns in {
+        "posts": ("like_count", "comment_count", "save_count"),
+        "reports": ("message_count",),
+    }.items():
+        for column in columns:
+            if not _has_column(conn, table, column):
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+                added = True
+    if added:
+        for table, column, child, fk in (
+            ("posts", "like_count", "likes", "post_id"),
+            ("posts", "comment_count", "comments", "post_id"),
+            ("posts", "save_count", "saves", "post_id"),
+            ("reports", "message_count", "messages", "report_id"),
+        ):
+            conn.execute(text(
+                f"UPDATE {table} SET {column} = "
+                f"(SELECT COUNT(*) FROM {child} WHERE {child}.{fk} = {table}.id)"
+            ))
+
+
+@migration(3, "keyset pagination indexes")
+def _keyset_indexes(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_created_at_id ON posts (created_at, id)"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_reports_status_created_at_id ON reports (status, created_at, id)"
+    ))
+
+
+@migration(4, "foreign key and thread indexes")
+def _secondary_indexes(conn):
+    for name, table, columns in (
+        ("ix_messages_report_id_created_at", "messages", "report_id, created_at"),
+        ("ix_comments_post_id", "comments", "post_id"),
+        ("ix_comments_user_id", "comments", "user_id"),
+        ("ix_likes_user_id", "likes", "user_id"),
+        ("ix_saves_user_id", "saves", "user_id"),
+        ("ix_posts_user_id", "posts", "user_id"),
+    ):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+@migration(5, "report attachments")
+def _attachments(conn):
+    db.metadata.tables["attachments"].create(conn, checkfirst=True)
+
+
+@migration(6, "background jobs")
+def _jobs(conn):
+    db.metadata.tables["jobs"].create(conn, checkfirst=True)
+
+
+@migration(7, "post image variants")
+def _post_images(conn):
+    if not _has_column(conn, "posts", "image_variants"):
+        conn.execute(text("ALTER TABLE posts ADD COLUMN image_variants JSON"))
+    if not _has_column(conn, "posts", "image_status"):
+        conn.execute(text("ALTER TABLE posts ADD COLUMN image_status VARCHAR(16) NOT NULL DEFAULT 'ready'"))
+    db.metadata.tables["media"].create(conn, checkfirst=True)
+
+
+@migration(8, "report full-text search")
+def _report_search(conn):
+    install_search(conn)
+
+
+@migration(9, "hot feed scores")
+def _hot_scores(conn):
+    for column in ("hot_base", "hot_score"):
+        if not _has_column(conn, "posts", column):
+            conn.execute(text(f"ALTER TABLE posts ADD COLUMN {column} FLOAT NOT NULL DEFAULT 0"))
+    backfill_hot_scores(conn)
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_hot_score_id ON posts (hot_score, id)"))
+
+
+@migration(10, "follows and home timelines")
+def _home_timelines(conn):
+    if not _has_column(conn, "users", "follower_count"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN follower_count INTEGER NOT NULL DEFAULT 0"))
+    db.metadata.tables["follows"].create(conn, checkfirst=True)
+    db.metadata.tables["timeline_entries"].create(conn, checkfirst=True)
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_posts_user_id_created_at_id ON posts (user_id, created_at, id)"
+    ))
+
+
+@migration(11, "post image sources")
+def _image_sources(conn):
+    db.metadata.tables["image_sources"].create(conn, checkfirst=True)
+
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table("schema_migrations"):
+        return 0
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def upgrade(engine) -> list[str]:
+    """Apply pending migrations. Returns the names of those applied."""
+    applied = []
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _PG_LOCK_ID})
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+        done = current_version(conn)
+        for version, name, fn in MIGRATIONS:
+            if version <= done:
+                continue
+            fn(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.utcnow()},
+            )
+            applied.append(f"{version:04d} {name}")
+    return applied
+
+
+_ready_urls: set[str] = set()
+_schema_lock = threading.Lock()
+
+
+def ensure_schema(engine) -> None:
+    """Run upgrade() once per process and database; later calls return immediately."""
+    url = str(engine.url)
+    if url in _ready_urls:
+        return
+    with _schema_lock:
+        if url not in _ready_urls:
+            upgrade(engine)
+            _ready_urls.add(url)
+
+
+def schema_ready(engine) -> bool:
+    return str(engine.url) in _ready_urls
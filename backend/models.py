@@ -13,8 +13,16 @@ class Report(db.Model):
     status = db.Column(db.String(20), default="open", nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Denormalized counter, maintained by counters.py
+    message_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
 
     messages = db.relationship("Message", backref="report", cascade="all, delete-orphan", order_by="Message.created_at")
+    attachments = db.relationship("Attachment", backref="report", cascade="all, delete-orphan", order_by="Attachment.id")
+
+    __table_args__ = (
+        # Keyset pagination of the public feed: WHERE status = ? ORDER BY created_at, id
+        db.Index("ix_reports_status_created_at_id", "status", "created_at", "id"),
+    )
 
 class Message(db.Model):
     __tablename__ = "messages"
@@ -24,6 +32,27 @@ class Message(db.Model):
     author = db.Column(db.String(32), default="user", nullable=False)  # "user" | "staff"
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        # Report thread: WHERE report_id = ? ORDER BY created_at
+        db.Index("ix_messages_report_id_created_at", "report_id", "created_at"),
+    )
+
+class Attachment(db.Model):
+    """Evidence file of a report; the bytes live in the content store (uploads.py)."""
+    __tablename__ = "attachments"
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(db.Integer, db.ForeignKey("reports.id", ondelete="CASCADE"), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # The same file attached twice to one report is stored once
+        db.UniqueConstraint("report_id", "sha256", name="uq_attachment_report_sha256"),
+    )
+
 
 # ---- Social feed models to support frontend Main page ----
 
@@ -36,6 +65,9 @@ class User(db.Model):
     avatar_url = db.Column(db.String(512), nullable=True)
     verified = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Denormalized counter, maintained by counters.py; home.py reads it to
+    # choose between fan-out on write and on read
+    follower_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
 
     posts = db.relationship("Post", backref="author", cascade="all, delete-orphan")
 
@@ -43,21 +75,41 @@ class User(db.Model):
 class Post(db.Model):
     __tablename__ = "posts"
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     image_url = db.Column(db.String(1024), nullable=False)
+    # Uploaded images: {"webp": {"320": url, ...}, "jpeg": {...}}, filled in by
+    # the images.process_post job; None for posts that link an external image
+    image_variants = db.Column(db.JSON, nullable=True)
+    image_status = db.Column(db.String(16), default="ready", server_default="ready", nullable=False)  # processing | ready | failed
     caption = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Denormalized counters, maintained by counters.py
+    like_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    comment_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    save_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    # Hot ranking, maintained by hot.py: the age term and the full score
+    hot_base = db.Column(db.Float, default=0.0, server_default="0", nullable=False)
+    hot_score = db.Column(db.Float, default=0.0, server_default="0", nullable=False)
 
     comments = db.relationship("Comment", backref="post", cascade="all, delete-orphan")
     likes = db.relationship("Like", backref="post", cascade="all, delete-orphan")
     saves = db.relationship("Save", backref="post", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination of the feed: ORDER BY created_at, id
+        db.Index("ix_posts_created_at_id", "created_at", "id"),
+        # Hot feed: ORDER BY hot_score, id
+        db.Index("ix_posts_hot_score_id", "hot_score", "id"),
+        # One author's posts, newest first (home timelines read on demand)
+        db.Index("ix_posts_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
 
 class Comment(db.Model):
     __tablename__ = "comments"
     id = db.Column(db.Integer, primary_key=True)
-    post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     body = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
@@ -67,8 +119,9 @@ class Comment(db.Model):
 class Like(db.Model):
     __tablename__ = "likes"
     id = db.Column(db.Integer, primary_key=True)
+    # post_id lookups use the (post_id, user_id) unique constraint's index
     post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     __table_args__ = (
@@ -79,10 +132,90 @@ class Like(db.Model):
 class Save(db.Model):
     __tablename__ = "saves"
     id = db.Column(db.Integer, primary_key=True)
+    # post_id lookups use the (post_id, user_id) unique constraint's index
     post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     __table_args__ = (
         db.UniqueConstraint("post_id", "user_id", name="uq_save_post_user"),
     )
+
+
+class Follow(db.Model):
+    __tablename__ = "follows"
+    id = db.Column(db.Integer, primary_key=True)
+    # follower_id lookups use the (follower_id, followee_id) unique constraint's index
+    follower_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    followee_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("follower_id", "followee_id", name="uq_follow_follower_followee"),
+        # Fan-out: the followers of an author
+        db.Index("ix_follows_followee_id_follower_id", "followee_id", "follower_id"),
+    )
+
+
+class TimelineEntry(db.Model):
+    """A post delivered to a follower's home timeline (home.py)."""
+    __tablename__ = "timeline_entries"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True)
+    author_id = db.Column(db.Integer, nullable=False)
+    # The post's created_at, so a page never has to read posts to be ordered
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "post_id", name="uq_timeline_user_post"),
+        # Keyset pagination of one home timeline: ORDER BY created_at, post_id
+        db.Index("ix_timeline_entries_user_id_created_at_post_id", "user_id", "created_at", "post_id"),
+    )
+
+
+class Media(db.Model):
+    """Publicly servable blob (feed image variants), keyed by content hash."""
+    __tablename__ = "media"
+    sha256 = db.Column(db.String(64), primary_key=True)
+    content_type = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    width = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ImageSource(db.Model):
+    """Variants built from an uploaded post image, keyed by the upload's hash.
+
+    The original is deleted once processed, so a later post with the same
+    bytes reuses these instead of reprocessing.
+    """
+    __tablename__ = "image_sources"
+    sha256 = db.Column(db.String(64), primary_key=True)
+    variants = db.Column(db.JSON, nullable=True)  # format -> width -> URL; None if the image was rejected
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+# ---- Background jobs (jobs.py) ----
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    # Enqueueing twice with the same key is a no-op
+    idempotency_key = db.Column(db.String(200), unique=True, nullable=True)
+    status = db.Column(db.String(16), default="queued", nullable=False)  # queued | running | done | failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = db.Column(db.String(120), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # Claiming: WHERE status = ? AND run_at <= ? ORDER BY run_at, id
+        db.Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
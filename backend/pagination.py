@@ -0,0 +1,84 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are ordered by (created_at DESC, id DESC) and the cursor encodes the
+last row of the previous page, so every page is an index range scan that
+costs the same no matter how deep the client has scrolled.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplies a cursor we did not issue."""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode the (created_at, id) position of a row as an opaque string."""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor()."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def encode_rank_cursor(rank: float, row_id: int) -> str:
+    """Cursor for pages ordered by a computed score, such as search relevance."""
+    raw = json.dumps([rank, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, int]:
+    """Decode a cursor produced by encode_rank_cursor()."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(rank), int(row_id)
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def parse_page_args(args, default_size: int, max_size: int) -> tuple[tuple[datetime, int] | None, int]:
+    """Read `cursor` and `limit` from request args.
+
+    Returns (position, page_size) where position is None for the first page.
+    """
+    try:
+        size = int(args.get("limit", default_size))
+    except (TypeError, ValueError):
+        size = default_size
+    size = max(1, min(size, max_size))
+
+    cursor = args.get("cursor")
+    position = decode_cursor(cursor) if cursor else None
+    return position, size
+
+
+def keyset_page(stmt, created_col, id_col, position, size):
+    """Apply keyset ordering, the `position` bound and a size+1 limit to `stmt`.
+
+    Fetching one extra row tells us whether a next page exists without a COUNT.
+    """
+    if position is not None:
+        stmt = stmt.where(tuple_(created_col, id_col) < tuple_(*position))
+    return stmt.order_by(created_col.desc(), id_col.desc()).limit(size + 1)
+
+
+def split_page(rows, size, key=lambda r: (r.created_at, r.id), encode=encode_cursor):
+    """Trim the look-ahead row and build the next cursor, if any."""
+    rows = list(rows)
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    return rows, encode(*key(rows[-1]))
@@ -0,0 +1,113 @@
+"""
+Idempotent like/save/follow writes.
+
+Each action is a single race-free write statement - INSERT ... ON CONFLICT
+DO NOTHING RETURNING or DELETE ... RETURNING - followed, in the same
+transaction, by the counter bump when a row actually changed. Concurrent
+double-taps therefore never hit uq_like_post_user / uq_save_post_user.
+
+The statements are built with the SQLite or PostgreSQL dialect insert(),
+chosen from the session's bind (database.insert_for).
+"""
+from sqlalchemy import select, delete, literal
+
+from database import db, insert_for
+from models import Post, User, Follow
+from counters import COUNTERS, bump
+
+
+def _count(model, post_id: int) -> int | None:
+    """Current counter for `model` on the post, or None if the post does not exist."""
+    _, _, counter = COUNTERS[model]
+    return db.session.execute(select(counter).where(Post.id == post_id)).scalar()
+
+
+def _add(model, post_id: int, user_id: int) -> bool:
+    # INSERT ... SELECT from posts so a missing post simply inserts nothing.
+    stmt = (
+        insert_for(db.session, model)
+        .from_select(
+            ["post_id", "user_id"],
+            select(Post.id, literal(user_id)).where(Post.id == post_id),
+        )
+        .on_conflict_do_nothing(index_elements=["post_id", "user_id"])
+        .returning(model.id)
+    )
+    inserted = db.session.execute(stmt).first() is not None
+    if inserted:
+        bump(db.session.connection(), model, post_id, 1)
+    return inserted
+
+
+def _remove(model, post_id: int, user_id: int) -> bool:
+    stmt = (
+        delete(model)
+        .where(model.post_id == post_id, model.user_id == user_id)
+        .returning(model.id)
+    )
+    deleted = db.session.execute(stmt).first() is not None
+    if deleted:
+        bump(db.session.connection(), model, post_id, -1)
+    return deleted
+
+
+def set_reaction(model, post_id: int, user_id: int, on: bool) -> int | None:
+    """Idempotently add (on=True) or remove the user's Like/Save on a post.
+
+    Commits and returns the post's updated counter, or None if the post does
+    not exist.
+    """
+    if on:
+        _add(model, post_id, user_id)
+    else:
+        _remove(model, post_id, user_id)
+    count = _count(model, post_id)
+    db.session.commit()
+    return count
+
+
+def toggle_reaction(model, post_id: int, user_id: int) -> tuple[bool, int | None]:
+    """Flip the user's Like/Save on a post without a read-then-write.
+
+    Returns (is_on, counter); counter is None if the post does not exist.
+    """
+    if _remove(model, post_id, user_id):
+        on = False
+    else:
+        # Either we inserted it, or a concurrent request did: both mean "on".
+        _add(model, post_id, user_id)
+        on = True
+    count = _count(model, post_id)
+    db.session.commit()
+    return on, count
+
+
+
+def set_follow(follower_id: int, followee_id: int, on: bool) -> tuple[bool, int | None]:
+    """Idempotently follow (on=True) or unfollow a user.
+
+    Returns (changed, followee's follower count); the count is None if the
+    user does not exist. Does not commit: home.follow() updates the
+    follower's timeline in the same transaction.
+    """
+    if on:
+        stmt = (
+            insert_for(db.session, Follow)
+            .from_select(
+                ["follower_id", "followee_id"],
+                select(literal(follower_id), User.id).where(User.id == followee_id),
+            )
+            .on_conflict_do_nothing(index_elements=["follower_id", "followee_id"])
+            .returning(Follow.id)
+        )
+    else:
+        stmt = (
+            delete(Follow)
+            .where(Follow.follower_id == follower_id, Follow.followee_id == followee_id)
+            .returning(Follow.id)
+        )
+    changed = db.session.execute(stmt).first() is not None
+    if changed:
+        bump(db.session.connection(), Follow, followee_id, 1 if on else -1)
+    count = db.session.execute(select(User.follower_count).where(User.id == followee_id)).scalar()
+    return changed, count
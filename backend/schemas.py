@@ -18,6 +18,15 @@ class MessageCreateSchema(Schema):
         validate=validate.Length(min=1)
     )
 
+class AttachmentUploadSchema(Schema):
+    """Direct-to-storage upload: announced before, confirmed after the PUT."""
+    filename = fields.Str(required=True, validate=validate.Length(min=1, max=255))
+    sha256 = fields.Str(required=True, validate=validate.Regexp(r"^[0-9a-f]{64}$"))
+    size = fields.Int(required=True, validate=validate.Range(min=1))
+    content_type = fields.Str(required=False, allow_none=True, validate=validate.Length(max=255))
+    # Returned by presign, required by complete
+    upload_token = fields.Str(required=False)
+
 class MessagePublicSchema(Schema):
     id = fields.Int()
     body = fields.Str()
@@ -69,6 +78,8 @@ class CommentPublicSchema(Schema):
 class PostPublicSchema(Schema):
     id = fields.Int()
     image_url = fields.Str()
+    image_status = fields.Str()
+    image_variants = fields.Dict(keys=fields.Str(), values=fields.Str(), allow_none=True)
     caption = fields.Str(allow_none=True)
     created_at = fields.DateTime()
     author = fields.Nested(UserPublicSchema)
@@ -78,3 +89,16 @@ class PostPublicSchema(Schema):
     liked = fields.Bool()
     # Optional preview of comments
     comments = fields.List(fields.Nested(CommentPublicSchema))
+
+
+# ---- Schema Singletons ----
+# Schemas are stateless once built; share one instance instead of
+# constructing a new one per request.
+report_create_schema = ReportCreateSchema()
+message_create_schema = MessageCreateSchema()
+attachment_upload_schema = AttachmentUploadSchema()
+report_public_schema = ReportPublicSchema()
+register_schema = RegisterSchema()
+login_schema = LoginSchema()
+user_public_schema = UserPublicSchema()
+comment_public_schema = CommentPublicSchema()
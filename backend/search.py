@@ -0,0 +1,148 @@
+"""
+Full-text search over public reports.
+
+Each dialect gets its own index, created by migration 8 (install()):
+
+  SQLite      an FTS5 table `reports_fts` over reports.title and body
+              (external content, so the text is not stored twice), kept in
+              sync by insert/update/delete triggers; ranked with bm25().
+  PostgreSQL  a generated `reports.search_vector` tsvector (title weighted
+              above body) with a GIN index limited to open reports; ranked
+              with ts_rank_cd().
+
+Only title and body are indexed. Report messages are private to whoever
+holds the ticket's access code, so they are never searchable publicly.
+
+search_statement() returns (Report, rank) rows where a lower rank is a
+better match, so both sort orders are keyset paginated: (rank, id) for
+relevance, (created_at, id) for recency. Report ids grow with created_at,
+so recency is served as id order, which FTS5 walks backwards from its
+index and stops after one page instead of sorting every match.
+
+Scoring is the expensive part for a very common word (every match is
+scored to find the top page), so relevance only ranks the `window` newest
+matches; rarer queries have fewer matches than that and are ranked fully.
+"""
+import re
+
+from sqlalchemy import and_, func, literal_column, or_, select, table, column, text
+
+from models import Report
+
+# Statuses whose reports are public (matches get_public_reports)
+PUBLIC_STATUSES = ("open",)
+SORTS = ("relevance", "recent")
+MAX_TERMS = 8
+MIN_TERM_LENGTH = 2
+
+# Title matches weigh this much more than body matches in bm25()
+_TITLE_WEIGHT = 10.0
+
+_fts = table("reports_fts", column("rowid"))
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchError(ValueError):
+    """The query cannot be searched (no usable terms)."""
+
+
+def install(conn) -> None:
+    """Create the dialect's search index and fill it from existing reports."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(
+            "ALTER TABLE reports ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(body, '')), 'B')) STORED"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_reports_search_vector ON reports "
+            "USING GIN (search_vector) WHERE status = 'open'"
+        ))
+        return
+
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5("
+        "title, body, content='reports', content_rowid='id', "
+        "tokenize='porter unicode61 remove_diacritics 2')"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS reports_fts_ai AFTER INSERT ON reports BEGIN "
+        "INSERT INTO reports_fts (rowid, title, body) VALUES (new.id, new.title, new.body); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS reports_fts_ad AFTER DELETE ON reports BEGIN "
+        "INSERT INTO reports_fts (reports_fts, rowid, title, body) "
+        "VALUES ('delete', old.id, old.title, old.body); END"
+    ))
+    # Only text edits touch the index, not status/counter/updated_at writes
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS reports_fts_au AFTER UPDATE OF title, body ON reports BEGIN "
+        "INSERT INTO reports_fts (reports_fts, rowid, title, body) "
+        "VALUES ('delete', old.id, old.title, old.body); "
+        "INSERT INTO reports_fts (rowid, title, body) VALUES (new.id, new.title, new.body); END"
+    ))
+    conn.execute(text("INSERT INTO reports_fts (reports_fts) VALUES ('rebuild')"))
+
+
+def terms(query: str) -> list[str]:
+    """Words of a free-text query; raises SearchError if none are usable."""
+    words = [w for w in _TERM.findall(query.lower()) if len(w) >= MIN_TERM_LENGTH][:MAX_TERMS]
+    if not words:
+        raise SearchError(f"Search needs at least one word of {MIN_TERM_LENGTH}+ characters")
+    return words
+
+
+def _fts5_match(words: list[str]) -> str:
+    # Every word must appear; the last one may be a prefix (search as you type).
+    # Quoting makes FTS5 operators in user input plain text.
+    quoted = [f'"{w}"' for w in words]
+    quoted[-1] += "*"
+    return " AND ".join(quoted)
+
+
+def search_statement(dialect: str, query: str, *, category: str | None = None, status: str = "open",
+                     sort: str = "relevance", position=None, size: int = 20, window: int = 0):
+    """SELECT (Report, rank) for one page of matches, size+1 rows for split_page().
+
+    `position` is the (rank, id) or (created_at, id) of the previous page's
+    last row, depending on `sort`. `window` > 0 limits relevance ranking to
+    that many of the newest matches.
+    """
+    words = terms(query)
+    if status not in PUBLIC_STATUSES:
+        raise SearchError(f"Only {', '.join(PUBLIC_STATUSES)} reports are searchable")
+    if sort not in SORTS:
+        raise SearchError(f"sort must be one of {', '.join(SORTS)}")
+
+    if dialect == "postgresql":
+        vector = literal_column("reports.search_vector")
+        # Config as SQL text: a bound REGCONFIG cannot be rendered by check_indexes.py
+        tsquery = func.websearch_to_tsquery(literal_column("'english'"), " ".join(words))
+        matches = vector.op("@@")(tsquery)
+        rank = (-func.ts_rank_cd(vector, tsquery)).label("rank")
+        stmt = select(Report, rank).where(matches)
+        row_id, candidates = Report.id, select(Report.id).where(matches, Report.status == status)
+    else:
+        matches = literal_column("reports_fts").op("MATCH")(_fts5_match(words))
+        rank = func.bm25(literal_column("reports_fts"), _TITLE_WEIGHT, 1.0).label("rank")
+        stmt = select(Report, rank).join_from(_fts, Report, Report.id == _fts.c.rowid).where(matches)
+        # Constraints on the FTS rowid are answered by the full-text index itself
+        row_id, candidates = _fts.c.rowid, select(_fts.c.rowid).where(matches)
+
+    stmt = stmt.where(Report.status == status)
+    if category:
+        stmt = stmt.where(Report.category == category)
+
+    if sort == "recent":
+        if position is not None:
+            stmt = stmt.where(row_id < position[1])
+        return stmt.order_by(row_id.desc()).limit(size + 1)
+
+    if window > 0:
+        newest = candidates.order_by(row_id.desc()).limit(window).subquery()
+        stmt = stmt.where(row_id >= select(func.min(newest.c[0])).scalar_subquery())
+    rank_expr = rank.element
+    if position is not None:
+        after_rank, after_id = position
+        stmt = stmt.where(or_(rank_expr > after_rank, and_(rank_expr == after_rank, Report.id < after_id)))
+    return stmt.order_by(rank_expr, Report.id.desc()).limit(size + 1)
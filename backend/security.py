@@ -1,8 +1,10 @@
-import os, secrets, string
-from passlib.hash import argon2
+import os, secrets, string, hmac, hashlib, time
+from functools import lru_cache
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 from flask import current_app
 
+from cache import TTLCache
+
 # ---- Constants ----
 TICKET_ALPHABET = string.ascii_uppercase + string.digits
 CODE_ALPHABET = string.ascii_letters + string.digits
@@ -16,17 +18,127 @@ def gen_access_code(length: int = 20) -> str:
     """Generate a secure access code."""
     return "".join(secrets.choice(CODE_ALPHABET) for _ in range(length))
 
-def hash_code(raw: str) -> str:
-    """Hash a code using Argon2."""
-    return argon2.hash(raw)
+# ---- Argon2 Cost Profiles ----
+# (time_cost, memory_cost in KiB, parallelism). "default" matches passlib's
+# defaults, i.e. what every hash stored before profiles existed was made with.
+ARGON2_PROFILES = {
+    "serverless": (2, 19456, 1),
+    "default": (3, 65536, 4),
+    "strong": (4, 131072, 4),
+}
+
+def argon2_params(profile: str = "default", time_cost: int | None = None,
+                  memory_cost: int | None = None, parallelism: int | None = None) -> tuple[int, int, int]:
+    """Resolve a named profile plus optional per-parameter overrides."""
+    if profile not in ARGON2_PROFILES:
+        raise ValueError(f"Unknown ARGON2_PROFILE {profile!r}; choose from {', '.join(ARGON2_PROFILES)}")
+    t, m, p = ARGON2_PROFILES[profile]
+    return (time_cost or t, memory_cost or m, parallelism or p)
+
+def _argon2_handler():
+    # passlib + argon2-cffi are imported on first use so that routes which
+    # never touch access codes don't pay for them on a cold start.
+    from passlib.hash import argon2
+    return argon2
+
+@lru_cache(maxsize=8)
+def _argon2(params: tuple[int, int, int] | None):
+    argon2 = _argon2_handler()
+    if params is None:
+        return argon2
+    t, m, p = params
+    return argon2.using(rounds=t, memory_cost=m, parallelism=p)
+
+def hash_code(raw: str, params: tuple[int, int, int] | None = None) -> str:
+    """Hash a code using Argon2 with the given (time, memory, parallelism) cost."""
+    return _argon2(params).hash(raw)
 
 def verify_code(raw: str, hashed: str) -> bool:
     """Verify a raw code against its hash."""
     try:
-        return argon2.verify(raw, hashed)
+        return _argon2_handler().verify(raw, hashed)
     except Exception:
         return False
 
+def verify_and_update_code(raw: str, hashed: str,
+                           params: tuple[int, int, int] | None = None) -> tuple[bool, str | None]:
+    """
+    Verify a raw code and, if it matches but `hashed` was made with a
+    different cost than `params`, return a fresh hash to store in its place.
+    Returns (ok, new_hash_or_None).
+    """
+    if not verify_code(raw, hashed):
+        return False, None
+    hasher = _argon2(params)
+    if hasher.needs_update(hashed):
+        return True, hasher.hash(raw)
+    return True, None
+
+def calibrate_argon2(target_ms: float, parallelism: int = 1,
+                     memory_costs=(19456, 32768, 65536, 131072, 262144), max_time_cost: int = 10) -> dict:
+    """
+    Measure Argon2 hash time on this machine and recommend the strongest
+    parameters (most memory, then most passes) that stay within `target_ms`.
+    Returns {"recommended": (t, m, p) | None, "measurements": [...]}.
+    """
+    measurements = []
+    best = None
+    for m in memory_costs:
+        for t in range(1, max_time_cost + 1):
+            hasher = _argon2_handler().using(rounds=t, memory_cost=m, parallelism=parallelism)
+            started = time.perf_counter()
+            hasher.hash("calibration")
+            took = (time.perf_counter() - started) * 1000
+            measurements.append({"time_cost": t, "memory_cost": m, "parallelism": parallelism, "ms": round(took, 1)})
+            if took > target_ms:
+                break
+            best = (t, m, parallelism)
+        if t == 1 and took > target_ms:
+            # Even a single pass at this memory size is too slow; larger sizes will be too.
+            break
+    return {"recommended": best, "measurements": measurements}
+
+# ---- Password Hashing ----
+@lru_cache(maxsize=8)
+def _password_method(method: str) -> str:
+    """werkzeug's full method string for `method`, defaults filled in
+    ("scrypt" -> "scrypt:32768:8:1"). Costs one hash, once per method."""
+    from werkzeug.security import generate_password_hash
+    return generate_password_hash("", method, salt_length=1).split("$", 1)[0]
+
+def password_needs_rehash(stored: str, method: str) -> bool:
+    """True if a werkzeug password hash ("method$salt$hash") was not made
+    with exactly `method`, parameters included."""
+    return stored.split("$", 1)[0] != _password_method(method)
+
+# ---- Verified Code Cache ----
+class CodeVerificationCache:
+    """
+    Bounded in-process cache of successful access-code checks.
+
+    Keys are (ticket, HMAC-SHA256(secret, code)) so raw codes are never kept
+    in memory. Entries expire after `ttl` seconds and the least recently used
+    entry is evicted once `maxsize` is reached. Only successes are cached, so
+    a wrong code always pays the full Argon2 verify.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize, ttl)
+
+    @staticmethod
+    def _key(ticket: str, code: str, secret: str) -> tuple[str, str]:
+        digest = hmac.new(secret.encode(), code.encode(), hashlib.sha256).hexdigest()
+        return ticket, digest
+
+    def contains(self, ticket: str, code: str, secret: str) -> bool:
+        return self._cache.get(self._key(ticket, code, secret), False)
+
+    def add(self, ticket: str, code: str, secret: str) -> None:
+        self._cache.set(self._key(ticket, code, secret), True)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
 # ---- Token Utilities ----
 def get_serializer() -> URLSafeTimedSerializer:
     """Return a configured serializer for issuing/verifying tokens.
@@ -40,6 +152,11 @@ def get_serializer() -> URLSafeTimedSerializer:
     except RuntimeError:
         # If called outside an app context, fall back to environment var.
         secret_key = os.getenv("SECRET_KEY")
+    return _serializer(secret_key)
+
+@lru_cache(maxsize=4)
+def _serializer(secret_key: str) -> URLSafeTimedSerializer:
+    # Built once per secret key (i.e. once per app) rather than per token.
     return URLSafeTimedSerializer(secret_key, salt="session")
 
 def issue_token(payload: dict) -> str:
@@ -61,3 +178,39 @@ def verify_token(token: str, max_age: int = 60*60*24*30) -> dict | None:
         return data
     except (BadSignature, SignatureExpired):
         return None
+
+# ---- Report Access Tokens ----
+REPORT_TOKEN_SCOPE = "report"
+
+def issue_report_token(ticket: str) -> str:
+    """
+    Issue a short-lived token scoped to a single report.
+    Handed out after one successful access-code check so later requests
+    can skip Argon2 verification.
+    """
+    return issue_token({"scope": REPORT_TOKEN_SCOPE, "ticket": ticket})
+
+def verify_report_token(token: str, ticket: str, max_age: int) -> bool:
+    """Check that `token` is a valid, unexpired report token for `ticket`."""
+    data = verify_token(token, max_age=max_age)
+    return bool(data) and data.get("scope") == REPORT_TOKEN_SCOPE and data.get("ticket") == ticket
+
+# ---- Direct Upload Tokens ----
+UPLOAD_TOKEN_SCOPE = "upload"
+
+def issue_upload_token(ticket: str, sha256: str, size: int, staged: str) -> str:
+    """
+    Issue a token naming the staging key a presigned upload for `ticket`
+    goes to. Only the holder of that token can complete the upload, so a
+    file is never attached on the strength of its hash alone.
+    """
+    return issue_token({"scope": UPLOAD_TOKEN_SCOPE, "ticket": ticket, "sha256": sha256,
+                        "size": size, "staged": staged})
+
+def verify_upload_token(token: str, ticket: str, sha256: str, size: int, max_age: int) -> str | None:
+    """Return the staging key of a valid upload token for this file and report, else None."""
+    data = verify_token(token, max_age=max_age) if token else None
+    if (not data or data.get("scope") != UPLOAD_TOKEN_SCOPE or data.get("ticket") != ticket
+            or data.get("sha256") != sha256 or data.get("size") != size):
+        return None
+    return data.get("staged")
@@ -0,0 +1,131 @@
+"""
+Fast-path response serialization.
+
+Hand-written equivalents of the public marshmallow schemas in schemas.py,
+plus the orjson-backed Flask JSON provider. Kept apart from schemas.py so
+the hot read paths never import marshmallow.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+from images import srcset
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see requirements.txt
+    orjson = None
+
+
+# ---- Fast-path Dumpers ----
+# They accept ORM objects or SQL result rows (anything with the attributes)
+# and produce the same JSON-ready dicts as the public schemas, without
+# marshmallow's per-field dispatch.
+def _iso(dt):
+    return dt.isoformat() if dt is not None else None
+
+def dump_user(u) -> dict:
+    return {
+        "id": u.id,
+        "email": u.email,
+        "name": u.name,
+        "avatar_url": u.avatar_url,
+        "verified": bool(u.verified),
+    }
+
+def dump_message(m) -> dict:
+    return {"id": m.id, "body": m.body, "author": m.author, "created_at": _iso(m.created_at)}
+
+def dump_report(rpt, messages) -> dict:
+    """ReportPublicSchema equivalent; `messages` is any iterable of message rows."""
+    return {
+        "ticket": rpt.ticket,
+        "title": rpt.title,
+        "category": rpt.category,
+        "body": rpt.body,
+        "status": rpt.status,
+        "created_at": _iso(rpt.created_at),
+        "updated_at": _iso(rpt.updated_at),
+        "messages": [dump_message(m) for m in messages],
+    }
+
+def dump_attachment(a) -> dict:
+    return {"id": a.id, "filename": a.filename, "content_type": a.content_type, "size": a.size, "sha256": a.sha256}
+
+def dump_comment(c, user) -> dict:
+    return {"id": c.id, "body": c.body, "created_at": _iso(c.created_at), "user": dump_user(user)}
+
+def dump_feed_post(row) -> dict:
+    """Feed item from a feed.feed_query() row (author columns prefixed author_)."""
+    return {
+        "id": row.id,
+        "caption": row.caption,
+        "image_url": row.image_url,
+        "image_status": row.image_status,
+        # srcset strings per format, e.g. {"webp": "/api/v1/media/ab.. 320w, ..."}
+        "image_variants": (
+            {fmt: srcset(urls) for fmt, urls in row.image_variants.items()}
+            if row.image_variants else None
+        ),
+        "created_at": _iso(row.created_at),
+        "author": {
+            "id": row.author_id,
+            "email": row.author_email,
+            "name": row.author_name,
+            "avatar_url": row.author_avatar_url,
+            "verified": bool(row.author_verified),
+        },
+        "like_count": row.like_count,
+        "comment_count": row.comment_count,
+        "liked": bool(row.liked),
+        "saved": bool(row.saved),
+    }
+
+WHISTLEBLOWER_AUTHOR = {
+    "id": None,
+    "email": None,
+    "name": "Anonymous Whistleblower",
+    "avatar_url": "https://via.placeholder.com/40x40/ffd700/000000?text=W",
+    "verified": True,
+}
+
+def dump_public_report(rpt) -> dict:
+    """Public report shaped like a feed post, with the body truncated to a preview."""
+    return {
+        "id": f"report_{rpt.id}",
+        "type": "report",
+        "ticket": rpt.ticket,
+        "title": rpt.title,
+        "category": rpt.category,
+        "body": rpt.body[:200] + "..." if len(rpt.body) > 200 else rpt.body,
+        "created_at": _iso(rpt.created_at),
+        "author": dict(WHISTLEBLOWER_AUTHOR),
+        "like_count": 0,
+        "comment_count": rpt.message_count,
+        "liked": False,
+        "saved": False,
+        "status": rpt.status,
+    }
+
+
+# ---- JSON Provider ----
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Keeps Flask's defaults (sorted keys, HTTP-date datetimes via default())
+    so responses are identical to the stock provider, just faster.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def install_json_provider(app) -> None:
+    """Use OrjsonProvider when orjson is installed; otherwise keep Flask's."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
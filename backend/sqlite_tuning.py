@@ -0,0 +1,70 @@
+"""
+SQLite tuning for local and single-node deployments.
+
+apply_pragmas() configures every new connection:
+  journal_mode=WAL     readers no longer block the writer (and vice versa)
+  synchronous=NORMAL   durable at checkpoints; safe with WAL
+  busy_timeout         wait for a competing writer instead of failing with
+                       "database is locked"
+  foreign_keys=ON      SQLite ignores ondelete="CASCADE" without it
+  mmap_size            read pages through the OS page cache
+
+SingleWriter is the optional in-process writer queue: a session takes the
+lock at its first write (flush or Core INSERT/UPDATE/DELETE) and releases it
+when the transaction ends, so threads of one process never contend for the
+SQLite write lock. Reads and anything before the first write (e.g. password
+hashing) stay concurrent.
+"""
+import threading
+
+from sqlalchemy import event
+
+
+def apply_pragmas(engine, busy_timeout_ms: int = 5000, synchronous: str = "NORMAL",
+                  mmap_size: int = 256 * 1024 * 1024) -> None:
+    """Register a connect hook that tunes each new SQLite connection."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        finally:
+            cursor.close()
+
+
+class SingleWriter:
+    """Serialize write transactions of one process through a FIFO-ish lock."""
+
+    _KEY = "sqlite_writer_held"
+
+    def __init__(self, timeout: float = 5.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def install(self, session) -> None:
+        """Attach to a Session class, sessionmaker or scoped_session."""
+        event.listen(session, "before_flush", self._before_flush)
+        event.listen(session, "do_orm_execute", self._do_orm_execute)
+        event.listen(session, "after_transaction_end", self._after_transaction_end)
+
+    def _acquire(self, session) -> None:
+        if session.info.get(self._KEY):
+            return
+        # On timeout fall through: SQLite's own busy_timeout still applies.
+        session.info[self._KEY] = self._lock.acquire(timeout=self.timeout)
+
+    def _before_flush(self, session, flush_context, instances):
+        self._acquire(session)
+
+    def _do_orm_execute(self, state):
+        if state.is_insert or state.is_update or state.is_delete:
+            self._acquire(state.session)
+
+    def _after_transaction_end(self, session, transaction):
+        if transaction.parent is None and session.info.pop(self._KEY, False):
+            self._lock.release()
@@ -0,0 +1,399 @@
+"""
+Blob storage for report attachments.
+
+Blobs are content addressed: the key of a stored file is its SHA-256, so
+identical evidence is kept once however many reports attach it. Writes go
+through an upload handle so a file can be streamed in chunks before its
+hash is known:
+
+    upload = storage.begin()
+    upload.write(chunk)            # repeatedly, while hashing
+    upload.close()
+    storage.commit(upload, sha256) # promote; False if already stored
+    upload.abort()                 # drop it instead (no-op after commit)
+
+Moving a large S3 upload into place is a server-side copy, so it can be
+deferred instead: stage() leaves it under its temporary key and returns a
+token that a background job later hands to promote().
+
+Two drivers:
+  LocalStorage  files under a directory (<root>/<sha[:2]>/<sha256>); needs a
+                writable disk, so not usable on serverless platforms.
+  S3Storage     any S3-compatible bucket (AWS, MinIO, R2...). Large files are
+                sent as multipart uploads part by part, and clients can be
+                handed presigned PUT URLs to upload straight to the bucket
+                (to a temporary key, promoted once size and hash check out).
+"""
+import os
+import tempfile
+import threading
+import uuid
+from typing import Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BlobUpload:
+    """Write handle returned by BlobStorage.begin()."""
+
+    def write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Flush everything written so far; called once, before commit()."""
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        """Discard the upload. Safe to call more than once or after commit()."""
+        raise NotImplementedError
+
+
+class BlobStorage:
+    """Minimal interface the attachment routes need."""
+
+    supports_presigned_uploads = False
+
+    def begin(self) -> BlobUpload:
+        raise NotImplementedError
+
+    def commit(self, upload: BlobUpload, sha256: str) -> bool:
+        """Store a closed upload under `sha256`; False if the blob already existed."""
+        raise NotImplementedError
+
+    def stage(self, upload: BlobUpload) -> str | None:
+        """Keep a closed upload durable without moving it into place.
+
+        Returns a token for promote() when moving is costly (the caller then
+        defers it to a background job), or None if the upload should simply
+        be commit()ed now.
+        """
+        return None
+
+    def promote(self, token: str, sha256: str) -> None:
+        """Finish a staged upload; idempotent, so a retried job is harmless."""
+        raise NotImplementedError
+
+    def discard_staged(self, token: str) -> None:
+        raise NotImplementedError
+
+    def exists(self, sha256: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, sha256: str) -> None:
+        raise NotImplementedError
+
+    def read(self, sha256: str, start: int = 0, stop: int | None = None) -> Iterator[bytes]:
+        """Yield the bytes [start, stop) of a blob in chunks."""
+        raise NotImplementedError
+
+    def stat(self, sha256: str) -> dict | None:
+        """{"size": int, "sha256": str | None} of a stored blob, or None if missing."""
+        raise NotImplementedError
+
+    def presign_upload(self, sha256: str, size: int, content_type: str | None,
+                       expires: int) -> tuple[str, dict]:
+        """A URL the client PUTs the file to, under a fresh staging key.
+
+        Returns (staging token, request description). The token is handed to
+        stat_staged()/read_staged() and then promote() or discard_staged().
+        """
+        raise NotImplementedError("This storage driver does not support direct uploads")
+
+    def stat_staged(self, token: str) -> dict | None:
+        raise NotImplementedError
+
+    def read_staged(self, token: str) -> Iterator[bytes]:
+        raise NotImplementedError
+
+
+# ---- Local filesystem ----
+class _LocalUpload(BlobUpload):
+    def __init__(self, incoming_dir: str):
+        os.makedirs(incoming_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=incoming_dir)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data):
+        self._file.write(data)
+
+    def close(self):
+        self._file.close()
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class LocalStorage(BlobStorage):
+    """Blobs as files under `root`; uploads are spooled in <root>/.incoming."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def begin(self):
+        return _LocalUpload(os.path.join(self.root, ".incoming"))
+
+    def commit(self, upload, sha256):
+        dest = self.path(sha256)
+        if os.path.exists(dest):
+            upload.abort()
+            return False
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # Same filesystem as .incoming, so this is an atomic rename
+        os.replace(upload.path, dest)
+        return True
+
+    def exists(self, sha256):
+        return os.path.exists(self.path(sha256))
+
+    def delete(self, sha256):
+        try:
+            os.remove(self.path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def read(self, sha256, start=0, stop=None):
+        with open(self.path(sha256), "rb") as f:
+            f.seek(start)
+            remaining = None if stop is None else stop - start
+            while remaining is None or remaining > 0:
+                chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def stat(self, sha256):
+        try:
+            return {"size": os.path.getsize(self.path(sha256)), "sha256": None}
+        except FileNotFoundError:
+            return None
+
+
+# ---- S3-compatible ----
+class _S3Upload(BlobUpload):
+    """
+    Buffers up to `part_size` bytes. A file that fits is sent with a single
+    PutObject at commit; a larger one becomes a multipart upload to a
+    temporary key, one part per `part_size` bytes, so memory stays bounded.
+    """
+
+    def __init__(self, storage: "S3Storage"):
+        self.storage = storage
+        self.buffer = bytearray()
+        self.temp_key = None
+        self.upload_id = None
+        self.parts = []
+        self.done = False
+
+    def _flush_part(self):
+        s = self.storage
+        if self.upload_id is None:
+            self.temp_key = f"{s.prefix}incoming/{uuid.uuid4().hex}"
+            self.upload_id = s.client.create_multipart_upload(Bucket=s.bucket, Key=self.temp_key)["UploadId"]
+        number = len(self.parts) + 1
+        resp = s.client.upload_part(
+            Bucket=s.bucket, Key=self.temp_key, UploadId=self.upload_id,
+            PartNumber=number, Body=bytes(self.buffer),
+        )
+        self.parts.append({"PartNumber": number, "ETag": resp["ETag"]})
+        self.buffer.clear()
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= self.storage.part_size:
+            self._flush_part()
+
+    def close(self):
+        if self.upload_id is None:
+            return  # small file, sent by commit()
+        if self.buffer:
+            self._flush_part()
+        s = self.storage
+        s.client.complete_multipart_upload(
+            Bucket=s.bucket, Key=self.temp_key, UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+        self.upload_id = None
+
+    def abort(self):
+        if self.done:
+            return
+        self.done = True
+        self.buffer = bytearray()
+        s = self.storage
+        if self.upload_id is not None:
+            s.client.abort_multipart_upload(Bucket=s.bucket, Key=self.temp_key, UploadId=self.upload_id)
+        elif self.temp_key is not None:
+            s.client.delete_object(Bucket=s.bucket, Key=self.temp_key)
+
+
+class S3Storage(BlobStorage):
+    """Driver for a boto3 S3 client; `endpoint_url` points it at MinIO and friends."""
+
+    supports_presigned_uploads = True
+
+    def __init__(self, bucket: str, prefix: str = "", part_size: int = 8 * 1024 * 1024,
+                 client=None, **client_kwargs):
+        self.bucket = bucket
+        self.prefix = prefix
+        # S3 rejects multipart parts smaller than 5 MiB (except the last)
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self._client = client
+        self._client_kwargs = {k: v for k, v in client_kwargs.items() if v}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Built on first use: boto3 adds a few hundred ms to a cold start
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import boto3  # optional dependency, only needed when STORAGE_DRIVER=s3
+                    from botocore.config import Config as BotoConfig
+                    # SigV4 presigned URLs: required by most regions and by MinIO
+                    self._client = boto3.client(
+                        "s3", config=BotoConfig(signature_version="s3v4"), **self._client_kwargs
+                    )
+        return self._client
+
+    def key(self, sha256: str) -> str:
+        return f"{self.prefix}blobs/{sha256}"
+
+    def _head(self, key: str, **kwargs) -> dict | None:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key, **kwargs)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def begin(self):
+        return _S3Upload(self)
+
+    def commit(self, upload, sha256):
+        key = self.key(sha256)
+        if self._head(key) is not None:
+            upload.abort()
+            return False
+        if upload.temp_key is None:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(upload.buffer))
+        else:
+            self.promote(upload.temp_key, sha256)
+        upload.done = True
+        upload.buffer = bytearray()
+        return True
+
+    def stage(self, upload):
+        # A multipart upload is already durable under its temporary key;
+        # moving it is a server-side copy that takes time in proportion to
+        # its size, so it is left to promote().
+        if upload.temp_key is None:
+            return None
+        upload.done = True
+        return upload.temp_key
+
+    def promote(self, token, sha256):
+        key = self.key(sha256)
+        if self._head(key) is None:
+            if self._head(token) is None:
+                raise FileNotFoundError(f"Staged upload {token} is gone")
+            self.client.copy(
+                {"Bucket": self.bucket, "Key": token}, self.bucket, key,
+                ExtraArgs={"MetadataDirective": "COPY"},
+            )
+        self.client.delete_object(Bucket=self.bucket, Key=token)
+
+    def discard_staged(self, token):
+        self.client.delete_object(Bucket=self.bucket, Key=token)
+
+    def exists(self, sha256):
+        return self._head(self.key(sha256)) is not None
+
+    def delete(self, sha256):
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(sha256))
+
+    def _read_key(self, key, start=0, stop=None):
+        byte_range = f"bytes={start}-" + ("" if stop is None else str(stop - 1))
+        body = self.client.get_object(Bucket=self.bucket, Key=key, Range=byte_range)["Body"]
+        try:
+            yield from body.iter_chunks(CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def read(self, sha256, start=0, stop=None):
+        return self._read_key(self.key(sha256), start, stop)
+
+    def read_staged(self, token):
+        return self._read_key(token)
+
+    def _stat_key(self, key):
+        head = self._head(key, ChecksumMode="ENABLED")
+        if head is None:
+            return None
+        checksum = head.get("ChecksumSHA256")
+        # Only a full-object checksum is the file's SHA-256 (multipart ones end in "-N")
+        sha = _b64_to_hex(checksum) if checksum and "-" not in checksum else None
+        return {"size": head["ContentLength"], "sha256": sha}
+
+    def stat(self, sha256):
+        return self._stat_key(self.key(sha256))
+
+    def stat_staged(self, token):
+        return self._stat_key(token)
+
+    def presign_upload(self, sha256, size, content_type, expires):
+        """Presigned PUT to a fresh temporary key, never the blob's final one.
+
+        The request carries the expected SHA-256 checksum, so the bucket
+        rejects a body with other content; the complete step re-checks size
+        and checksum before promote() moves it into place. Whether the blob
+        is already stored makes no difference to the reply.
+        """
+        token = f"{self.prefix}incoming/{uuid.uuid4().hex}"
+        params = {
+            "Bucket": self.bucket,
+            "Key": token,
+            "ContentLength": size,
+            "ChecksumSHA256": _hex_to_b64(sha256),
+        }
+        if content_type:
+            params["ContentType"] = content_type
+        url = self.client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires)
+        headers = {"x-amz-checksum-sha256": params["ChecksumSHA256"]}
+        if content_type:
+            headers["Content-Type"] = content_type
+        return token, {"method": "PUT", "url": url, "headers": headers, "expires_in": expires}
+
+
+def _hex_to_b64(hexdigest: str) -> str:
+    import base64
+    return base64.b64encode(bytes.fromhex(hexdigest)).decode("ascii")
+
+
+def _b64_to_hex(b64: str) -> str:
+    import base64
+    return base64.b64decode(b64).hex()
+
+
+def create_storage(config) -> BlobStorage:
+    """Build the driver selected by STORAGE_DRIVER from a Flask config."""
+    driver = config.get("STORAGE_DRIVER", "local")
+    if driver == "s3":
+        return S3Storage(
+            config["S3_BUCKET"],
+            prefix=config.get("S3_PREFIX", ""),
+            endpoint_url=config.get("S3_ENDPOINT_URL"),
+            region_name=config.get("S3_REGION"),
+        )
+    if driver == "local":
+        return LocalStorage(config["UPLOAD_FOLDER"])
+    raise ValueError(f"Unknown STORAGE_DRIVER {driver!r}")
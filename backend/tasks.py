@@ -0,0 +1,124 @@
+"""
+Background job handlers (see jobs.py).
+
+Importing this module registers them; app.py does so at startup.
+"""
+import hashlib
+import time
+
+from flask import current_app
+from sqlalchemy import select
+
+from counters import reconcile_counters
+from database import db
+from home import fan_out, trim_timelines
+from hot import rebuild_hot_scores
+from jobs import enqueue, job
+from models import Attachment, ImageSource, Media, Post
+
+
+@job("attachments.promote", max_attempts=8)
+def promote_attachment(payload: dict) -> None:
+    """Move a staged upload to its content-addressed key."""
+    current_app.extensions["storage"].promote(payload["staged"], payload["sha256"])
+
+
+@job("counters.reconcile", max_attempts=3)
+def reconcile(payload: dict) -> None:
+    for counter, n in reconcile_counters().items():
+        if n:
+            current_app.logger.info(f"Reconciled {n} drifted {counter} counter(s)")
+
+
+@job("feed.rebuild_hot_scores", max_attempts=3)
+def rebuild_hot(payload: dict) -> None:
+    n = rebuild_hot_scores(full=bool(payload.get("full")))
+    if n:
+        current_app.logger.info(f"Rebuilt {n} drifted hot score(s)")
+
+
+@job("timelines.fan_out", max_attempts=5)
+def fan_out_post(payload: dict) -> None:
+    """Copy a new post into its author's followers' home timelines.
+
+    Also queues timelines.trim once per HOME_TRIM_INTERVAL, so timelines
+    stay near HOME_TIMELINE_MAX entries without a scheduler.
+    """
+    config = current_app.config
+    if fan_out(payload["post_id"], config["FANOUT_MAX_FOLLOWERS"]):
+        bucket = int(time.time() // config["HOME_TRIM_INTERVAL"])
+        enqueue("timelines.trim", key=f"timelines.trim:{bucket}")
+        db.session.commit()
+
+
+@job("timelines.trim", max_attempts=3)
+def trim(payload: dict) -> None:
+    n = trim_timelines(current_app.config["HOME_TIMELINE_MAX"])
+    if n:
+        current_app.logger.info(f"Trimmed {n} home timeline entries")
+
+
+def _apply_variants(post: Post, urls: dict | None) -> None:
+    if not urls:
+        post.image_status = "failed"
+        return
+    post.image_variants = urls
+    fallback = urls.get("jpeg") or next(iter(urls.values()))
+    post.image_url = fallback[max(fallback, key=int)]
+    post.image_status = "ready"
+
+
+@job("images.process_post", max_attempts=3)
+def process_post_image(payload: dict) -> None:
+    """Build the srcset variants of an uploaded post image.
+
+    The original (with its EXIF) is deleted afterwards unless the same bytes
+    are also report evidence; only the stripped variants are ever served.
+    The result is recorded as an ImageSource first, so posts with identical
+    bytes reuse it whether their job runs before or after the deletion.
+    """
+    from images import ImageError, make_variants
+
+    post = db.session.get(Post, payload["post_id"])
+    if post is None:
+        return
+    config = current_app.config
+    storage = current_app.extensions["storage"]
+    original = payload["sha256"]
+    source = db.session.get(ImageSource, original)
+    if source is None:
+        if storage.stat(original) is None:
+            # Deleted by the job of an identical upload, which recorded its
+            # source just before; anything else is worth a retry
+            db.session.expire_all()
+            source = db.session.get(ImageSource, original)
+            if source is None:
+                raise FileNotFoundError(f"Original image {original} is missing")
+    if source is None:
+        try:
+            variants = make_variants(
+                b"".join(storage.read(original)),
+                widths=config["IMAGE_WIDTHS"],
+                quality=config["IMAGE_QUALITY"],
+                max_pixels=config["IMAGE_MAX_PIXELS"],
+            )
+        except ImageError as e:
+            # Retrying will not help: mark the post and stop
+            current_app.logger.info(f"Post {post.id} image rejected: {e}")
+            variants = []
+        urls = {}
+        for v in variants:
+            sha256 = hashlib.sha256(v.data).hexdigest()
+            upload = storage.begin()
+            upload.write(v.data)
+            upload.close()
+            storage.commit(upload, sha256)
+            db.session.merge(Media(sha256=sha256, content_type=v.content_type, size=len(v.data), width=v.width))
+            urls.setdefault(v.format, {})[str(v.width)] = f"{config['MEDIA_BASE_URL']}/api/v1/media/{sha256}"
+        source = db.session.merge(ImageSource(sha256=original, variants=urls or None))
+    _apply_variants(post, source.variants)
+    db.session.commit()
+
+    if db.session.scalar(select(Attachment.id).filter_by(sha256=original).limit(1)) is None:
+        storage.delete(original)
+    current_app.extensions["response_cache"].invalidate("feed")
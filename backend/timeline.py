@@ -0,0 +1,89 @@
+"""
+Merged timeline of feed posts and public reports.
+
+Both sources are already keyset paginated by (created_at, id) DESC, so a
+timeline page is a k-way merge: fetch at most `limit + 1` rows from each
+stream, heapq.merge them newest first and keep `limit`. The cursor records
+how far each stream has been consumed, e.g. {"posts": [ts, id],
+"reports": [ts, id]}, so every page is one bounded index range scan per
+stream no matter how deep the client has scrolled, and a stream that has
+not contributed yet simply starts from the top.
+
+Items keep the shapes of their own endpoints (dump_feed_post with "type":
+"post", dump_public_report), so clients can render them the same way.
+"""
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import select
+
+from database import db
+from feed import feed_query
+from http_cache import weak_etag
+from models import Report
+from pagination import InvalidCursor, keyset_page
+from serializers import dump_feed_post, dump_public_report
+
+STREAMS = ("posts", "reports")
+
+
+def encode_timeline_cursor(positions: dict) -> str:
+    raw = json.dumps(
+        {name: [ts.isoformat(), row_id] for name, (ts, row_id) in positions.items()},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_timeline_cursor(cursor: str | None) -> dict:
+    """{stream: (created_at, id)} for the streams consumed so far."""
+    if not cursor:
+        return {}
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return {
+            name: (datetime.fromisoformat(ts), int(row_id))
+            for name, (ts, row_id) in raw.items() if name in STREAMS
+        }
+    except (binascii.Error, ValueError, TypeError, AttributeError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def fetch_timeline(viewer_id: int | None = None, limit: int = 20, positions: dict | None = None) -> dict:
+    """One merged page: {"items", "next_cursor", "etag"}."""
+    positions = dict(positions or {})
+    posts = db.session.execute(feed_query(viewer_id, limit, positions.get("posts"))).all()
+    reports = db.session.scalars(keyset_page(
+        select(Report).filter_by(status="open"),
+        Report.created_at, Report.id, positions.get("reports"), limit,
+    )).all()
+
+    # Rows sharing a timestamp across streams are ordered posts first, then by id
+    merged = heapq.merge(
+        ((p.created_at, 1, p.id, "posts", p) for p in posts),
+        ((r.created_at, 0, r.id, "reports", r) for r in reports),
+        reverse=True,
+    )
+    page = list(islice(merged, limit + 1))
+    # Each stream returned at most limit + 1 rows, so if the merge ran dry
+    # before limit + 1, every stream is exhausted.
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    items, validators = [], []
+    for created_at, _, row_id, stream, row in page:
+        positions[stream] = (created_at, row_id)
+        if stream == "posts":
+            items.append({"type": "post", **dump_feed_post(row)})
+            validators.append(("p", row.id, row.image_status, row.like_count, row.comment_count))
+        else:
+            items.append(dump_public_report(row))
+            validators.append(("r", row.id, row.updated_at))
+
+    next_cursor = encode_timeline_cursor(positions) if has_more else None
+    return {"items": items, "next_cursor": next_cursor, "etag": weak_etag(next_cursor, validators)}
@@ -0,0 +1,133 @@
+"""
+Streaming multipart uploads for report evidence.
+
+request.files makes werkzeug parse the whole body up front, spooling every
+part to memory or a temp file before the view runs, and the view then copies
+each part a second time with save(). parse_report_upload() instead feeds the
+request stream through werkzeug's sans-io MultipartDecoder in fixed-size
+chunks: file parts are written straight into a blob storage upload
+(storage.py) while their SHA-256 is computed, and the per-file, per-report
+and file-count limits are checked as the bytes arrive, so an oversized
+upload is rejected after at most one extra chunk.
+"""
+import hashlib
+from typing import NamedTuple
+
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.sansio.multipart import MultipartDecoder, NeedData, Field, File, Data, Epilogue
+
+from storage import BlobStorage, BlobUpload
+
+
+class UploadError(Exception):
+    """Rejected upload; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class UploadedFile(NamedTuple):
+    field: str
+    filename: str
+    content_type: str | None
+    sha256: str
+    size: int
+    upload: BlobUpload
+
+
+class ParsedUpload:
+    """Form fields and streamed files of one multipart request."""
+
+    def __init__(self):
+        self.fields: dict[str, str] = {}
+        self.files: list[UploadedFile] = []
+
+    def discard(self) -> None:
+        """Abort uploads that were not committed to storage."""
+        for f in self.files:
+            f.upload.abort()
+
+
+def parse_report_upload(stream, boundary: bytes, storage: BlobStorage, *, max_file_bytes: int,
+                        max_total_bytes: int, max_files: int, used_bytes: int = 0, used_files: int = 0,
+                        max_field_bytes: int = 64 * 1024, chunk_size: int = 64 * 1024) -> ParsedUpload:
+    """Stream a multipart/form-data body into fields and storage uploads.
+
+    `max_total_bytes` and `max_files` are the per-report limits, of which
+    `used_bytes` and `used_files` are already taken by earlier uploads.
+    Raises UploadError (413 for limits, 400 for malformed bodies, 503 if
+    storage fails); uploads started so far are aborted before it propagates.
+    """
+    decoder = MultipartDecoder(boundary, max_parts=max_files + 32)
+    parsed = ParsedUpload()
+    total = used_bytes
+    # State of the part being read: a field buffer or an open upload
+    name = field_buf = None
+    out = digest = None
+    filename = content_type = None
+    size = 0
+
+    try:
+        while True:
+            event = decoder.next_event()
+            if isinstance(event, NeedData):
+                decoder.receive_data(stream.read(chunk_size) or None)
+            elif isinstance(event, Field):
+                name, field_buf = event.name, bytearray()
+            elif isinstance(event, File):
+                name, field_buf = event.name, None
+                filename, content_type, size = event.filename, event.headers.get("content-type"), 0
+                if filename:  # browsers send an empty part for an unused file input
+                    if used_files + len(parsed.files) >= max_files:
+                        left = f" ({max_files - used_files} more allowed)" if used_files else ""
+                        raise UploadError(f"At most {max_files} files per report{left}", 413)
+                    out, digest = storage.begin(), hashlib.sha256()
+            elif isinstance(event, Data):
+                if field_buf is not None:
+                    field_buf += event.data
+                    if len(field_buf) > max_field_bytes:
+                        raise UploadError(f"Field '{name}' is too large", 413)
+                    if not event.more_data:
+                        parsed.fields[name] = field_buf.decode("utf-8", "replace")
+                        field_buf = None
+                elif out is not None:
+                    size += len(event.data)
+                    total += len(event.data)
+                    if size > max_file_bytes:
+                        raise UploadError(f"'{filename}' exceeds {max_file_bytes} bytes", 413)
+                    if total > max_total_bytes:
+                        left = f" ({max_total_bytes - used_bytes} bytes left)" if used_bytes else ""
+                        raise UploadError(f"Attachments exceed {max_total_bytes} bytes per report{left}", 413)
+                    out.write(event.data)
+                    digest.update(event.data)
+                    if not event.more_data:
+                        out.close()
+                        parsed.files.append(UploadedFile(
+                            name, filename, content_type, digest.hexdigest(), size, out,
+                        ))
+                        out = None
+            elif isinstance(event, Epilogue):
+                return parsed
+    except UploadError:
+        _abort(parsed, out)
+        raise
+    except RequestEntityTooLarge:
+        _abort(parsed, out)
+        raise UploadError("Request body too large", 413)
+    except (ValueError, BadRequest):  # includes a client disconnecting mid-upload
+        _abort(parsed, out)
+        raise UploadError("Malformed multipart body", 400)
+    except Exception as e:
+        _abort(parsed, out)
+        raise UploadError("Evidence storage is unavailable", 503) from e
+
+
+def _abort(parsed: ParsedUpload, out) -> None:
+    if out is not None:
+        try:
+            out.abort()
+        except Exception:
+            pass
+    parsed.discard()
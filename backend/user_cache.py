@@ -0,0 +1,61 @@
+"""
+Current-user snapshots.
+
+Authenticated routes only need a handful of user fields, so the resolved
+user is kept as an immutable UserSnapshot (the UserPublicSchema fields) in
+a bounded TTL cache keyed by uid. A cache hit skips the users table
+entirely; updates or deletes of a User row through the ORM evict it from
+the cache of the app making the write (app.extensions["user_cache"]).
+"""
+from typing import NamedTuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from cache import TTLCache
+from database import db
+from models import User
+
+
+class UserSnapshot(NamedTuple):
+    id: int
+    email: str
+    name: str
+    avatar_url: str | None
+    verified: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(user.id, user.email, user.name, user.avatar_url, user.verified)
+
+
+class UserCache:
+    """TTL/LRU cache of UserSnapshot by uid, invalidated on User writes."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self._cache = TTLCache(maxsize, ttl)
+
+    def load(self, uid: int) -> UserSnapshot | None:
+        """Return the user's snapshot, querying the database only on a miss."""
+        snap = self._cache.get(uid)
+        if snap is None:
+            user = db.session.get(User, uid)
+            if user is None:
+                return None
+            snap = UserSnapshot.from_user(user)
+            self._cache.set(uid, snap)
+        return snap
+
+    def invalidate(self, uid: int) -> None:
+        self._cache.delete(uid)
+
+
+# Registered once for the process rather than per UserCache, so listeners do
+# not pile up on the User mapper (keeping old caches alive) with each app.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_on_write(mapper, connection, target):
+    if has_app_context():
+        cache = current_app.extensions.get("user_cache")
+        if cache is not None:
+            cache.invalidate(target.id)
@@ -32,24 +32,75 @@ export async function createReport(formData) {
   }
 }
 
+// Short-lived report tokens handed out by the backend after the first
+// successful access-code check; reusing them skips server-side Argon2.
+const reportTokens = {};
+
+function reportHeaders(ticket, extra = {}) {
+  const token = reportTokens[ticket];
+  return token ? { ...extra, "X-Report-Token": token } : extra;
+}
+
+function rememberReportToken(ticket, data) {
+  if (data && data.report_token) reportTokens[ticket] = data.report_token;
+  return data;
+}
+
 export async function fetchReport(ticket, code) {
   try {
-    const r = await fetch(`${API}/api/v1/reports/${ticket}?code=${encodeURIComponent(code)}`);
+    const r = await fetch(`${API}/api/v1/reports/${ticket}?code=${encodeURIComponent(code)}`, {
+      headers: reportHeaders(ticket)
+    });
     if (!r.ok) throw new Error(`Fetch failed: ${r.status}`);
-    return r.json();
+    return rememberReportToken(ticket, await r.json());
   } catch (error) {
     handleFetchError(error);
   }
 }
 
+// Live thread updates over Server-Sent Events. Authenticates once with the
+// report token (or the access code) and receives a fresh token on connect.
+// The token is fixed in the URL, so callers should resubscribe from onError
+// rather than rely on the browser's own reconnect: a connect that is refused
+// before opening drops the token, and the next attempt uses the access code.
+// Returns a function that closes the stream.
+export function subscribeReport(ticket, code, lastMessageId, onMessage, onError) {
+  const token = reportTokens[ticket];
+  const params = new URLSearchParams(token ? { token } : { code });
+  if (lastMessageId != null) params.set("last_event_id", lastMessageId);
+  const source = new EventSource(`${API}/api/v1/reports/${ticket}/events?${params}`);
+  let opened = false;
+  source.onopen = () => { opened = true; };
+  source.addEventListener("token", (e) => rememberReportToken(ticket, JSON.parse(e.data)));
+  source.onmessage = (e) => onMessage(JSON.parse(e.data));
+  source.onerror = () => {
+    if (!opened && reportTokens[ticket] === token) delete reportTokens[ticket];
+    if (onError) onError();
+  };
+  return () => source.close();
+}
+
 export async function postMessage(ticket, code, body) {
   try {
     const r = await fetch(`${API}/api/v1/reports/${ticket}/messages?code=${encodeURIComponent(code)}`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: reportHeaders(ticket, { "Content-Type": "application/json" }),
       body: JSON.stringify({ body })
     });
     if (!r.ok) throw new Error(`Message failed: ${r.status}`);
+    return rememberReportToken(ticket, await r.json());
+  } catch (error) {
+    handleFetchError(error);
+  }
+}
+
+// Feed posts and public reports merged newest first by the server; pass
+// the previous page's next_cursor to continue.
+export async function fetchTimeline(cursor) {
+  try {
+    const qs = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    const r = await fetch(`${API}/api/v1/timeline${qs}`);
+    if (!r.ok) throw new Error(`Fetch timeline failed: ${r.status}`);
     return r.json();
   } catch (error) {
     handleFetchError(error);
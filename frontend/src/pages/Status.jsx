@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { useSearchParams } from "react-router-dom";
 import { Search, MessageCircle, Clock, User, Send, AlertCircle, CheckCircle, Copy } from "lucide-react";
-import { fetchReport, postMessage } from "../api";
+import { fetchReport, postMessage, subscribeReport } from "../api";
 
 export default function Status() {
   const [searchParams] = useSearchParams();
@@ -39,7 +39,8 @@ export default function Status() {
     try {
       await postMessage(ticket.trim(), code.trim(), message.trim());
       setMessage("");
-      await load(); // Refresh the report
+      // Usually already pushed by the live stream; reloading also covers a stream that is down
+      await load();
     } catch (ex) {
       setErr(ex.message || "Failed to send message");
     } finally {
@@ -77,6 +78,36 @@ export default function Status() {
     }
   }, []);
 
+  // Once a report is loaded, new messages are pushed by the server
+  const reportTicket = report?.ticket;
+  useEffect(() => {
+    if (!reportTicket) return;
+    const messages = report.messages || [];
+    let lastId = messages.length ? messages[messages.length - 1].id : null;
+    let unsubscribe = null;
+    let retry = null;
+
+    function connect() {
+      unsubscribe = subscribeReport(reportTicket, code.trim(), lastId, (msg) => {
+        lastId = Math.max(lastId ?? 0, msg.id);
+        setReport((prev) => prev && !prev.messages.some((m) => m.id === msg.id)
+          ? { ...prev, messages: [...prev.messages, msg] }
+          : prev);
+      }, () => {
+        // Recycled or refused: resubscribe with the latest token (or the code)
+        unsubscribe();
+        clearTimeout(retry);
+        retry = setTimeout(connect, 3000);
+      });
+    }
+
+    connect();
+    return () => {
+      clearTimeout(retry);
+      unsubscribe();
+    };
+  }, [reportTicket]);
+
   return (
     <div className="status-page">
       <div className="container">